@@ -1,17 +1,16 @@
 import sys
 import json
-import datetime
 from manage_categories import *
 from manage_fields import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from select_category import *
+from catalog_core import *
 from PyQt5.QtWidgets import *
-from PIL import Image
 
 
 class AddItem(QDialog):
-    def __init__(self, category, category_fields):
+    def __init__(self, category):
         super().__init__()
 
         # Set this window to always be on top when visible
@@ -19,16 +18,12 @@ class AddItem(QDialog):
 
         # Initialize category variables
         self.category = category
-        self.category_fields = category_fields
 
-        # Initialize image variables
+        # Initialize image variables, where the image is stored in the background once the item is added
         self.original_image_path = ""
-        self.new_image_path = ""
-        self.image_width = 0
-        self.image_height = 0
 
-        # Initialize item variables
-        self.item = {}
+        # Initialize item variables, where the item is only created once it's submitted
+        self.item = None
 
         # Initialize window variables
         self.init_widgets()
@@ -73,7 +68,7 @@ class AddItem(QDialog):
         self.layouts["submit_layout"].setSpacing(5)
 
         # Initialize category fields
-        if len(self.category_fields[self.category]) > 0:
+        if len(self.category.fields) > 0:
             self.init_fields_layouts()
         else:
             self.init_no_fields_layouts()
@@ -110,13 +105,13 @@ class AddItem(QDialog):
         """
 
         # Initialize the header
-        self.header = QLabel("Add " + self.category)
+        self.header = QLabel("Add " + self.category.name)
         self.header.setStyleSheet(".QLabel{font-size: 24px;}")
         self.header.setFixedHeight(20)
         self.header.setAlignment(Qt.AlignCenter)
 
         # Initialize the no field message label
-        self.no_field_message = QLabel("The " + self.category + " category doesn't have any fields.")
+        self.no_field_message = QLabel("The " + self.category.name + " category doesn't have any fields.")
         self.no_field_message.setWordWrap(True)
         self.no_field_message.setStyleSheet(".QLabel{font-size: 14px;}")
 
@@ -132,22 +127,17 @@ class AddItem(QDialog):
 
         # Initialize and populate the labels and inputs data structures
         self.labels, self.inputs = {}, {}
-        for idx in range(len(self.category_fields[self.category])):
-            key = str(idx)
-            field_name = self.category_fields[self.category][key][0]
-            field_type = self.category_fields[self.category][key][1]
-            field_items = self.category_fields[self.category][key][2]
-
-            self.labels[field_name] = QLabel()
-            self.labels[field_name].setText(field_name)
-            self.labels[field_name].setStyleSheet(".QLabel{font-size: 14px;}")
-            self.labels[field_name].setAlignment(Qt.AlignCenter)
-            if field_type == "Text":
-                self.inputs[field_name] = QLineEdit()
+        for field in self.category.fields:
+            self.labels[field.name] = QLabel()
+            self.labels[field.name].setText(field.name)
+            self.labels[field.name].setStyleSheet(".QLabel{font-size: 14px;}")
+            self.labels[field.name].setAlignment(Qt.AlignCenter)
+            if field.type == "Text":
+                self.inputs[field.name] = QLineEdit()
             else:
-                self.inputs[field_name] = QComboBox()
-                self.inputs[field_name].addItems(field_items)
-            self.inputs[field_name].setFixedSize(120, 20)
+                self.inputs[field.name] = QComboBox()
+                self.inputs[field.name].addItems(field.items)
+            self.inputs[field.name].setFixedSize(120, 20)
 
         # Initialize the submit button
         self.submit = QPushButton("Submit", self)
@@ -197,51 +187,14 @@ class AddItem(QDialog):
         image_file = QFileDialog.getOpenFileName(self, "Open Image", "c:\\", "Image Files (*.png *.jpg *.bmp)")
         self.original_image_path = image_file[0]
         if self.original_image_path:
-            image = QPixmap(self.original_image_path)
-            self.image_width = QPixmap.width(image)
-            self.image_height = QPixmap.height(image)
-
-            # Calculate the image's aspect ratio
-            width_ratio = 1.0
-            height_ratio = 1.0
-            if self.image_width > self.image_height:
-                width_ratio = self.image_width / self.image_height
-            else:
-                height_ratio = self.image_height / self.image_width
-
-            # Reduce image dimensions to be less than or equal to 150
-            while self.image_width > 150 or self.image_height > 150:
-                self.image_width -= width_ratio
-                self.image_height -= height_ratio
-
-            # Convert image dimensions back to integers
-            self.image_width = int(self.image_width)
-            self.image_height = int(self.image_height)
-
-            # Set the scaled dimensions of the icon to fit the container
-            image = image.scaled(self.image_width, self.image_height, Qt.KeepAspectRatio)
+            # Decode the image at the size of the container instead of at full size
+            image_reader = QImageReader(self.original_image_path)
+            image_size = image_reader.size()
+            if image_size.width() > 150 or image_size.height() > 150:
+                image_reader.setScaledSize(image_size.scaled(150, 150, Qt.KeepAspectRatio))
 
             # Add the image to the container
-            self.image_container.setPixmap(image)
-
-    def save_image(self):
-        """Copies an image to the program directory and saves the path to the item record"""
-
-        # Create an image object from the original image path
-        image = Image.open(self.original_image_path)
-
-        # Resize the image
-        image_resized = image.resize((self.image_width, self.image_height), Image.ANTIALIAS)
-
-        # Remove special characters from the item's 'Date Entered' field to make it compatible as a file name
-        unformatted_date = self.item["Date Entered"].replace(":", "").replace(".", "").replace("-", "")
-
-        # Add the new image path to the item record
-        self.new_image_path = "images/item-images/" + unformatted_date + ".jpg"
-        self.item["Image Path"] = self.new_image_path
-
-        # Save the image as a new file at the new image path location
-        image_resized.save(self.new_image_path, 'JPEG', quality=90)
+            self.image_container.setPixmap(QPixmap.fromImage(image_reader.read()))
 
     def center_window(self):
         """Positions the window in the center of the screen"""
@@ -252,32 +205,13 @@ class AddItem(QDialog):
 
     def submit_item(self):
         """Creates a new item and returns focus to the main window"""
+        inputs = {}
         for key in self.inputs:
             if isinstance(self.inputs[key], QComboBox):
-                self.item[key] = self.inputs[key].currentText()
+                inputs[key] = self.inputs[key].currentText()
             else:
-                # If there are multiple inputs for one field, split them
-                if "," in self.inputs[key].text():
-                    input_list = self.inputs[key].text()
-                    input_list = input_list.split(",")
-
-                    # If whitespace exists at the beginning of an input, remove it
-                    for idx in range(len(input_list)):
-                        if input_list[idx][0] == " ":
-                            input_list[idx] = input_list[idx][1:]
-
-                    self.item[key] = input_list
-                else:
-                    self.item[key] = self.inputs[key].text()
-
-        self.item["Category"] = self.category
-        now = datetime.datetime.now()
-        self.item["Date Entered"] = str(now.month) + "." + str(now.day) + "." + str(now.year) + "-" + \
-                                        str(now.hour) + ":" + str(now.minute) + ":" + str(now.second)
-
-        # Save the image to the program directory
-        if self.original_image_path:
-            self.save_image()
+                inputs[key] = self.inputs[key].text()
+        self.item = self.category.new_item(inputs)
 
         # Close the window
         self.hide()
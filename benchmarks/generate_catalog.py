@@ -0,0 +1,122 @@
+"""Generates synthetic catalogs in the {"Profile", "Data"} layout, for timing the program with large catalogs
+
+Usage: python benchmarks/generate_catalog.py catalog.json --items 100000 [--categories 5] [--text-fields 3]
+       [--dropdown-fields 2] [--multi-value-fields 1] [--dropdown-items 8] [--images 0] [--seed 0]
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_stream import *
+
+# The words text values are made of, so searches in a generated catalog match a realistic share of its items
+WORDS = ["north", "south", "river", "road", "bridge", "hill", "cedar", "oak", "maple", "stone", "creek", "valley",
+         "ridge", "lake", "field", "park", "station", "market", "harbor", "mill", "grove", "summit", "canyon", "mesa"]
+
+# The first item key, which is a time in microseconds like the keys the program hands out
+FIRST_KEY = 1600000000000000
+
+
+class GeneratedItems:
+    """The items of a generated catalog, which are generated as they're written instead of being kept in memory"""
+
+    def __init__(self, profile, item_count, image_paths=None, seed=0):
+        # Initialize catalog variables
+        self.profile = profile
+        self.item_count = item_count
+        self.image_paths = image_paths or []
+        self.seed = seed
+
+    def items(self):
+        """Yields the key and item of every generated item, in order"""
+        rng = random.Random(self.seed)
+        categories = list(self.profile["Category Names"].values())
+        category_fields = {category: list(self.profile["Category Fields"][category].values())
+                           for category in categories}
+        for number in range(self.item_count):
+            category = categories[number % len(categories)]
+            item = {}
+            for name, field_type, field_items in category_fields[category]:
+                if field_type == "Dropdown":
+                    item[name] = rng.choice(field_items)
+                elif name.startswith("Tags"):
+                    item[name] = rng.sample(WORDS, rng.randint(2, 4))
+                else:
+                    item[name] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + " " + str(number)
+            item["Category"] = category
+            item["Date Entered"] = "{}.{}.{}-{}:{}:{}".format(rng.randint(1, 12), rng.randint(1, 28),
+                                                               rng.randint(2015, 2024), rng.randint(0, 23),
+                                                               rng.randint(0, 59), rng.randint(0, 59))
+            if self.image_paths:
+                item["Image Path"] = self.image_paths[number % len(self.image_paths)]
+            yield str(FIRST_KEY + number), item
+
+
+def generate_profile(category_count=5, text_fields=3, dropdown_fields=2, multi_value_fields=1, dropdown_items=8):
+    """Returns the profile of a generated catalog, whose categories each have the same mix of fields
+
+    Multi-value fields are Text fields whose values are lists, as fields entered with commas are stored.
+    """
+    fields = [["Name", "Text", ""]]
+    fields.extend(["Text " + str(number), "Text", ""] for number in range(1, text_fields))
+    fields.extend(["Choice " + str(number), "Dropdown", ["Option " + str(option) for option in range(dropdown_items)]]
+                  for number in range(1, dropdown_fields + 1))
+    fields.extend(["Tags " + str(number), "Text", ""] for number in range(1, multi_value_fields + 1))
+    categories = ["Category " + str(number) for number in range(1, category_count + 1)]
+    return {"Category Names": {str(position): category for position, category in enumerate(categories)},
+            "Category Fields": {category: {str(position): list(field) for position, field in enumerate(fields)}
+                                for category in categories},
+            "Icon Paths": {}}
+
+
+def generate_images(image_folder, image_count, seed=0):
+    """Writes small solid-color images for generated items to use and returns their paths"""
+    from PIL import Image
+
+    os.makedirs(image_folder, exist_ok=True)
+    rng = random.Random(seed)
+    image_paths = []
+    for number in range(image_count):
+        image_path = os.path.abspath(os.path.join(image_folder, "generated-" + str(number) + ".png"))
+        if not os.path.exists(image_path):
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            Image.new("RGB", (150, 150), color).save(image_path)
+        image_paths.append(image_path)
+    return image_paths
+
+
+def generate_catalog(file_name, item_count, category_count=5, text_fields=3, dropdown_fields=2,
+                     multi_value_fields=1, dropdown_items=8, image_count=0, seed=0):
+    """Writes a generated catalog to a json file, along with its images in an images folder next to it"""
+    profile = generate_profile(category_count, text_fields, dropdown_fields, multi_value_fields, dropdown_items)
+    image_paths = []
+    if image_count:
+        image_folder = os.path.join(os.path.dirname(os.path.abspath(file_name)), "generated-images")
+        image_paths = generate_images(image_folder, image_count, seed)
+    catalog = {"Profile": profile, "Data": GeneratedItems(profile, item_count, image_paths, seed)}
+    write_atomically(file_name, lambda file: write_catalog(catalog, file))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a synthetic catalog for timing the program.")
+    parser.add_argument("file_name", help="the json catalog file to write")
+    parser.add_argument("--items", type=int, default=1000, help="the number of items")
+    parser.add_argument("--categories", type=int, default=5, help="the number of categories")
+    parser.add_argument("--text-fields", type=int, default=3, help="the number of Text fields in each category")
+    parser.add_argument("--dropdown-fields", type=int, default=2, help="the number of Dropdown fields in each category")
+    parser.add_argument("--multi-value-fields", type=int, default=1,
+                        help="the number of fields with multiple values in each category")
+    parser.add_argument("--dropdown-items", type=int, default=8, help="the number of items in each Dropdown field")
+    parser.add_argument("--images", type=int, default=0, help="the number of images shared among the items")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random values")
+    arguments = parser.parse_args()
+    generate_catalog(arguments.file_name, arguments.items, arguments.categories, arguments.text_fields,
+                     arguments.dropdown_fields, arguments.multi_value_fields, arguments.dropdown_items,
+                     arguments.images, arguments.seed)
+
+
+if __name__ == "__main__":
+    main()
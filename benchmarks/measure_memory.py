@@ -0,0 +1,81 @@
+"""Measures the memory a generated catalog's items take when stored column by column, compared with plain dicts
+
+Usage: python benchmarks/measure_memory.py [--sizes 20000,100000] [--output results.json] [--work-dir folder]
+
+Memory is measured with tracemalloc, as the bytes still allocated once the items have been read and any temporary
+objects freed, so it counts the items alone and not the peak reached while reading them.
+"""
+import os
+import gc
+import sys
+import json
+import argparse
+import tempfile
+import tracemalloc
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_FOLDER))
+sys.path.insert(0, BENCHMARK_FOLDER)
+
+from generate_catalog import *
+from catalog_core import *
+
+
+def measure_memory(read_items):
+    """Returns the bytes still allocated by the items read_items returns, along with the items"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        items = read_items()
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return allocated, items
+
+
+def read_plain_items(file_name):
+    """Reads a catalog file's items into a dict of dicts, as the json layout stores them"""
+    with open(file_name, "r") as file:
+        return json.load(file)["Data"]
+
+
+def measure_catalog(file_name):
+    """Returns the memory a catalog file's items take as plain dicts and stored column by column"""
+    plain_bytes, plain_items = measure_memory(lambda: read_plain_items(file_name))
+    item_count = len(plain_items)
+    del plain_items
+
+    # Text read in the first measurement is freed, so the columns don't share any of it
+    columnar_bytes, columnar_items = measure_memory(lambda: read_sections(file_name)["Data"])
+    return {"Items": item_count, "Plain Bytes": plain_bytes, "Columnar Bytes": columnar_bytes,
+            "Plain Bytes Per Item": round(plain_bytes / max(item_count, 1), 1),
+            "Columnar Bytes Per Item": round(columnar_bytes / max(item_count, 1), 1),
+            "Ratio": round(plain_bytes / max(columnar_bytes, 1), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the memory of a generated catalog's items.")
+    parser.add_argument("--sizes", default="20000,100000", help="the comma separated numbers of items")
+    parser.add_argument("--output", help="the json file the results are written to, instead of the console")
+    parser.add_argument("--work-dir", help="the folder generated catalogs are kept in, so later runs reuse them")
+    arguments = parser.parse_args()
+
+    work_dir = os.path.abspath(arguments.work_dir or tempfile.mkdtemp(prefix="omnilog-memory-"))
+    os.makedirs(work_dir, exist_ok=True)
+    results = []
+    for size in [int(size) for size in arguments.sizes.split(",")]:
+        generated_file = os.path.join(work_dir, "generated-" + str(size) + ".json")
+        if not os.path.exists(generated_file):
+            generate_catalog(generated_file, size)
+        results.append(measure_catalog(generated_file))
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump({"Results": results}, file, indent=2)
+    else:
+        print(json.dumps({"Results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
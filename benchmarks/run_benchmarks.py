@@ -0,0 +1,187 @@
+"""Times the program's main operations on generated catalogs of several sizes, without showing any windows
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 1000,100000,1000000] [--repeats 5] [--output results.json]
+       [--baseline previous.json] [--tolerance 1.25] [--work-dir folder]
+
+Each operation is timed through the main window, the way the buttons run it, and the results are written as json,
+which is compared with the results of an earlier run when a baseline is given.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+# Run Qt without a display, unless another platform has been chosen
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_FOLDER))
+sys.path.insert(0, BENCHMARK_FOLDER)
+
+from generate_catalog import *
+from main_window import *
+
+
+class Benchmark:
+    """Times each operation on one generated catalog through a main window"""
+
+    def __init__(self, application, catalog_file, repeats):
+        # Initialize benchmark variables
+        self.application = application
+        self.catalog_file = catalog_file
+        self.repeats = repeats
+        self.results = {}
+        self.add_item = None
+
+        # Initialize the window, which saves only when it's told to, so saves don't land in other timings
+        MainWindow.autosave_delay = 0
+        self.window = MainWindow()
+        self.window.show()
+        self.application.processEvents()
+
+    def run(self):
+        """Times every operation, returning a dict from each operation to its times in milliseconds"""
+        self.time_operation("load_catalog", self.load_catalog)
+        self.time_operation("update_catalog", self.window.update_catalog)
+        self.time_operation("show_item_details", self.show_item_details)
+        self.time_operation("AddItem.submit_item", self.submit_item, self.open_add_item)
+        self.time_operation("save_catalog", self.save_catalog)
+        if self.window.catalog.journal is not None and self.window.catalog.journal.compact_while_open:
+            self.time_operation("save_catalog (snapshot)", self.save_snapshot)
+        self.window.image_pipeline.wait_for_done()
+        self.window.wait_for_save()
+        self.window.hide()
+        return self.results
+
+    def time_operation(self, operation, function, prepare=None):
+        """Runs an operation once for each repeat, recording how long each run takes, after running the prepare
+        function, if it's given, which isn't timed"""
+        times = []
+        for repeat in range(self.repeats):
+            if prepare is not None:
+                prepare()
+            start = time.perf_counter()
+            function()
+            times.append(round((time.perf_counter() - start) * 1000, 3))
+        self.results[operation] = times
+
+    def load_catalog(self):
+        """Opens the catalog, as import_catalog and load_last_catalog do, and waits until every item is listed"""
+        self.window.load_catalog(self.catalog_file, show_progress=False)
+        while self.window.catalog_loader is not None and self.window.catalog_loader.isRunning():
+            self.application.processEvents()
+        self.application.processEvents()
+
+    def show_item_details(self):
+        """Selects the next item in the list, which shows its details, so every run renders an item it hasn't shown"""
+        model = self.window.catalog_model
+        row = (self.window.catalog_items.currentIndex().row() + 1) % max(model.rowCount(), 1)
+        self.window.catalog_items.setCurrentIndex(model.index(row))
+
+    def open_add_item(self):
+        """Opens the add item dialog for the first category, without showing it, and fills in its fields"""
+        from add_item import AddItem
+
+        self.add_item = AddItem(self.window.catalog.categories()[0])
+        for name, field_input in self.add_item.inputs.items():
+            if isinstance(field_input, QLineEdit):
+                field_input.setText("benchmark " + name.lower())
+
+    def submit_item(self):
+        """Submits the add item dialog and adds its item to the catalog, as add_item does"""
+        self.add_item.submit_item()
+        self.window.catalog.add_item(self.add_item.item)
+        self.add_item.deleteLater()
+
+    def save_catalog(self):
+        """Saves the change made by adding an item, as save_catalog does, and waits until it's written"""
+        self.open_add_item()
+        self.submit_item()
+        self.window.start_save(show_confirmation=False)
+        self.window.wait_for_save()
+
+    def save_snapshot(self):
+        """Rewrites the whole catalog, as a save does once its journal has grown large, and waits until it's written"""
+        self.open_add_item()
+        self.submit_item()
+        self.window.catalog.journal.compaction_required = True
+        self.window.start_save(show_confirmation=False)
+        self.window.wait_for_save()
+
+
+def run_benchmarks(sizes, repeats, work_dir):
+    """Generates a catalog of each size in a working folder and times every operation on a copy of it, returning
+    the results"""
+    application = QApplication.instance() or QApplication([])
+    results = []
+    for size in sizes:
+        generated_file = os.path.join(work_dir, "generated-" + str(size) + ".json")
+        if not os.path.exists(generated_file):
+            generate_catalog(generated_file, size)
+
+        # Time the operations on a copy, as saving changes the catalog and adds a journal and index next to it
+        catalog_file = os.path.join(work_dir, "benchmark-" + str(size) + ".json")
+        for path in [catalog_file, catalog_file + ".journal", catalog_file + ".index"]:
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.copyfile(generated_file, catalog_file)
+
+        for operation, times in Benchmark(application, catalog_file, repeats).run().items():
+            results.append({"Items": size, "Operation": operation, "Milliseconds": times,
+                            "Median": statistics.median(times), "Minimum": min(times), "Maximum": max(times)})
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """Returns the results whose median time is longer than the baseline's median for the same operation and catalog
+    size by more than a factor of tolerance"""
+    baseline_medians = {(result["Items"], result["Operation"]): result["Median"] for result in baseline["Results"]}
+    regressions = []
+    for result in results:
+        baseline_median = baseline_medians.get((result["Items"], result["Operation"]))
+        if baseline_median and result["Median"] > baseline_median * tolerance:
+            regressions.append(dict(result, **{"Baseline Median": baseline_median}))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the program's main operations on generated catalogs.")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="the comma separated numbers of items")
+    parser.add_argument("--repeats", type=int, default=5, help="the number of times each operation is timed")
+    parser.add_argument("--output", help="the json file the results are written to, instead of the console")
+    parser.add_argument("--baseline", help="the results of an earlier run to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="the slowdown, relative to the baseline, that counts as a regression")
+    parser.add_argument("--work-dir", help="the folder generated catalogs are kept in, so later runs reuse them")
+    arguments = parser.parse_args()
+
+    # Run from the working folder, so the window doesn't open the last catalog used or change the program's files
+    work_dir = os.path.abspath(arguments.work_dir or tempfile.mkdtemp(prefix="omnilog-benchmarks-"))
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+
+    sizes = [int(size) for size in arguments.sizes.split(",")]
+    report = {"Environment": {"Python": platform.python_version(), "Qt": QT_VERSION_STR,
+                              "Platform": platform.platform(), "Time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "Results": run_benchmarks(sizes, arguments.repeats, work_dir)}
+    if arguments.baseline:
+        with open(arguments.baseline, "r") as file:
+            report["Regressions"] = find_regressions(report["Results"], json.load(file), arguments.tolerance)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    # Exit with an error when anything got slower, so scripts comparing runs can tell
+    sys.exit(1 if report.get("Regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
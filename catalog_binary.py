@@ -0,0 +1,295 @@
+import json
+import mmap
+import struct
+from collections.abc import Sequence
+from catalog_items import *
+from catalog_journal import *
+
+# The file name extension that export_catalog writes as a binary catalog
+BINARY_EXTENSION = ".omnilog"
+
+MAGIC = b"OMNILOG\x01"
+
+# Magic, profile offset, profile length, item offset table offset, item count, string offset table offset,
+# string count and sorted key index offset
+HEADER = struct.Struct("<8sQQQQQQQ")
+OFFSET = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+FIELD_COUNT = struct.Struct("<H")
+FIELD = struct.Struct("<IB")
+
+# The ways a field value can be stored in an item record
+VALUE_TEXT = 0
+VALUE_STRING = 1
+VALUE_LIST = 2
+VALUE_JSON = 3
+
+
+class BinaryCatalog:
+    """Reads a binary catalog file through a memory map, decoding only the items that are used
+
+    A binary catalog stores its profile as json, followed by one record per item, a table with the offset of each
+    item record, a table of the strings that items share (field labels, categories and dropdown values) and the
+    item numbers sorted by key, which lets items be found by key without reading every key.
+    """
+
+    def __init__(self, file_name):
+        # Initialize file variables
+        self.file_name = file_name
+        self.file = open(file_name, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Read the header and profile
+        (magic, profile_offset, profile_length, self.items_offset, self.item_count, self.strings_offset,
+         self.string_count, self.sorted_index_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("The file isn't a binary catalog.")
+        self.profile = json.loads(self.map[profile_offset:profile_offset + profile_length].decode("utf-8"))
+
+        # Initialize string variables
+        self.strings = {}
+
+    def string(self, string_id):
+        """Returns a string from the string table"""
+        if string_id not in self.strings:
+            offset = OFFSET.unpack_from(self.map, self.strings_offset + OFFSET.size * string_id)[0]
+            self.strings[string_id] = self.read_text(offset)[0]
+        return self.strings[string_id]
+
+    def key_at(self, index):
+        """Returns the key of the item at a position in the file"""
+        return self.read_text(self.record_offset(index))[0]
+
+    def item_at(self, index):
+        """Returns the key and decoded item at a position in the file"""
+        key, position = self.read_text(self.record_offset(index))
+        field_count = FIELD_COUNT.unpack_from(self.map, position)[0]
+        position += FIELD_COUNT.size
+
+        item = {}
+        for field in range(field_count):
+            label_id, value_type = FIELD.unpack_from(self.map, position)
+            position += FIELD.size
+            if value_type == VALUE_STRING:
+                value = self.string(LENGTH.unpack_from(self.map, position)[0])
+                position += LENGTH.size
+            elif value_type == VALUE_LIST:
+                value_count = LENGTH.unpack_from(self.map, position)[0]
+                position += LENGTH.size
+                value = []
+                for value_index in range(value_count):
+                    text, position = self.read_text(position)
+                    value.append(text)
+            else:
+                value, position = self.read_text(position)
+                if value_type == VALUE_JSON:
+                    value = json.loads(value)
+            item[self.string(label_id)] = value
+        return key, item
+
+    def find(self, key):
+        """Returns the position in the file of the item with a key, or None if there isn't one"""
+        low, high = 0, self.item_count
+        while low < high:
+            middle = (low + high) // 2
+            index = LENGTH.unpack_from(self.map, self.sorted_index_offset + LENGTH.size * middle)[0]
+            middle_key = self.key_at(index)
+            if middle_key == key:
+                return index
+            elif middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def record_offset(self, index):
+        """Returns the offset of an item record"""
+        return OFFSET.unpack_from(self.map, self.items_offset + OFFSET.size * index)[0]
+
+    def read_text(self, offset):
+        """Returns the length-prefixed text at an offset and the offset just past it"""
+        length = LENGTH.unpack_from(self.map, offset)[0]
+        start = offset + LENGTH.size
+        return self.map[start:start + length].decode("utf-8"), start + length
+
+    def close(self):
+        """Closes the memory map and the file"""
+        self.map.close()
+        self.file.close()
+
+
+class BinaryItems(FileBackedItems):
+    """A dict-like view of a binary catalog's items that decodes items from the file only when they're used"""
+
+    def __init__(self, store):
+        super().__init__()
+
+        # Initialize file variables
+        self.store = store
+
+    def is_stored(self, key):
+        """Returns whether the file has an item with a key"""
+        return self.store.find(key) is not None
+
+    def stored_count(self):
+        """Returns the number of items in the file"""
+        return self.store.item_count
+
+    def stored_keys(self):
+        """Yields the keys of the items in the file, in order"""
+        for index in range(self.store.item_count):
+            yield self.store.key_at(index)
+
+    def stored_items(self):
+        """Yields the keys and items in the file, in order"""
+        for index in range(self.store.item_count):
+            yield self.store.item_at(index)
+
+    def read_items(self, keys):
+        """Yields the keys and items in the file for a list of keys"""
+        for key in keys:
+            yield key, self.store.item_at(self.store.find(key))[1]
+
+    def reversed_keys(self):
+        """Returns the keys newest first, without reading them from the file until they're used"""
+        if not self.removed and not self.new_keys:
+            return ReversedBinaryKeys(self.store)
+        return list(reversed(list(self)))
+
+
+class ReversedBinaryKeys(Sequence):
+    """The keys of a binary catalog's items, newest first, read from the file only when they're used"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.store.key_at(self.store.item_count - 1 - row)
+
+    def __len__(self):
+        return self.store.item_count
+
+
+class BinaryCatalogJournal(CatalogJournal):
+    """Records the changes made to a binary catalog, whose snapshot is rewritten when the catalog is next opened
+
+    The open catalog reads its items from a memory map of the snapshot, and some platforms don't allow a mapped
+    file to be replaced.
+    """
+
+    compact_while_open = False
+
+    def write_snapshot(self, snapshot):
+        """Replaces the catalog file with a binary snapshot of the whole catalog"""
+        write_atomically(self.catalog_file, lambda file: write_binary_catalog(snapshot, file), "wb")
+
+
+def open_binary_catalog(file_name):
+    """Opens a binary catalog, with the changes recorded in its journal applied on top of the file
+
+    A journal that has grown large is merged into the file first, while the file isn't mapped.
+    """
+    if BinaryCatalogJournal(file_name, None).journal_is_large():
+        store = BinaryCatalog(file_name)
+        try:
+            snapshot = {"Profile": store.profile, "Data": dict(BinaryItems(store).items())}
+        finally:
+            store.close()
+        replay_journal(snapshot, read_journal(file_name))
+        BinaryCatalogJournal(file_name, snapshot).compact(snapshot)
+
+    store = BinaryCatalog(file_name)
+    catalog = {"Profile": store.profile, "Data": BinaryItems(store)}
+    replay_journal(catalog, read_journal(file_name))
+    return catalog
+
+
+def write_binary_catalog(catalog, file):
+    """Writes a catalog in the json layout to a binary file opened for writing"""
+    profile = catalog["Profile"]
+
+    # Dropdown values are stored once in the string table, along with field labels and categories
+    dropdown_values = {}
+    for category, fields in profile.get("Category Fields", {}).items():
+        for field in fields.values():
+            if field[1] == "Dropdown" and isinstance(field[2], list):
+                dropdown_values[(category, field[0])] = set(field[2])
+
+    strings = {}
+
+    def string_id(text):
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    def text_bytes(text):
+        encoded = text.encode("utf-8")
+        return LENGTH.pack(len(encoded)) + encoded
+
+    # Leave room for the header, which is written once the offsets are known
+    file.write(b"\0" * HEADER.size)
+    profile_bytes = json.dumps(profile).encode("utf-8")
+    profile_offset = HEADER.size
+    file.write(profile_bytes)
+    offset = profile_offset + len(profile_bytes)
+
+    record_offsets = []
+    keys = []
+    for key, item in catalog["Data"].items():
+        record_offsets.append(offset)
+        keys.append(key)
+        category = item.get("Category")
+        parts = [text_bytes(key), FIELD_COUNT.pack(len(item))]
+        for label, value in item.items():
+            label_id = string_id(label)
+            if isinstance(value, str) and (label == "Category" or value in dropdown_values.get((category, label), ())):
+                parts.append(FIELD.pack(label_id, VALUE_STRING) + LENGTH.pack(string_id(value)))
+            elif isinstance(value, str):
+                parts.append(FIELD.pack(label_id, VALUE_TEXT) + text_bytes(value))
+            elif isinstance(value, list) and all(isinstance(text, str) for text in value):
+                parts.append(FIELD.pack(label_id, VALUE_LIST) + LENGTH.pack(len(value)))
+                parts.extend(text_bytes(text) for text in value)
+            else:
+                parts.append(FIELD.pack(label_id, VALUE_JSON) + text_bytes(json.dumps(value)))
+        record = b"".join(parts)
+        file.write(record)
+        offset += len(record)
+
+    # Write the item offset table
+    items_offset = offset
+    file.write(b"".join(OFFSET.pack(record_offset) for record_offset in record_offsets))
+    offset += OFFSET.size * len(record_offsets)
+
+    # Write the string table, a table of string offsets followed by the strings
+    strings_offset = offset
+    string_data = [text_bytes(text) for text in strings]
+    string_offset = strings_offset + OFFSET.size * len(string_data)
+    for data in string_data:
+        file.write(OFFSET.pack(string_offset))
+        string_offset += len(data)
+    file.write(b"".join(string_data))
+    offset = string_offset
+
+    # Write the item numbers sorted by key
+    sorted_index_offset = offset
+    file.write(b"".join(LENGTH.pack(index) for index in sorted(range(len(keys)), key=keys.__getitem__)))
+
+    file.seek(0)
+    file.write(HEADER.pack(MAGIC, profile_offset, len(profile_bytes), items_offset, len(keys), strings_offset,
+                           len(string_data), sorted_index_offset))
+
+
+def is_binary_catalog(file_name):
+    """Returns whether a file is a binary catalog rather than a json catalog"""
+    try:
+        with open(file_name, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
@@ -0,0 +1,570 @@
+import sys
+import json
+from array import array
+from itertools import repeat, accumulate
+from collections.abc import MutableMapping
+
+# The flag set in the length of a text column's row that holds a list of text
+LIST_FLAG = 1 << 31
+
+# The part of a text column's row length that's the length of its text
+TEXT_LENGTH = LIST_FLAG - 1
+
+# The length of a text column's row whose value is stored among the column's other values instead of in its buffer
+OTHER_VALUE = 0xFFFFFFFF
+
+# Stands in for the category of items that don't have one
+NO_CATEGORY = object()
+
+# Stands in for the value of a label an item doesn't have
+MISSING = object()
+
+
+class JsonValue:
+    """A field value other than text or a list of text, stored as json so it can be compared and looked up"""
+
+    __slots__ = ["text"]
+
+    def __init__(self, text):
+        self.text = text
+
+    def __eq__(self, other):
+        return isinstance(other, JsonValue) and self.text == other.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+
+def freeze(value):
+    """Returns the form a field value is stored in, which shares its text with every equal value, or None for a label
+    an item doesn't have"""
+    if value.__class__ is str:
+        return sys.intern(value)
+    if value is MISSING:
+        return None
+    if isinstance(value, list) and all(isinstance(text, str) for text in value):
+        return tuple(sys.intern(text) for text in value)
+    return JsonValue(json.dumps(value))
+
+
+def thaw(value):
+    """Returns a field value from the form it's stored in"""
+    if value.__class__ is str:
+        return value
+    if isinstance(value, tuple):
+        return list(value)
+    return json.loads(value.text)
+
+
+class TextColumn:
+    """A column of a category's items that stores each item's text, or list of text, as UTF-8 in a single buffer, with
+    each row's offset and length in arrays, so a row's value doesn't need an object of its own
+
+    A list is stored as each of its texts followed by a NUL character, with LIST_FLAG set in its length. Rows without a
+    value, and the rare values that can't be stored that way, are stored as codes into a list of the column's other
+    values, with OTHER_VALUE as their length. A replaced value's bytes stay in the buffer until the column is
+    compacted.
+    """
+
+    # The number of unused bytes always allowed in the buffer before it's compacted
+    minimum_unused_bytes = 1 << 20
+
+    def __init__(self, row_count=0):
+        # Initialize buffer variables, widening the offsets once the buffer is too large for four bytes
+        self.buffer = bytearray()
+        self.unused_bytes = 0
+        self.starts = array("I", bytes(4 * row_count))
+        self.lengths = array("I", [OTHER_VALUE]) * row_count
+
+        # Initialize other value variables, where code 0 stands for rows without a value. Values are only ever added,
+        # so copies of the column can share them.
+        self.values = [None]
+        self.value_codes = {}
+
+    def store(self, value):
+        """Returns the offset, or the code of an other value, and the length a value is stored with, adding it to the
+        buffer or the other values"""
+        if value.__class__ is str:
+            data = value.encode("utf-8")
+            length = len(data)
+        elif value is MISSING:
+            return 0, OTHER_VALUE
+        elif isinstance(value, list) and all(isinstance(text, str) and "\x00" not in text for text in value):
+            data = "".join(text + "\x00" for text in value).encode("utf-8")
+            length = len(data) | LIST_FLAG
+        else:
+            value = freeze(value)
+            code = self.value_codes.get(value)
+            if code is None:
+                code = self.value_codes[value] = len(self.values)
+                self.values.append(value)
+            return code, OTHER_VALUE
+        start = len(self.buffer)
+        self.buffer += data
+        self.widen_starts()
+        return start, length
+
+    def widen_starts(self):
+        """Widens the offsets once the buffer has grown too large for four bytes"""
+        if len(self.buffer) > 0xFFFFFFFF and self.starts.typecode == "I":
+            self.starts = array("Q", self.starts)
+
+    def append(self, value):
+        """Adds the value of a new row"""
+        start, length = self.store(value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def extend(self, values):
+        """Adds the values of a batch of new rows"""
+        value_types = set(map(type, values))
+        if value_types == {str}:
+            # Encode a batch that's all text at once, working out each row's offset from the lengths before it
+            encoded = [value.encode("utf-8") for value in values]
+            lengths = list(map(len, encoded))
+            starts = list(accumulate(lengths, initial=len(self.buffer)))
+            starts.pop()
+            self.buffer += b"".join(encoded)
+            self.widen_starts()
+            self.starts.extend(starts)
+            self.lengths.extend(lengths)
+        elif value_types == {object}:
+            self.starts.extend(repeat(0, len(values)))
+            self.lengths.extend(repeat(OTHER_VALUE, len(values)))
+        else:
+            for value in values:
+                self.append(value)
+
+    def set(self, row, value):
+        """Replaces the value of a row, compacting the column once most of its buffer is unused"""
+        if self.lengths[row] != OTHER_VALUE:
+            self.unused_bytes += self.lengths[row] & TEXT_LENGTH
+        self.starts[row], self.lengths[row] = self.store(value)
+        if self.unused_bytes > max(len(self.buffer) // 2, self.minimum_unused_bytes):
+            compacted = self.select(range(len(self.lengths)))
+            self.buffer, self.starts, self.lengths = compacted.buffer, compacted.starts, compacted.lengths
+            self.unused_bytes = 0
+
+    def get(self, row):
+        """Returns the stored form of a row's value"""
+        length = self.lengths[row]
+        start = self.starts[row]
+        if length < LIST_FLAG:
+            return self.buffer[start:start + length].decode("utf-8")
+        if length == OTHER_VALUE:
+            return self.values[start]
+        return tuple(self.buffer[start:start + (length & TEXT_LENGTH)].decode("utf-8").split("\x00")[:-1])
+
+    def row_values(self, rows, default):
+        """Yields the value of each of the given rows, or the default for rows without one"""
+        buffer = self.buffer
+        starts = self.starts
+        lengths = self.lengths
+        for row in rows:
+            length = lengths[row]
+            start = starts[row]
+            if length < LIST_FLAG:
+                yield buffer[start:start + length].decode("utf-8")
+            elif length == OTHER_VALUE:
+                value = self.values[start]
+                yield default if value is None else thaw(value)
+            else:
+                yield buffer[start:start + (length & TEXT_LENGTH)].decode("utf-8").split("\x00")[:-1]
+
+    def select(self, rows):
+        """Returns a column of only the given rows, in the order given, with a buffer of only their values"""
+        column = TextColumn()
+        column.values = self.values
+        column.value_codes = self.value_codes
+        buffer = self.buffer
+        for row in rows:
+            length = self.lengths[row]
+            start = self.starts[row]
+            if length != OTHER_VALUE:
+                text_length = length & TEXT_LENGTH
+                column.buffer += buffer[start:start + text_length]
+                column.widen_starts()
+                start = len(column.buffer) - text_length
+            column.starts.append(start)
+            column.lengths.append(length)
+        return column
+
+    def copy(self):
+        """Returns a copy of the column that later changes won't affect"""
+        column = TextColumn()
+        column.buffer = bytearray(self.buffer)
+        column.unused_bytes = self.unused_bytes
+        column.starts = array(self.starts.typecode, self.starts)
+        column.lengths = array("I", self.lengths)
+        column.values = self.values
+        column.value_codes = self.value_codes
+        return column
+
+
+class EncodedColumn:
+    """A column of a category's items that stores each item's value as a small integer code into a dictionary of the
+    column's distinct values, where code 0 stands for items without a value"""
+
+    def __init__(self, row_count=0):
+        # Initialize dictionary variables. Values are only ever added, so copies of the column can share them.
+        self.values = [None]
+        self.value_codes = {}
+
+        # Initialize code variables, widening the codes once there are too many values for two bytes
+        self.codes = array("H", bytes(2 * row_count))
+
+    def code(self, value):
+        """Returns the code of a value, adding it to the dictionary if it's new"""
+        return self.stored_code(freeze(value))
+
+    def stored_code(self, value):
+        """Returns the code of a value in the form it's stored in, adding it to the dictionary if it's new"""
+        if value is None:
+            return 0
+        code = self.value_codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.value_codes[value] = code
+            self.values.append(value)
+            if code > 0xFFFF and self.codes.typecode == "H":
+                self.codes = array("L", self.codes)
+        return code
+
+    def append(self, value):
+        """Adds the value of a new row"""
+        code = self.code(value)
+        self.codes.append(code)
+
+    def extend(self, values):
+        """Adds the values of a batch of new rows"""
+        # Look up values that are all text at once, encoding only the values that aren't in the dictionary yet
+        value_types = set(map(type, values))
+        if value_types == {str}:
+            codes = list(map(self.value_codes.get, values))
+            if None in codes:
+                codes = [self.code(value) if code is None else code for value, code in zip(values, codes)]
+        elif value_types == {object}:
+            codes = bytes(len(values))
+        else:
+            codes = list(map(self.code, values))
+
+        # The codes may be widened while the batch is encoded, so they're only added once it's done
+        self.codes.extend(codes)
+
+    def set(self, row, value):
+        """Replaces the value of a row"""
+        code = self.code(value)
+        self.codes[row] = code
+
+    def get(self, row):
+        """Returns the stored form of a row's value"""
+        return self.values[self.codes[row]]
+
+    def select(self, rows):
+        """Returns a column of only the given rows, in the order given, with a dictionary of only their values"""
+        column = EncodedColumn()
+        codes = [column.stored_code(self.get(row)) for row in rows]
+        column.codes.extend(codes)
+        return column
+
+    def copy(self):
+        """Returns a copy of the column that later changes won't affect"""
+        column = EncodedColumn()
+        column.values = self.values
+        column.value_codes = self.value_codes
+        column.codes = array(self.codes.typecode, self.codes)
+        return column
+
+
+class CategoryTable:
+    """The items of one category, stored column by column
+
+    A row's key is set to None when its item is removed, and the rows of removed items are dropped once they make up
+    most of the table.
+    """
+
+    # The number of removed rows always allowed before they're dropped
+    minimum_removed_rows = 1000
+
+    def __init__(self, category):
+        # Initialize category variables
+        self.category = category
+
+        # Initialize column variables, with the labels in the order an item's labels are read back
+        self.labels = []
+        self.label_set = set()
+        self.columns = {}
+
+        # Initialize row variables
+        self.keys = []
+        self.rows = {}
+        self.removed_rows = 0
+
+    def add_label(self, label, encoded):
+        """Adds a label the table's items have, along with a column for its values"""
+        self.labels.append(label)
+        self.label_set.add(label)
+        if label != "Category":
+            self.columns[label] = EncodedColumn(len(self.keys)) if encoded else TextColumn(len(self.keys))
+
+    def item(self, row):
+        """Returns a new dict of a row's labels and values"""
+        item = {}
+        columns = self.columns
+        for label in self.labels:
+            column = columns.get(label)
+            if column is None:
+                item[label] = thaw(self.category)
+                continue
+            if column.__class__ is EncodedColumn:
+                value = column.values[column.codes[row]]
+            else:
+                # Most rows hold text, which is decoded here without the rest of get
+                length = column.lengths[row]
+                if length < LIST_FLAG:
+                    start = column.starts[row]
+                    item[label] = column.buffer[start:start + length].decode("utf-8")
+                    continue
+                value = column.get(row)
+            if value is not None:
+                item[label] = value if value.__class__ is str else thaw(value)
+        return item
+
+    def append(self, key, item):
+        """Adds an item to the end of the table"""
+        self.rows[key] = len(self.keys)
+        self.keys.append(key)
+        for label, column in self.columns.items():
+            column.append(item.get(label, MISSING))
+
+    def extend(self, keys, items):
+        """Adds a batch of items to the end of the table, filling each column at once"""
+        self.rows.update(zip(keys, range(len(self.keys), len(self.keys) + len(keys))))
+        self.keys.extend(keys)
+        for label, column in self.columns.items():
+            column.extend([item.get(label, MISSING) for item in items])
+
+    def set_row(self, row, item):
+        """Replaces the item of a row"""
+        for label, column in self.columns.items():
+            column.set(row, item.get(label, MISSING))
+
+    def remove(self, key):
+        """Removes an item from the table"""
+        row = self.rows.pop(key)
+        self.keys[row] = None
+        for column in self.columns.values():
+            column.set(row, MISSING)
+        self.removed_rows += 1
+        if self.removed_rows > max(len(self.rows), self.minimum_removed_rows):
+            self.drop_removed_rows()
+
+    def drop_removed_rows(self):
+        """Drops the rows of removed items, moving the remaining rows up"""
+        rows = [row for row, key in enumerate(self.keys) if key is not None]
+        self.columns = {label: column.select(rows) for label, column in self.columns.items()}
+        self.keys = [self.keys[row] for row in rows]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.removed_rows = 0
+
+    def label_value(self, row, label, default):
+        """Returns a row's value for a label, or the default if it doesn't have one"""
+        if label not in self.label_set:
+            return default
+        if label not in self.columns:
+            return thaw(self.category)
+        value = self.columns[label].get(row)
+        return default if value is None else thaw(value)
+
+    def label_values(self, label, default):
+        """Returns the key of each item along with its value for a label, or the default if it doesn't have one
+
+        Equal values aren't copied for each item, so they mustn't be changed.
+        """
+        if label == "Category":
+            category = default if self.category is NO_CATEGORY else thaw(self.category)
+            return zip(self.rows, repeat(category))
+        column = self.columns.get(label)
+        if column is None:
+            return zip(self.rows, repeat(default))
+        if isinstance(column, EncodedColumn):
+            # Decode each distinct value once, and look the values up by code
+            values = [default if value is None else thaw(value) for value in column.values]
+            return zip(self.rows, map(values.__getitem__, map(column.codes.__getitem__, self.rows.values())))
+        return zip(self.rows, column.row_values(self.rows.values(), default))
+
+    def rename_keys(self, new_keys):
+        """Stores items under new keys, given a dict from their old keys to their new keys"""
+        self.keys = [new_keys.get(key, key) if key is not None else None for key in self.keys]
+        self.rows = {new_keys.get(key, key): row for key, row in self.rows.items()}
+
+    def copy(self):
+        """Returns a copy of the table that later changes won't affect"""
+        table = CategoryTable(self.category)
+        table.labels = list(self.labels)
+        table.label_set = set(self.label_set)
+        table.columns = {label: column.copy() for label, column in self.columns.items()}
+        table.keys = list(self.keys)
+        table.rows = dict(self.rows)
+        table.removed_rows = self.removed_rows
+        return table
+
+
+class ColumnarItems(MutableMapping):
+    """A dict-like view of a catalog's items that stores each category's items column by column
+
+    A category's columns follow the order of its fields in the profile. The values of its Dropdown fields are stored
+    as small integer codes, other text is stored as UTF-8 in one buffer per column, and an item's category is stored
+    once for all of the category's items, as the table the item is in.
+
+    Reading an item returns a new dict, so an item is changed by storing it again, as the rest of the program does.
+    """
+
+    # The number of new items add_items gathers before storing them all at once
+    batch_size = 1000
+
+    def __init__(self, profile=None):
+        # Initialize profile variables, which only decide how the values of newly seen categories and labels are stored
+        self.profile = profile if profile is not None else {}
+
+        # Initialize table variables, with the category of every key in the order the keys were inserted
+        self.tables = {}
+        self.key_categories = {}
+
+    def __getitem__(self, key):
+        table = self.tables[self.key_categories[key]]
+        return table.item(table.rows[key])
+
+    def __setitem__(self, key, item):
+        category, table = self.item_table(item)
+
+        # Items replaced within their category keep their row, and items that change category move to a new one
+        if key in self.key_categories:
+            if self.key_categories[key] == category:
+                table.set_row(table.rows[key], item)
+                return
+            self.tables[self.key_categories[key]].remove(key)
+        table.append(key, item)
+        self.key_categories[key] = category
+
+    def __delitem__(self, key):
+        self.tables[self.key_categories.pop(key)].remove(key)
+
+    def __iter__(self):
+        return iter(self.key_categories)
+
+    def __reversed__(self):
+        return reversed(self.key_categories)
+
+    def __len__(self):
+        return len(self.key_categories)
+
+    def __contains__(self, key):
+        return key in self.key_categories
+
+    def items(self):
+        """Yields every key and item in order"""
+        tables = self.tables
+        for key, category in self.key_categories.items():
+            table = tables[category]
+            yield key, table.item(table.rows[key])
+
+    def add_items(self, items):
+        """Stores a batch of (key, item) pairs in order, returning the keys that weren't stored before and the keys
+        whose items were replaced
+
+        New items are gathered by category and each category's columns are filled a batch at a time, which is much
+        faster than storing the items one by one.
+        """
+        new_keys = []
+        replaced_keys = []
+        pending_items = {}
+        pending_categories = {}
+        for key, item in items:
+            if key in self.key_categories or key in pending_categories:
+                self.store_pending(pending_items, pending_categories)
+                self[key] = item
+                replaced_keys.append(key)
+                continue
+            category, table = self.item_table(item)
+            keys, category_items = pending_items.setdefault(category, ([], []))
+            keys.append(key)
+            category_items.append(item)
+            pending_categories[key] = category
+            new_keys.append(key)
+            if len(pending_categories) >= self.batch_size:
+                self.store_pending(pending_items, pending_categories)
+        self.store_pending(pending_items, pending_categories)
+        return new_keys, replaced_keys
+
+    def store_pending(self, pending_items, pending_categories):
+        """Stores the new items gathered by add_items, and forgets them"""
+        for category, (keys, items) in pending_items.items():
+            self.tables[category].extend(keys, items)
+        self.key_categories.update(pending_categories)
+        pending_items.clear()
+        pending_categories.clear()
+
+    def item_table(self, item):
+        """Returns an item's category, in the form it's stored in, and the category's table, making sure the table has
+        a column for each of the item's labels"""
+        category = freeze(item["Category"]) if "Category" in item else NO_CATEGORY
+        table = self.tables.get(category)
+        if table is None:
+            # Start the table with a column for each of the category's fields
+            table = CategoryTable(category)
+            for field in self.category_fields(category):
+                table.add_label(field[0], self.is_encoded(category, field[0]))
+            self.tables[category] = table
+        if not table.label_set.issuperset(item):
+            for label in item:
+                if label not in table.label_set:
+                    table.add_label(label, self.is_encoded(category, label))
+        return category, table
+
+    def category_fields(self, category):
+        """Returns the [name, type, items] entries of a category's fields in the profile, in order"""
+        if not isinstance(category, str):
+            return []
+        fields = self.profile.get("Category Fields", {}).get(category, {})
+        return [fields[position] for position in sorted(fields, key=int)]
+
+    def is_encoded(self, category, label):
+        """Returns whether the values of a category's label are stored as codes"""
+        return any(field[0] == label and field[1] == "Dropdown" for field in self.category_fields(category))
+
+    def category_keys(self, category):
+        """Returns the keys of a category's items, as a set-like view"""
+        table = self.tables.get(category)
+        return table.rows.keys() if table is not None else {}.keys()
+
+    def label_value(self, key, label, default=None):
+        """Returns an item's value for a label, or the default if it doesn't have one, without reading the rest of the
+        item"""
+        table = self.tables[self.key_categories[key]]
+        return table.label_value(table.rows[key], label, default)
+
+    def label_values(self, label, default=None):
+        """Yields the key of every item along with its value for a label, or the default if it doesn't have one,
+        reading only that label's column"""
+        for table in self.tables.values():
+            yield from table.label_values(label, default)
+
+    def category_label_values(self, category, label, default=None):
+        """Returns the key of each of a category's items along with its value for a label, or the default if it doesn't
+        have one, reading only that label's column"""
+        table = self.tables.get(category)
+        return table.label_values(label, default) if table is not None else iter(())
+
+    def rename_keys(self, new_keys):
+        """Stores items under new keys, in the same order, given a dict from their old keys to their new keys"""
+        self.key_categories = {new_keys.get(key, key): category for key, category in self.key_categories.items()}
+        for table in self.tables.values():
+            table.rename_keys(new_keys)
+
+    def copy(self):
+        """Returns a copy of the items that later changes won't affect, without reading any item"""
+        items = ColumnarItems(self.profile)
+        items.tables = {category: table.copy() for category, table in self.tables.items()}
+        items.key_categories = dict(self.key_categories)
+        return items
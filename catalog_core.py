@@ -0,0 +1,533 @@
+import os
+import datetime
+from catalog_events import *
+from catalog_stream import *
+from catalog_journal import *
+from catalog_index import *
+from catalog_sqlite import *
+from catalog_binary import *
+from catalog_columns import *
+from search_index import *
+from facet_index import *
+from sort_index import *
+from item_ids import *
+from item_values import *
+from operation_timing import *
+
+# The field types a category's fields can have
+FIELD_TYPES = ["Text", "Dropdown"]
+
+# The labels an item stores alongside its field values
+ITEM_LABELS = ["Category", "Date Entered", "Image Path"]
+
+
+class Field:
+    """A field of a category, along with the items a Dropdown field's value is chosen from"""
+
+    __slots__ = ["name", "type", "items"]
+
+    def __init__(self, name, field_type="Text", items=None):
+        if field_type not in FIELD_TYPES:
+            raise ValueError("An invalid value was entered for the type of field.")
+        self.name = name
+        self.type = field_type
+        self.items = list(items) if items else []
+
+    @classmethod
+    def from_profile(cls, field):
+        """Creates a field from its [name, type, items] entry in a profile's "Category Fields" section"""
+        return cls(field[0], field[1], field[2])
+
+    def to_profile(self):
+        """Returns the field's [name, type, items] entry for a profile's "Category Fields" section"""
+        return [self.name, self.type, list(self.items) if self.items else ""]
+
+    def default_value(self):
+        """Returns the value of the field when nothing has been entered for it"""
+        if self.type == "Dropdown" and self.items:
+            return self.items[0]
+        return ""
+
+    def parse_value(self, text):
+        """Returns the value stored for text entered into the field
+
+        Text with commas is split into a list of values. A Dropdown field's value must be one of its items, and
+        fields left empty get their default value.
+        """
+        if not text:
+            return self.default_value()
+        if self.type == "Dropdown":
+            if text not in self.items:
+                raise ValueError("\"" + text + "\" isn't one of the " + self.name + " choices.")
+            return text
+        return split_values(text)
+
+
+class Category:
+    """A category of items, with its icon and the fields its items have"""
+
+    __slots__ = ["name", "icon_path", "fields"]
+
+    def __init__(self, name, icon_path="", fields=None):
+        self.name = name
+        self.icon_path = icon_path
+        self.fields = list(fields) if fields else []
+
+    def field(self, name):
+        """Returns the category's field with a name"""
+        for field in self.fields:
+            if field.name == name:
+                return field
+        raise KeyError(name)
+
+    def new_item(self, inputs, date_entered=None):
+        """Creates an item of the category from the text entered for each of its fields
+
+        Fields without any entered text get their default value, and the item is entered at the current time unless
+        a "Date Entered" value is given. A Dropdown value that isn't one of the field's items raises a ValueError.
+        """
+        values = {}
+        for field in self.fields:
+            values[field.name] = field.parse_value(inputs[field.name]) if field.name in inputs \
+                else field.default_value()
+        if date_entered is None:
+            date_entered = format_date_entered(datetime.datetime.now())
+        return Item(self.name, values, date_entered)
+
+
+class Item:
+    """A catalog item, with its category, when it was entered, its stored image and its field values"""
+
+    __slots__ = ["key", "category", "date_entered", "image_path", "values"]
+
+    def __init__(self, category, values=None, date_entered="", image_path="", key=None):
+        self.key = key
+        self.category = category
+        self.date_entered = date_entered
+        self.image_path = image_path
+        self.values = dict(values) if values else {}
+
+    @classmethod
+    def from_data(cls, key, data):
+        """Creates an item from its entry in a catalog's "Data" section"""
+        values = {label: value for label, value in data.items() if label not in ITEM_LABELS}
+        return cls(data.get("Category", ""), values, data.get("Date Entered", ""), data.get("Image Path", ""), key)
+
+    def to_data(self):
+        """Returns the item's entry for a catalog's "Data" section"""
+        data = dict(self.values)
+        data["Category"] = self.category
+        data["Date Entered"] = self.date_entered
+        if self.image_path:
+            data["Image Path"] = self.image_path
+        return data
+
+
+class Catalog:
+    """A catalog's profile and items, and the operations that load, change, query and save them, without any widgets
+
+    Every change is announced through the catalog's events, which keep its indexes, and the views of programs that
+    display the catalog, up to date. The catalog can also be indexed by "Profile" and "Data" like the json layout,
+    which its files, journals and views all share.
+    """
+
+    def __init__(self, events=None):
+        # Initialize the change notifications that views, indexes and caches subscribe to
+        self.events = events if events is not None else CatalogEvents()
+
+        # Initialize catalog variables
+        self.sections = new_sections()
+
+        # Initialize file variables
+        self.file_name = ""
+        self.journal = None
+
+        # Initialize version variables, counting changes so unchanged catalogs aren't saved again
+        self.version = 0
+        self.saved_version = 0
+        for event in [ITEM_INSERTED, ITEMS_INSERTED, ITEM_REMOVED, ITEM_UPDATED, CATEGORIES_CHANGED, FIELDS_CHANGED]:
+            self.events.subscribe(event, self.count_change)
+
+        # Initialize the generator of item keys
+        self.item_ids = ItemIds()
+
+        # Initialize the search index, the index of when items were entered, the index of category and Dropdown values
+        # and the sorted orders of the items, and keep them up to date
+        self.search_index = SearchIndex()
+        self.date_index = DateEnteredIndex()
+        self.facet_index = FacetIndex()
+        self.sort_index = SortIndex()
+        for index in [self.search_index, self.date_index, self.facet_index, self.sort_index]:
+            self.events.subscribe(CATALOG_RESET, index.build)
+            self.events.subscribe(ITEM_INSERTED, index.add_item)
+            self.events.subscribe(ITEMS_INSERTED, index.add_items)
+            self.events.subscribe(ITEM_REMOVED, index.remove_item)
+            self.events.subscribe(ITEM_UPDATED, index.update_item)
+        self.events.subscribe(CATEGORIES_CHANGED, self.facet_index.update_profile)
+        self.events.subscribe(FIELDS_CHANGED, self.facet_index.update_profile)
+
+    def __getitem__(self, section):
+        return self.sections[section]
+
+    def __setitem__(self, section, value):
+        self.sections[section] = value
+
+    def categories(self):
+        """Returns the catalog's categories, in order"""
+        return [self.category(name) for name in self.sections["Profile"]["Category Names"].values()]
+
+    def category(self, name):
+        """Returns the catalog's category with a name"""
+        profile = self.sections["Profile"]
+        for position, category_name in profile["Category Names"].items():
+            if category_name == name:
+                fields = profile["Category Fields"].get(name, {})
+                return Category(name, profile["Icon Paths"].get(position, ""),
+                                [Field.from_profile(fields[key]) for key in sorted(fields, key=int)])
+        raise KeyError(name)
+
+    def set_categories(self, categories):
+        """Replaces the catalog's categories and icons, keeping the fields of the categories that already existed"""
+        profile = self.sections["Profile"]
+        profile["Category Names"] = {str(position): category.name for position, category in enumerate(categories)}
+        profile["Icon Paths"] = {str(position): category.icon_path for position, category in enumerate(categories)
+                                 if category.icon_path}
+        for category in categories:
+            profile["Category Fields"].setdefault(category.name, {})
+        self.events.emit(CATEGORIES_CHANGED)
+
+    def set_fields(self, category_name, fields):
+        """Replaces the fields of a category"""
+        self.sections["Profile"]["Category Fields"][category_name] = {str(position): field.to_profile()
+                                                                      for position, field in enumerate(fields)}
+        self.events.emit(FIELDS_CHANGED)
+
+    def set_profile(self, profile):
+        """Replaces the catalog's profile"""
+        self.sections["Profile"] = profile
+        if isinstance(self.sections["Data"], ColumnarItems):
+            self.sections["Data"].profile = profile
+        self.events.emit(CATEGORIES_CHANGED)
+        self.events.emit(FIELDS_CHANGED)
+
+    def item(self, key):
+        """Returns the item stored under a key"""
+        return Item.from_data(key, self.sections["Data"][key])
+
+    def new_keys(self, count):
+        """Returns keys for a batch of items about to be added to the catalog"""
+        return self.item_ids.new_keys(self.sections["Data"], count)
+
+    def add_item(self, item):
+        """Adds a new item to the catalog, or replaces the item stored under its key, and returns its key"""
+        if item.key is None:
+            item.key = self.new_keys(1)[0]
+        self.insert_item(item.key, item.to_data())
+        return item.key
+
+    def add_items(self, items):
+        """Adds a batch of new items to the catalog and returns their keys"""
+        keys = self.new_keys(len(items))
+        for key, item in zip(keys, items):
+            item.key = key
+        self.insert_items((item.key, item.to_data()) for item in items)
+        return keys
+
+    def set_image_path(self, key, image_path):
+        """Adds the path of an item's stored image to the item"""
+        item = dict(self.sections["Data"][key])
+        item["Image Path"] = image_path
+        self.insert_item(key, item)
+
+    def insert_item(self, key, item):
+        """Stores an item in the json layout under a key"""
+        if key in self.sections["Data"]:
+            self.sections["Data"][key] = item
+            self.events.emit(ITEM_UPDATED, key)
+        else:
+            self.sections["Data"][key] = item
+            self.events.emit(ITEM_INSERTED, key)
+
+    def insert_items(self, items):
+        """Stores a batch of (key, item) pairs, with the items in the json layout"""
+        items = list(items)
+        self.search_index.set_inserted_items(items)
+        if isinstance(self.sections["Data"], ColumnarItems):
+            inserted_keys, replaced_keys = self.sections["Data"].add_items(items)
+            for key in replaced_keys:
+                self.events.emit(ITEM_UPDATED, key)
+            if inserted_keys:
+                self.events.emit(ITEMS_INSERTED, inserted_keys)
+            return
+
+        inserted_keys = []
+        for key, item in items:
+            if key in self.sections["Data"]:
+                self.sections["Data"][key] = item
+                self.events.emit(ITEM_UPDATED, key)
+            else:
+                self.sections["Data"][key] = item
+                inserted_keys.append(key)
+        if inserted_keys:
+            self.events.emit(ITEMS_INSERTED, inserted_keys)
+
+    def delete_item(self, key):
+        """Deletes the item stored under a key"""
+        del self.sections["Data"][key]
+        self.events.emit(ITEM_REMOVED, key)
+
+    def apply_records(self, records):
+        """Applies journal records to the catalog in the order they were recorded"""
+        items = []
+        for record in records:
+            if record["Operation"] == "Item":
+                items.append((record["Key"], record["Item"]))
+                continue
+
+            # Apply the items recorded before this change first, so changes are applied in order
+            self.insert_items(items)
+            items = []
+            if record["Operation"] == "Remove" and record["Key"] in self.sections["Data"]:
+                self.delete_item(record["Key"])
+            elif record["Operation"] == "Profile":
+                self.set_profile(record["Profile"])
+        self.insert_items(items)
+
+    def search(self, text):
+        """Returns the keys of the items whose fields contain every word in some text, best matches first"""
+        return self.search_index.search(text)
+
+    def facet_counts(self, selections):
+        """Returns a dict from each facet, which is "Category" or the name of a Dropdown field, to the number of items
+        with each of its values that match the selected values of the other facets"""
+        return self.facet_index.counts(selections)
+
+    def sort_labels(self):
+        """Returns the labels items can be sorted by, which are their category, when they were entered and the fields
+        of every category"""
+        labels = ["Category", "Date Entered"]
+        for category in self.sections["Profile"]["Category Names"].values():
+            fields = self.sections["Profile"]["Category Fields"].get(category, {})
+            for position in sorted(fields, key=int):
+                if fields[position][0] not in labels:
+                    labels.append(fields[position][0])
+        return labels
+
+    def sorted_keys(self, label, descending=False):
+        """Returns the keys of every item sorted by a label"""
+        return self.sort_index.sorted_keys(label, descending)
+
+    def query(self, text="", category=None, date_entered=None, facets=None, sort_by=None, descending=False):
+        """Returns the keys of the items matching some text, in a category, entered at a time and with one of the
+        selected values of each facet in a dict from facets to values, leaving out any condition that isn't given
+
+        Items are returned sorted by the sort_by label if it's given, and otherwise items matching text are returned
+        best matches first, and other items newest first.
+        """
+        facet_rows = self.facet_index.matching_rows(facets) if facets else None
+        if SearchIndex.tokenize(text):
+            keys = self.search(text)
+            if facet_rows is not None:
+                keys = [key for key in keys if self.facet_index.rows[key] in facet_rows]
+        elif facet_rows is not None:
+            keys = self.facet_index.ordered_keys(facet_rows)
+        else:
+            keys = list(reversed(list(self.sections["Data"])))
+        if date_entered is not None:
+            entered_keys = self.date_index.keys_entered(date_entered)
+            keys = [key for key in keys if key in entered_keys]
+        if category is not None:
+            category_keys = getattr(self.sections["Data"], "category_keys", None)
+            if category_keys is not None:
+                matching_keys = category_keys(category)
+                keys = [key for key in keys if key in matching_keys]
+            else:
+                keys = [key for key in keys if self.sections["Data"][key].get("Category") == category]
+        if sort_by is not None:
+            keys = self.sort_index.sort(keys, sort_by, descending)
+        return keys
+
+    def reset(self, sections, file_name="", journal=None):
+        """Replaces the catalog's profile, items, file and journal with those of another catalog"""
+        close_items(self.sections["Data"])
+        self.sections = sections
+        self.file_name = file_name
+        self.set_journal(journal)
+        self.events.emit(CATALOG_RESET, self)
+        self.saved_version = self.version
+
+    def set_journal(self, journal):
+        """Replaces the journal that records the changes made to the catalog"""
+        for journal_events, journal_method in [([ITEM_INSERTED, ITEM_UPDATED], "record_item"),
+                                               ([ITEMS_INSERTED], "record_items"),
+                                               ([ITEM_REMOVED], "record_removal"),
+                                               ([CATEGORIES_CHANGED, FIELDS_CHANGED], "record_profile")]:
+            for event in journal_events:
+                if self.journal is not None:
+                    self.events.unsubscribe(event, getattr(self.journal, journal_method))
+                if journal is not None:
+                    self.events.subscribe(event, getattr(journal, journal_method))
+        self.journal = journal
+
+    def new_journal(self):
+        """Returns a journal for the catalog's json file"""
+        journal = CatalogJournal(self.file_name, self)
+        # A catalog that reads items from its file keeps the file as it is until the catalog is next opened
+        journal.compact_while_open = not isinstance(self.sections["Data"], IndexedItems)
+        return journal
+
+    def migrate_keys(self):
+        """Gives the items of catalogs from before item ids their own ids, returning whether any item's key changed
+
+        Only catalogs held in memory are migrated. The whole file is rewritten with the next save, as changes
+        journaled under the new keys couldn't be replayed onto the old file.
+        """
+        if not isinstance(self.sections["Data"], ColumnarItems):
+            return False
+        new_keys = migrate_item_keys(self.sections["Data"], self.item_ids)
+        if new_keys is None:
+            return False
+        self.sections["Data"].rename_keys(new_keys)
+        if self.journal is not None:
+            self.journal.compaction_required = True
+        self.events.emit(CATALOG_RESET, self)
+        self.count_change()
+        return True
+
+    @operation_timing.timed("Catalog Load")
+    def load(self, file_name, lazy=False):
+        """Opens a catalog file of any format, along with the changes recorded in its journal
+
+        A lazily opened json catalog keeps only an index of its items in memory and reads an item from the file when
+        it's used, as SQLite and binary catalogs always do.
+        """
+        if is_sqlite_catalog(file_name):
+            store = SqliteCatalog(file_name)
+            self.reset({"Profile": store.load_profile(), "Data": SqliteItems(store)}, file_name)
+        elif is_binary_catalog(file_name):
+            self.reset(open_binary_catalog(file_name), file_name, BinaryCatalogJournal(file_name, self))
+        else:
+            if lazy:
+                index = read_catalog_index(file_name) or build_catalog_index(file_name)
+                index = compact_indexed_catalog(index)
+                sections = {"Profile": index.read_profile(), "Data": IndexedItems(index)}
+            else:
+                sections = read_sections(file_name)
+            replay_journal(sections, read_journal(file_name))
+            self.reset(sections, file_name)
+            self.set_journal(self.new_journal())
+            self.migrate_keys()
+
+    def is_dirty(self):
+        """Returns whether the catalog has changes that haven't been saved"""
+        return self.version != self.saved_version
+
+    def count_change(self, *args):
+        """Counts a change to the catalog"""
+        self.version += 1
+
+    def prepare_save(self):
+        """Prepares a save of the changes made since the last save, returning a function that writes them, which can
+        run on another thread, along with the journal records it writes
+
+        SQLite catalogs are committed right away instead, as their connection can only be used by this thread, and
+        None is returned.
+        """
+        if isinstance(self.sections["Data"], SqliteItems):
+            self.sections["Data"].store.save_profile(self.sections["Profile"])
+            self.sections["Data"].store.commit()
+            self.saved_version = self.version
+            return None
+
+        # A catalog that's still loading has no journal yet, and nothing to save
+        journal = self.journal
+        if journal is None:
+            return None
+
+        # Append the changes to the catalog's journal, rewriting the whole catalog only once the journal is large
+        if journal.needs_compaction():
+            snapshot = journal.take_snapshot()
+            return lambda: journal.compact(snapshot), None
+        records = journal.take_pending()
+        return lambda: journal.append(records), records
+
+    def finish_save(self, saved_version, succeeded, records):
+        """Marks the changes written by a save as saved, or makes sure the next save writes them if the save failed"""
+        if succeeded:
+            self.saved_version = max(self.saved_version, saved_version)
+        elif records is not None:
+            self.journal.restore_pending(records)
+        else:
+            self.journal.compaction_required = True
+
+    @operation_timing.timed("Save Catalog")
+    def save(self):
+        """Writes the changes made since the last save to the catalog's file"""
+        save = self.prepare_save()
+        if save is None:
+            return
+        save_function, records = save
+        saved_version = self.version
+        try:
+            save_function()
+        except (OSError, ValueError):
+            self.finish_save(saved_version, False, records)
+            raise
+        self.finish_save(saved_version, True, records)
+
+    def set_file(self, file_name):
+        """Makes a json file the catalog's file, writing the whole catalog to it with the next save"""
+        self.file_name = file_name
+        self.set_journal(CatalogJournal(file_name, self))
+        self.journal.compaction_required = True
+
+    def export(self, file_name):
+        """Writes a copy of the catalog to a file, as a SQLite database or a binary catalog if the file name has their
+        extension and as json otherwise"""
+        if file_name.lower().endswith(SQLITE_EXTENSIONS):
+            store = SqliteCatalog(file_name, create=True)
+            try:
+                store.import_catalog(self)
+            finally:
+                store.close()
+        elif file_name.lower().endswith(BINARY_EXTENSION):
+            write_atomically(file_name, lambda file: write_binary_catalog(self, file), "wb")
+            if os.path.exists(journal_path(file_name)):
+                os.remove(journal_path(file_name))
+        else:
+            CatalogJournal(file_name, self).compact(self)
+
+    def close(self):
+        """Releases the database or mapped file the catalog reads its items from"""
+        close_items(self.sections["Data"])
+
+
+def new_sections():
+    """Returns the profile and items of an empty catalog, in the json layout, with the items stored by column"""
+    profile = {"Category Names": {}, "Category Fields": {}, "Icon Paths": {}}
+    return {"Profile": profile, "Data": ColumnarItems(profile)}
+
+
+@operation_timing.timed("JSON Parse")
+def read_sections(file_name):
+    """Reads the profile and every item of a json catalog file"""
+    sections = new_sections()
+    with open(file_name, "rb") as file:
+        sections["Data"].add_items(read_items(CatalogReader(file), sections))
+    return sections
+
+
+def read_items(reader, sections):
+    """Yields the key and item of every item a catalog reader reads, keeping the profile it reads in the sections"""
+    for entry_type, name, value in reader.entries():
+        if entry_type == "item":
+            yield name, value
+        elif name == "Profile":
+            sections["Profile"] = value
+            sections["Data"].profile = value
+
+
+def close_items(data):
+    """Releases the database or mapped file a catalog's items are read from, if they're read from one"""
+    if isinstance(data, (SqliteItems, BinaryItems)):
+        data.store.close()
@@ -0,0 +1,32 @@
+ITEM_INSERTED = "item_inserted"
+ITEMS_INSERTED = "items_inserted"
+ITEM_REMOVED = "item_removed"
+ITEM_UPDATED = "item_updated"
+CATEGORIES_CHANGED = "categories_changed"
+FIELDS_CHANGED = "fields_changed"
+CATALOG_RESET = "catalog_reset"
+
+
+class CatalogEvents:
+    """Notifies subscribed views, indexes and caches about changes made to a catalog"""
+
+    def __init__(self):
+        # Initialize listener variables
+        self.listeners = {ITEM_INSERTED: [], ITEMS_INSERTED: [], ITEM_REMOVED: [], ITEM_UPDATED: [],
+                          CATEGORIES_CHANGED: [], FIELDS_CHANGED: [], CATALOG_RESET: []}
+
+    def subscribe(self, event, listener):
+        """Registers a listener to be called each time an event occurs"""
+        if event not in self.listeners:
+            raise ValueError("An invalid value was entered for the type of catalog event.")
+        self.listeners[event].append(listener)
+
+    def unsubscribe(self, event, listener):
+        """Stops a listener from being called when an event occurs"""
+        if listener in self.listeners[event]:
+            self.listeners[event].remove(listener)
+
+    def emit(self, event, *args):
+        """Calls every listener subscribed to an event, in the order they subscribed"""
+        for listener in list(self.listeners[event]):
+            listener(*args)
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+from catalog_items import *
+from catalog_stream import *
+
+
+class CatalogIndex:
+    """The byte ranges of the profile and of each item in a json catalog file, which let items be read one at a time"""
+
+    def __init__(self, catalog_file, profile_range, item_ranges, encoded=False):
+        # Initialize file variables
+        self.catalog_file = catalog_file
+        self.encoded = encoded
+
+        # Initialize range variables
+        self.profile_range = profile_range
+        self.item_ranges = item_ranges
+
+        # Initialize decoding variables, which are read from the profile when the first item is read
+        self.value_codes = None
+
+    def read_profile(self):
+        """Reads the catalog's profile from the catalog file"""
+        with open(self.catalog_file, "rb") as file:
+            return self.read_value(file, self.profile_range)
+
+    def read_item(self, file, item_range):
+        """Reads the item at a byte range of an open catalog file, replacing its codes if the file stores categories
+        and Dropdown values as codes"""
+        item = self.read_value(file, item_range)
+        if not self.encoded:
+            return item
+        if self.value_codes is None:
+            self.value_codes = ValueCodes(self.read_value(file, self.profile_range))
+        return self.value_codes.decode_item(item)
+
+    @staticmethod
+    def read_value(file, value_range):
+        """Reads the json value at a byte range of an open catalog file"""
+        file.seek(value_range[0])
+        return json.loads(file.read(value_range[1] - value_range[0]).decode("utf-8"))
+
+
+class IndexedItems(FileBackedItems):
+    """A dict-like view of a json catalog's items that reads an item from the catalog file only when it's used
+
+    Only the keys and byte ranges of the items are kept in memory, along with a limited number of recently used
+    items, so catalogs larger than the available memory can be browsed.
+    """
+
+    def __init__(self, index):
+        super().__init__()
+
+        # Initialize file variables
+        self.index = index
+
+    def is_stored(self, key):
+        """Returns whether the file has an item with a key"""
+        return key in self.index.item_ranges
+
+    def stored_count(self):
+        """Returns the number of items in the file"""
+        return len(self.index.item_ranges)
+
+    def stored_keys(self):
+        """Yields the keys of the items in the file, in order"""
+        return iter(self.index.item_ranges)
+
+    def stored_items(self):
+        """Yields the keys and items in the file, in order"""
+        with open(self.index.catalog_file, "rb") as file:
+            for key, item_range in self.index.item_ranges.items():
+                yield key, self.index.read_item(file, item_range)
+
+    def read_items(self, keys):
+        """Yields the keys and items in the file for a list of keys, reading them in the order they're stored"""
+        with open(self.index.catalog_file, "rb") as file:
+            for key in sorted(keys, key=lambda key: self.index.item_ranges[key][0]):
+                yield key, self.index.read_item(file, self.index.item_ranges[key])
+
+
+def index_path(catalog_file):
+    """Returns the path of the index kept next to a catalog file"""
+    return catalog_file + ".index"
+
+
+def write_catalog_index(index):
+    """Writes an index next to its catalog file, along with the catalog file's size and modification time, which
+    tell whether the index still describes the file"""
+    stat = os.stat(index.catalog_file)
+
+    def write(file):
+        file.write(json.dumps({"Size": stat.st_size, "Modified": stat.st_mtime_ns,
+                               "Profile": index.profile_range, "Encoded": index.encoded}) + "\n")
+        for key, item_range in index.item_ranges.items():
+            file.write(json.dumps([key, item_range[0], item_range[1]]) + "\n")
+
+    write_atomically(index_path(index.catalog_file), write)
+
+
+def build_catalog_index(catalog_file, report_progress=None, progress_interval=0.1):
+    """Reads the byte ranges of the profile and items in a json catalog file and keeps them in an index next to it
+
+    report_progress, if it's given, is called with the percentage of the file read every progress_interval seconds,
+    and the indexing stops, returning None, as soon as it returns False.
+    """
+    file_size = max(os.path.getsize(catalog_file), 1)
+    profile_range = None
+    item_ranges = {}
+    with open(catalog_file, "rb") as file:
+        reader = CatalogReader(file, track_offsets=True)
+        progress_time = time.monotonic()
+        for entry_type, name, value in reader.entries():
+            if entry_type == "item":
+                item_ranges[name] = reader.value_range
+            elif name == "Profile":
+                profile_range = reader.value_range
+            if report_progress is not None and time.monotonic() - progress_time >= progress_interval:
+                if not report_progress(int(reader.bytes_read * 100 / file_size)):
+                    return None
+                progress_time = time.monotonic()
+    if profile_range is None:
+        raise ValueError("The catalog has no profile.")
+    index = CatalogIndex(catalog_file, profile_range, item_ranges, reader.value_codes is not None)
+
+    # Keep the index so the file doesn't have to be read again the next time it's opened
+    try:
+        write_catalog_index(index)
+    except OSError:
+        pass
+    return index
+
+
+def read_catalog_index(catalog_file):
+    """Reads the index kept next to a catalog file, or returns None if there isn't one or the file has changed since
+    it was written"""
+    try:
+        stat = os.stat(catalog_file)
+        with open(index_path(catalog_file), "r") as file:
+            header = json.loads(file.readline())
+            if header["Size"] != stat.st_size or header["Modified"] != stat.st_mtime_ns:
+                return None
+            item_ranges = {}
+            for line in file:
+                key, start, end = json.loads(line)
+                item_ranges[key] = (start, end)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return CatalogIndex(catalog_file, tuple(header["Profile"]), item_ranges, header.get("Encoded", False))
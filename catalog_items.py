@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class FileBackedItems(MutableMapping):
+    """A dict-like view of the items stored in a catalog file, which reads items from the file only when they're used
+
+    Items that are inserted, changed or removed after the file was opened are kept in memory on top of the file.
+    Subclasses read the file through is_stored, stored_count, stored_keys, stored_items and read_items.
+    """
+
+    # The number of recently used items kept in memory
+    cache_size = 2000
+
+    def __init__(self):
+        # Initialize change variables
+        self.changed = {}
+        self.new_keys = []
+        self.removed = set()
+
+        # Initialize cache variables
+        self.cache = OrderedDict()
+
+    def __getitem__(self, key):
+        if key in self.changed:
+            return self.changed[key]
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key in self.removed or not self.is_stored(key):
+            raise KeyError(key)
+        item = dict(self.read_items([key]))[key]
+        self.cache_item(key, item)
+        return item
+
+    def __setitem__(self, key, item):
+        if key not in self:
+            self.new_keys.append(key)
+        self.changed[key] = item
+        self.cache.pop(key, None)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in self.changed:
+            del self.changed[key]
+        if key in self.new_keys:
+            self.new_keys.remove(key)
+        else:
+            self.removed.add(key)
+        self.cache.pop(key, None)
+
+    def __contains__(self, key):
+        if key in self.changed:
+            return True
+        return key not in self.removed and self.is_stored(key)
+
+    def __len__(self):
+        return self.stored_count() - len(self.removed) + len(self.new_keys)
+
+    def __iter__(self):
+        for key in self.stored_keys():
+            if key not in self.removed:
+                yield key
+        yield from list(self.new_keys)
+
+    def items(self):
+        """Yields every key and item in order, reading the file sequentially"""
+        for key, item in self.stored_items():
+            if key not in self.removed:
+                yield key, self.changed.get(key, item)
+        for key in list(self.new_keys):
+            yield key, self.changed[key]
+
+    def prefetch(self, keys):
+        """Reads a page of items at once so they're already in memory when they're displayed"""
+        missing_keys = [key for key in keys if key not in self.changed and key not in self.cache and
+                        key not in self.removed and self.is_stored(key)]
+        for key, item in self.read_items(missing_keys):
+            self.cache_item(key, item)
+
+    def cache_item(self, key, item):
+        """Keeps an item in memory, forgetting the least recently used item if the cache is full"""
+        self.cache[key] = item
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
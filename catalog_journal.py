@@ -0,0 +1,222 @@
+import os
+import copy
+import json
+from catalog_stream import *
+from catalog_index import *
+
+
+class CatalogJournal:
+    """Records catalog changes as small records appended to a log next to the catalog file
+
+    A catalog is stored as a snapshot, the catalog file itself, plus the changes recorded in its journal since the
+    snapshot was written. Saving appends only the changes made since the last save, and the snapshot is rewritten
+    once the journal has grown large enough that replaying it costs more than rewriting the snapshot.
+    """
+
+    # The size of the journal, relative to the snapshot, at which the snapshot is rewritten
+    compaction_ratio = 0.5
+
+    # The size of journal, in bytes, that is always allowed before the snapshot is rewritten
+    minimum_compaction_size = 64 * 1024
+
+    # Whether the snapshot can be rewritten while the catalog is open. Catalogs that read their items from the
+    # snapshot on demand rewrite it the next time they're opened instead.
+    compact_while_open = True
+
+    # Whether snapshots store categories and Dropdown values as codes into the profile's lists, which makes
+    # catalogs with many items in few categories smaller, but can't be opened by versions from before the encoding.
+    # It's turned on by the OMNILOG_ENCODE_VALUES environment variable, and a file that's already encoded stays encoded.
+    encode_values = bool(os.environ.get("OMNILOG_ENCODE_VALUES"))
+
+    def __init__(self, catalog_file, catalog):
+        # Initialize catalog variables
+        self.catalog = catalog
+
+        # Initialize file variables
+        self.catalog_file = catalog_file
+        self.journal_file = journal_path(catalog_file)
+
+        # Initialize record variables
+        self.pending_records = []
+        self.profile_changed = False
+        self.compaction_required = False
+
+    def record_item(self, key):
+        """Records that an item was inserted or changed"""
+        self.pending_records.append({"Operation": "Item", "Key": key, "Item": self.catalog["Data"][key]})
+
+    def record_items(self, keys):
+        """Records that a batch of items was inserted"""
+        for key in keys:
+            self.record_item(key)
+
+    def record_removal(self, key):
+        """Records that an item was removed"""
+        self.pending_records.append({"Operation": "Remove", "Key": key})
+
+    def record_profile(self):
+        """Records that the profile's categories, icons or fields changed"""
+        # Only the latest profile matters, so it's read when the journal is written
+        self.profile_changed = True
+
+    def has_pending_changes(self):
+        """Returns whether there are changes that haven't been written to the journal"""
+        return bool(self.pending_records) or self.profile_changed
+
+    def needs_compaction(self):
+        """Returns whether the snapshot should be rewritten instead of appending to the journal"""
+        if self.compaction_required or not os.path.exists(self.catalog_file):
+            return True
+        return self.compact_while_open and self.journal_is_large()
+
+    def journal_is_large(self):
+        """Returns whether replaying the journal costs more than rewriting the snapshot"""
+        if not os.path.exists(self.journal_file):
+            return False
+        snapshot_size = os.path.getsize(self.catalog_file)
+        return os.path.getsize(self.journal_file) > max(snapshot_size * self.compaction_ratio,
+                                                        self.minimum_compaction_size)
+
+    def take_pending(self):
+        """Returns the pending changes as journal records and forgets them
+
+        The records are independent of later changes to the catalog, so they can be written on another thread.
+        """
+        records = list(self.pending_records)
+        if self.profile_changed:
+            records.append({"Operation": "Profile", "Profile": copy.deepcopy(self.catalog["Profile"])})
+        self.clear_pending()
+        return records
+
+    def restore_pending(self, records):
+        """Puts back records taken for a save that failed, so the next save writes them again"""
+        self.pending_records[0:0] = records
+
+    def take_snapshot(self):
+        """Returns a copy of the catalog that later changes won't affect, and forgets the pending changes it includes
+
+        Items are replaced rather than changed in place, so copying the item mapping is enough to keep the snapshot
+        consistent. Items stored by column copy their columns instead, without reading any item.
+        """
+        self.clear_pending()
+        self.compaction_required = False
+        data = self.catalog["Data"]
+        data_copy = getattr(data, "copy", None)
+        return {"Profile": copy.deepcopy(self.catalog["Profile"]), "Data": data_copy() if data_copy else dict(data)}
+
+    def flush(self):
+        """Appends the pending changes to the journal"""
+        self.append(self.take_pending())
+
+    def append(self, records):
+        """Appends records to the journal, making sure they're on disk before returning"""
+        if not records:
+            return
+        self.trim_incomplete_record()
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        file = open(self.journal_file, "a")
+        file.write(lines)
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+
+    def trim_incomplete_record(self):
+        """Removes an incomplete record left at the end of the journal by an interrupted save"""
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, "rb+") as file:
+            position = file.seek(0, os.SEEK_END)
+            if position == 0:
+                return
+            file.seek(position - 1)
+            if file.read(1) == b"\n":
+                return
+
+            # Search backwards for the end of the last complete record
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                file.seek(position)
+                end_of_record = file.read(step).rfind(b"\n")
+                if end_of_record >= 0:
+                    file.truncate(position + end_of_record + 1)
+                    return
+            file.truncate(0)
+
+    def compact(self, snapshot=None):
+        """Replaces the catalog file with a snapshot of the whole catalog and empties the journal"""
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        self.write_snapshot(snapshot)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def write_snapshot(self, snapshot):
+        """Replaces the catalog file with a snapshot of the whole catalog, and its index with one for the snapshot
+
+        The snapshot keeps the encoding of the file it replaces, so saving never changes a catalog file into one that
+        the version that wrote it can't open.
+        """
+        encode_values = self.encode_values or is_value_coded_catalog(self.catalog_file)
+        item_ranges = {}
+        profile_ranges = []
+        write_atomically(self.catalog_file,
+                         lambda file: profile_ranges.append(write_catalog(snapshot, file, item_ranges, encode_values)))
+
+        # The index only speeds up opening the catalog, and one that's missing or out of date is rebuilt when needed
+        try:
+            write_catalog_index(CatalogIndex(self.catalog_file, profile_ranges[0], item_ranges, encode_values))
+        except OSError:
+            pass
+
+    def clear_pending(self):
+        """Forgets the changes that have been written"""
+        self.pending_records = []
+        self.profile_changed = False
+
+
+def journal_path(catalog_file):
+    """Returns the path of the journal kept next to a catalog file"""
+    return catalog_file + ".journal"
+
+
+def read_journal(catalog_file):
+    """Yields the records in a catalog's journal, oldest first
+
+    A save interrupted partway through can leave an incomplete last record, so reading stops at the first record
+    that can't be decoded.
+    """
+    if not os.path.exists(journal_path(catalog_file)):
+        return
+    with open(journal_path(catalog_file), "r") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return
+            yield record
+
+
+def replay_journal(catalog, records):
+    """Applies journal records to a catalog directly, without notifying anything of the changes"""
+    for record in records:
+        if record["Operation"] == "Item":
+            catalog["Data"][record["Key"]] = record["Item"]
+        elif record["Operation"] == "Remove" and record["Key"] in catalog["Data"]:
+            del catalog["Data"][record["Key"]]
+        elif record["Operation"] == "Profile":
+            catalog["Profile"] = record["Profile"]
+
+
+def compact_indexed_catalog(index):
+    """Merges a large journal into a json catalog file that's read through an index, before anything reads from it,
+    returning the index of the rewritten file, or the index as it is if the journal is small"""
+    if not CatalogJournal(index.catalog_file, None).journal_is_large():
+        return index
+    catalog = {"Profile": index.read_profile(), "Data": IndexedItems(index)}
+    replay_journal(catalog, read_journal(index.catalog_file))
+    CatalogJournal(index.catalog_file, catalog).compact(catalog)
+    index = read_catalog_index(index.catalog_file)
+    if index is None:
+        raise ValueError("The catalog's index couldn't be written.")
+    return index
@@ -0,0 +1,113 @@
+import os
+import time
+from catalog_stream import *
+from catalog_journal import *
+from catalog_index import *
+from operation_timing import *
+from PyQt5.QtCore import *
+
+
+class CatalogLoader(QThread):
+    """Reads a catalog file on a worker thread and hands its profile and items to the GUI thread in batches"""
+
+    profile_loaded = pyqtSignal(object)
+    items_loaded = pyqtSignal(object)
+    index_loaded = pyqtSignal(object)
+    journal_loaded = pyqtSignal(object)
+    progress_changed = pyqtSignal(int)
+    loading_failed = pyqtSignal(str)
+
+    # The longest time, in seconds, that read items are held before being handed to the GUI thread
+    batch_interval = 0.1
+
+    # The number of journal records handed to the GUI thread at a time
+    journal_batch_size = 1000
+
+    def __init__(self, file_name, lazy=False, parent=None):
+        super().__init__(parent)
+
+        # Initialize file variables
+        self.file_name = file_name
+
+        # Initialize loading variables, where a lazy load reads only the index of the catalog's items
+        self.lazy = lazy
+        self.cancelled = False
+        self.succeeded = False
+
+    def run(self):
+        """Reads the catalog file, stopping early if the load is cancelled"""
+        try:
+            if self.lazy:
+                self.read_index()
+            else:
+                self.read_items()
+            if self.cancelled:
+                return
+
+            # Replay the changes recorded since the snapshot was written
+            records = []
+            for record in read_journal(self.file_name):
+                if self.cancelled:
+                    return
+                records.append(record)
+                if len(records) >= self.journal_batch_size:
+                    self.journal_loaded.emit(records)
+                    records = []
+            if records:
+                self.journal_loaded.emit(records)
+        except (OSError, ValueError) as error:
+            self.loading_failed.emit(str(error))
+            return
+
+        if not self.cancelled:
+            self.progress_changed.emit(100)
+            self.succeeded = True
+
+    @operation_timing.timed("JSON Parse")
+    def read_items(self):
+        """Reads the profile and every item of the catalog file"""
+        file_size = max(os.path.getsize(self.file_name), 1)
+        with open(self.file_name, "rb") as file:
+            reader = CatalogReader(file)
+            batch = []
+            batch_start = time.monotonic()
+            for entry_type, name, value in reader.entries():
+                if self.cancelled:
+                    return
+                if entry_type == "item":
+                    batch.append((name, value))
+                elif name == "Profile":
+                    self.profile_loaded.emit(value)
+
+                # Hand over the items read so far at regular intervals so the list fills in progressively
+                if batch and time.monotonic() - batch_start >= self.batch_interval:
+                    self.items_loaded.emit(batch)
+                    self.progress_changed.emit(int(reader.bytes_read * 100 / file_size))
+                    batch = []
+                    batch_start = time.monotonic()
+            if batch:
+                self.items_loaded.emit(batch)
+
+    def read_index(self):
+        """Reads the profile and the index of the catalog file's items, indexing the file if its index is missing or
+        out of date"""
+        index = read_catalog_index(self.file_name)
+        if index is None:
+            index = build_catalog_index(self.file_name, self.report_index_progress)
+            if index is None:
+                return
+
+        # Merge a large journal into the file while nothing is reading items from it
+        index = compact_indexed_catalog(index)
+
+        self.profile_loaded.emit(index.read_profile())
+        self.index_loaded.emit(index)
+
+    def report_index_progress(self, progress):
+        """Reports the progress of indexing the catalog file, returning whether to keep indexing it"""
+        self.progress_changed.emit(progress)
+        return not self.cancelled
+
+    def cancel(self):
+        """Asks the worker to stop reading the catalog file"""
+        self.cancelled = True
@@ -0,0 +1,258 @@
+from icon_cache import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+
+class CatalogModel(QAbstractListModel):
+    """A list model that presents catalog items directly from the catalog data"""
+
+    # The number of rows made available to the view each time it scrolls past the loaded rows
+    fetch_batch_size = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Initialize catalog variables
+        self.catalog = {"Profile": {"Category Names": {}, "Category Fields": {}, "Icon Paths": {}}, "Data": {}}
+        self.keys = []
+        self.showing_results = False
+
+        # Initialize row variables, with each key's row, less the row offset, for the first indexed rows of the list.
+        # Items inserted at the top only add to the offset, so the rows of the items below them stay correct.
+        self.fetched_rows = 0
+        self.rows = {}
+        self.row_offset = 0
+        self.indexed_rows = 0
+
+        # Initialize sort variables, where every item is listed newest first unless a label to sort by is set
+        self.sort_index = None
+        self.sort_label = None
+        self.descending = False
+
+    def set_catalog(self, catalog):
+        """Replaces the catalog presented by the model, with the newest items first"""
+        self.catalog = catalog
+        icon_cache.set_profile(catalog["Profile"])
+        self.show_all()
+
+    def set_sort(self, sort_index, label, descending=False):
+        """Sorts the list of every item by a label with a catalog's sort index, or lists the newest items first if the
+        label is None"""
+        self.sort_index = sort_index
+        self.sort_label = label
+        self.descending = descending
+        if not self.showing_results:
+            self.show_all()
+
+    def show_all(self):
+        """Presents every item in the catalog, with the newest items first or sorted by the sort label"""
+        # Catalogs that read items on demand can supply their keys without reading them all up front
+        reversed_keys = getattr(self.catalog["Data"], "reversed_keys", None)
+        if self.sort_label is not None:
+            self.set_keys(self.sort_index.sorted_keys(self.sort_label, self.descending))
+        elif reversed_keys is not None:
+            self.set_keys(reversed_keys())
+        else:
+            self.set_keys(list(reversed(list(self.catalog["Data"]))))
+        self.showing_results = False
+
+    def show_results(self, keys):
+        """Presents only the given catalog items, in the order given"""
+        self.set_keys(list(keys))
+        self.showing_results = True
+
+    def set_keys(self, keys):
+        """Replaces the rows of the list with the items for a list of catalog keys"""
+        self.beginResetModel()
+        self.keys = keys
+        self.rows = {}
+        self.row_offset = 0
+        self.indexed_rows = 0
+        self.fetched_rows = min(self.fetch_batch_size, len(self.keys))
+        self.prefetch_rows(0, self.fetched_rows)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        """Returns the number of rows that have been made available to the view"""
+        if parent.isValid():
+            return 0
+        return self.fetched_rows
+
+    def canFetchMore(self, parent):
+        """Returns whether there are catalog items that haven't been made available to the view"""
+        if parent.isValid():
+            return False
+        return self.fetched_rows < len(self.keys)
+
+    def fetchMore(self, parent):
+        """Makes the next batch of catalog items available to the view"""
+        if parent.isValid():
+            return
+        fetch_count = min(self.fetch_batch_size, len(self.keys) - self.fetched_rows)
+        if fetch_count <= 0:
+            return
+        self.prefetch_rows(self.fetched_rows, self.fetched_rows + fetch_count)
+        self.beginInsertRows(QModelIndex(), self.fetched_rows, self.fetched_rows + fetch_count - 1)
+        self.fetched_rows += fetch_count
+        self.endInsertRows()
+
+    def prefetch_rows(self, start, end):
+        """Lets catalogs that read items on demand read a page of rows at once"""
+        prefetch = getattr(self.catalog["Data"], "prefetch", None)
+        if prefetch is not None:
+            prefetch(self.keys[start:end])
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Returns the data for a row, looking up the catalog item only when the view asks for it"""
+        if not index.isValid() or index.row() >= self.fetched_rows:
+            return None
+
+        key = self.keys[index.row()]
+        if role == Qt.DisplayRole:
+            return self.item_label(key)
+        elif role == Qt.DecorationRole:
+            return icon_cache.category_icon(self.catalog["Data"][key]["Category"])
+        elif role == Qt.SizeHintRole:
+            return QSize(35, 35)
+        elif role == Qt.UserRole:
+            return key
+        return None
+
+    def item_label(self, key):
+        """Returns the text shown in the list for an item, which is the value of its category's first field"""
+        item = self.catalog["Data"][key]
+        category_fields = self.catalog["Profile"]["Category Fields"].get(item["Category"], {})
+        if "0" not in category_fields:
+            return ""
+        label = item.get(category_fields["0"][0], "")
+        if isinstance(label, list):
+            return ", ".join(label)
+        return str(label)
+
+    def insert_item(self, key):
+        """Adds a newly inserted catalog item to the top of the list"""
+        self.insert_items([key])
+
+    def insert_items(self, keys):
+        """Adds a batch of newly inserted catalog items to the top of the list, newest first"""
+        # Results are refreshed by whoever requested them, as only they know whether the new items match
+        if self.showing_results or not keys:
+            return
+        if self.sort_label is not None:
+            self.insert_sorted(keys)
+            return
+        self.load_keys()
+        self.beginInsertRows(QModelIndex(), 0, len(keys) - 1)
+        self.insert_keys(0, list(reversed(keys)))
+        self.fetched_rows += len(keys)
+        self.endInsertRows()
+
+    def insert_sorted(self, keys):
+        """Inserts newly inserted catalog items at their places in the sorted list
+
+        Each item's row is looked up in the sort index, which already has every new item, so the items are inserted
+        in the order of their rows, after the items that come before them. A large batch is listed again from the sort index
+        instead, as inserting each of its items into a long list would move the rest of the list each time.
+        """
+        if len(keys) > self.sort_index.merged_batch_size:
+            self.show_all()
+            return
+        for row, key in sorted((self.sorted_row(key), key) for key in keys):
+            self.insert_row(row, key)
+
+    def insert_row(self, row, key):
+        """Inserts a catalog item's row into the list, making it available to the view if the rows around it are"""
+        self.load_keys()
+        if row < self.fetched_rows or self.fetched_rows == len(self.keys):
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.insert_keys(row, [key])
+            self.fetched_rows += 1
+            self.endInsertRows()
+        else:
+            self.insert_keys(row, [key])
+
+    def insert_keys(self, row, keys):
+        """Inserts keys into the list at a row, keeping the rows of the items above them indexed, and of the items
+        below them too if they're inserted at the top"""
+        self.keys[row:row] = keys
+        if row == 0:
+            self.row_offset += len(keys)
+            for position, key in enumerate(keys):
+                self.rows[key] = position - self.row_offset
+            self.indexed_rows += len(keys)
+        else:
+            self.indexed_rows = min(self.indexed_rows, row)
+
+    def key_row(self, key):
+        """Returns the row of a catalog item in the list, or None if it isn't listed
+
+        Rows below an insertion or removal are indexed again as they're looked up, so looking up the rows of items
+        that are changed one at a time doesn't search the list.
+        """
+        self.load_keys()
+        row = self.rows.get(key)
+        if row is not None:
+            row += self.row_offset
+            if row < len(self.keys) and self.keys[row] == key:
+                return row
+
+        # Index the rows that aren't indexed until the item is found
+        keys = self.keys
+        rows = self.rows
+        row_offset = self.row_offset
+        for row in range(self.indexed_rows, len(keys)):
+            rows[keys[row]] = row - row_offset
+            if keys[row] == key:
+                self.indexed_rows = row + 1
+                return row
+        self.indexed_rows = len(keys)
+        return None
+
+    def remove_item(self, key):
+        """Removes a catalog item's row from the list"""
+        row = self.key_row(key)
+        if row is None:
+            return
+        del self.rows[key]
+        self.indexed_rows = min(self.indexed_rows, row)
+        if row < self.fetched_rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.keys[row]
+            self.fetched_rows -= 1
+            self.endRemoveRows()
+        else:
+            del self.keys[row]
+
+    def update_item(self, key):
+        """Redraws the row of a catalog item whose data has changed, moving it if its place in the sorted list has
+        changed"""
+        row = self.key_row(key)
+        if row is None:
+            return
+        if self.sort_label is not None and not self.showing_results and row != self.sorted_row(key):
+            self.remove_item(key)
+            self.insert_sorted([key])
+        elif row < self.fetched_rows:
+            self.dataChanged.emit(self.index(row), self.index(row))
+
+    def sorted_row(self, key):
+        """Returns the row of a catalog item in the list of every item sorted by the sort label"""
+        position = self.sort_index.position(self.sort_label, key)
+        if self.descending:
+            return len(self.sort_index.sort_by(self.sort_label)) - 1 - position
+        return position
+
+    def load_keys(self):
+        """Reads keys that are supplied on demand into a list, so rows can be inserted and removed"""
+        if not isinstance(self.keys, list):
+            self.keys = list(self.keys)
+
+    def update_profile(self):
+        """Redraws every loaded row after category names, icons or fields have changed"""
+        icon_cache.set_profile(self.catalog["Profile"])
+        if self.fetched_rows > 0:
+            self.dataChanged.emit(self.index(0), self.index(self.fetched_rows - 1))
+
+    def key_at(self, row):
+        """Returns the catalog key of the item at a row"""
+        return self.keys[row]
@@ -0,0 +1,32 @@
+from operation_timing import *
+from PyQt5.QtCore import *
+
+
+class CatalogSaver(QThread):
+    """Writes a catalog's changes to disk on a worker thread
+
+    The save function is prepared on the GUI thread from a snapshot of the changes, so the catalog can keep changing
+    while the save runs.
+    """
+
+    def __init__(self, save_function, saved_version, show_confirmation, records=None, parent=None):
+        super().__init__(parent)
+
+        # Initialize save variables
+        self.save_function = save_function
+        self.saved_version = saved_version
+        self.show_confirmation = show_confirmation
+        self.records = records
+        self.succeeded = False
+        self.error = ""
+        self.handled = False
+
+    @operation_timing.timed("Save Catalog")
+    def run(self):
+        """Runs the save function, keeping any error it raises for the GUI thread to report"""
+        try:
+            self.save_function()
+        except (OSError, ValueError) as error:
+            self.error = str(error)
+            return
+        self.succeeded = True
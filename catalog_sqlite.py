@@ -0,0 +1,267 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# The file name extensions that export_catalog writes as SQLite databases
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS profile (
+        name TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS categories (
+        position TEXT PRIMARY KEY,
+        name TEXT,
+        icon_path TEXT
+    );
+    CREATE TABLE IF NOT EXISTS fields (
+        category TEXT NOT NULL,
+        position TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        items TEXT NOT NULL,
+        PRIMARY KEY (category, position)
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT NOT NULL UNIQUE,
+        category TEXT,
+        date_entered TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS items_category ON items (category);
+    CREATE INDEX IF NOT EXISTS items_date_entered ON items (date_entered);
+"""
+
+
+# The tables every SQLite catalog has
+CATALOG_TABLES = {"profile", "categories", "fields", "items"}
+
+
+class SqliteCatalog:
+    """Stores a catalog's profile, categories, fields and items in normalized tables of a SQLite database
+
+    The tables are only created when a new catalog is written, so opening another program's database is refused
+    instead of adding the catalog tables to it.
+    """
+
+    def __init__(self, file_name, create=False):
+        # Initialize database variables
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name)
+
+        tables = {name for name, in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not CATALOG_TABLES <= tables:
+            if not create or tables:
+                self.connection.close()
+                raise ValueError("The database isn't a catalog.")
+            self.connection.executescript(SCHEMA)
+
+    def load_profile(self):
+        """Reads the catalog profile in the same layout as a json catalog's "Profile" section"""
+        profile = {"Category Names": {}, "Category Fields": {}, "Icon Paths": {}}
+        for position, name, icon_path in self.connection.execute(
+                "SELECT position, name, icon_path FROM categories ORDER BY rowid"):
+            if name is not None:
+                profile["Category Names"][position] = name
+            if icon_path is not None:
+                profile["Icon Paths"][position] = icon_path
+        for category, position, name, field_type, items in self.connection.execute(
+                "SELECT category, position, name, type, items FROM fields ORDER BY rowid"):
+            profile["Category Fields"].setdefault(category, {})[position] = [name, field_type, json.loads(items)]
+
+        # Any other profile sections are stored as they are
+        for name, value in self.connection.execute("SELECT name, value FROM profile ORDER BY rowid"):
+            profile[name] = json.loads(value)
+        return profile
+
+    def save_profile(self, profile):
+        """Replaces the stored profile with the sections of a json catalog's "Profile" section"""
+        self.connection.execute("DELETE FROM categories")
+        self.connection.execute("DELETE FROM fields")
+        self.connection.execute("DELETE FROM profile")
+
+        category_positions = list(profile["Category Names"])
+        for position in profile["Icon Paths"]:
+            if position not in profile["Category Names"]:
+                category_positions.append(position)
+        self.connection.executemany(
+            "INSERT INTO categories (position, name, icon_path) VALUES (?, ?, ?)",
+            [(position, profile["Category Names"].get(position), profile["Icon Paths"].get(position))
+             for position in category_positions])
+        self.connection.executemany(
+            "INSERT INTO fields (category, position, name, type, items) VALUES (?, ?, ?, ?, ?)",
+            [(category, position, field[0], field[1], json.dumps(field[2]))
+             for category, fields in profile["Category Fields"].items() for position, field in fields.items()])
+        self.connection.executemany(
+            "INSERT INTO profile (name, value) VALUES (?, ?)",
+            [(name, json.dumps(value)) for name, value in profile.items()
+             if name not in ["Category Names", "Category Fields", "Icon Paths"]])
+
+    def item_keys(self):
+        """Returns the keys of every item, in the order they were inserted"""
+        return [key for key, in self.connection.execute("SELECT key FROM items ORDER BY row_id")]
+
+    def category_keys(self, category):
+        """Returns the keys of the items in a category, in the order they were inserted"""
+        return [key for key, in self.connection.execute(
+            "SELECT key FROM items WHERE category = ? ORDER BY row_id", (category,))]
+
+    def date_entered_keys(self, date_entered):
+        """Returns the keys of the items entered at a "Date Entered" value"""
+        return [key for key, in self.connection.execute(
+            "SELECT key FROM items WHERE date_entered = ? ORDER BY row_id", (date_entered,))]
+
+    def get_item(self, key):
+        """Returns the item stored under a key, or None if there isn't one"""
+        row = self.connection.execute("SELECT data FROM items WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_items(self, keys):
+        """Returns a dict of the items stored under a list of keys"""
+        items = {}
+        keys = list(keys)
+        # Stay below SQLite's limit on the number of parameters in one statement
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            for key, data in self.connection.execute(
+                    "SELECT key, data FROM items WHERE key IN (" + ", ".join("?" * len(batch)) + ")", batch):
+                items[key] = json.loads(data)
+        return items
+
+    def iter_items(self):
+        """Yields the key and item of every item, in the order they were inserted"""
+        for key, data in self.connection.execute("SELECT key, data FROM items ORDER BY row_id"):
+            yield key, json.loads(data)
+
+    def put_items(self, items):
+        """Stores (key, item) pairs, replacing the data of existing items without changing their order"""
+        self.connection.executemany(
+            "INSERT INTO items (key, category, date_entered, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET category = excluded.category, date_entered = excluded.date_entered, "
+            "data = excluded.data",
+            [(key, item.get("Category"), item.get("Date Entered"), json.dumps(item)) for key, item in items])
+
+    def delete_item(self, key):
+        """Deletes the item stored under a key"""
+        self.connection.execute("DELETE FROM items WHERE key = ?", (key,))
+
+    def import_catalog(self, catalog):
+        """Replaces the database's contents with a catalog in the json layout"""
+        self.connection.execute("DELETE FROM items")
+        self.save_profile(catalog["Profile"])
+        batch = []
+        for key, item in catalog["Data"].items():
+            batch.append((key, item))
+            if len(batch) >= 1000:
+                self.put_items(batch)
+                batch = []
+        self.put_items(batch)
+        self.commit()
+
+    def commit(self):
+        """Makes the changes since the last commit permanent"""
+        self.connection.commit()
+
+    def close(self):
+        """Closes the database, discarding any uncommitted changes"""
+        self.connection.close()
+
+
+class SqliteItems(MutableMapping):
+    """A dict-like view of a SQLite catalog's items that reads items from the database only when they're used
+
+    Only the item keys are kept in memory, along with a limited number of recently used items.
+    """
+
+    # The number of recently used items kept in memory
+    cache_size = 2000
+
+    def __init__(self, store):
+        # Initialize database variables
+        self.store = store
+
+        # Initialize key variables
+        self.keys_in_order = store.item_keys()
+        self.key_set = set(self.keys_in_order)
+
+        # Removed keys are only dropped from the order when it's next used, so removing an item doesn't search for it
+        self.removed_keys = set()
+
+        # Initialize cache variables
+        self.cache = OrderedDict()
+
+    def __getitem__(self, key):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key not in self.key_set:
+            raise KeyError(key)
+        item = self.store.get_item(key)
+        self.cache_item(key, item)
+        return item
+
+    def __setitem__(self, key, item):
+        self.store.put_items([(key, item)])
+        if key not in self.key_set:
+            # A removed key that's stored again goes to the end, so it's dropped from its old place first
+            if key in self.removed_keys:
+                self.ordered_keys()
+            self.keys_in_order.append(key)
+            self.key_set.add(key)
+        self.cache_item(key, item)
+
+    def __delitem__(self, key):
+        if key not in self.key_set:
+            raise KeyError(key)
+        self.store.delete_item(key)
+        self.key_set.remove(key)
+        self.removed_keys.add(key)
+        self.cache.pop(key, None)
+
+    def __iter__(self):
+        return iter(self.ordered_keys())
+
+    def __reversed__(self):
+        return reversed(self.ordered_keys())
+
+    def __len__(self):
+        return len(self.key_set)
+
+    def __contains__(self, key):
+        return key in self.key_set
+
+    def items(self):
+        """Yields every key and item with a single query instead of one query per item"""
+        return self.store.iter_items()
+
+    def ordered_keys(self):
+        """Returns the keys in the order they were inserted, first dropping the keys removed since it was last used"""
+        if self.removed_keys:
+            self.keys_in_order = [key for key in self.keys_in_order if key not in self.removed_keys]
+            self.removed_keys = set()
+        return self.keys_in_order
+
+    def prefetch(self, keys):
+        """Reads a page of items with a single query so they're already in memory when they're displayed"""
+        missing_keys = [key for key in keys if key not in self.cache]
+        for key, item in self.store.get_items(missing_keys).items():
+            self.cache_item(key, item)
+
+    def cache_item(self, key, item):
+        """Keeps an item in memory, forgetting the least recently used item if the cache is full"""
+        self.cache[key] = item
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+def is_sqlite_catalog(file_name):
+    """Returns whether a file is a SQLite database rather than a json catalog"""
+    try:
+        with open(file_name, "rb") as file:
+            return file.read(16) == b"SQLite format 3\x00"
+    except OSError:
+        return False
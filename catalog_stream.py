@@ -0,0 +1,282 @@
+import os
+import json
+import codecs
+
+# The "Encoding" of catalog files that store categories and Dropdown values as codes
+VALUE_CODES = "Value Codes"
+
+
+class ValueCodes:
+    """Numbers the categories in a profile's "Category Names" and the items of each Dropdown field, so a catalog file
+    can store an item's category and Dropdown values as small integer codes instead of repeating their text
+
+    A category is numbered by its position in "Category Names" and a Dropdown value by its position in the field's
+    items. Text that isn't in the profile is stored as it is, and any other value is stored as {"Value": value}, so
+    it can't be mistaken for a code.
+    """
+
+    def __init__(self, profile):
+        # Initialize category variables
+        self.categories = {}
+        self.category_codes = {}
+        for position, category in profile.get("Category Names", {}).items():
+            if position.isdigit():
+                self.categories[int(position)] = category
+                self.category_codes.setdefault(category, int(position))
+
+        # Initialize Dropdown variables, by category and field name
+        self.dropdown_items = {}
+        self.dropdown_codes = {}
+        for category, fields in profile.get("Category Fields", {}).items():
+            for field in fields.values():
+                if field[1] == "Dropdown" and isinstance(field[2], list):
+                    codes = {}
+                    for code, value in enumerate(field[2]):
+                        if isinstance(value, str):
+                            codes.setdefault(value, code)
+                    self.dropdown_items.setdefault(category, {})[field[0]] = field[2]
+                    self.dropdown_codes.setdefault(category, {})[field[0]] = codes
+
+    def encode_item(self, item):
+        """Returns a copy of an item with its category and Dropdown values replaced by their codes
+
+        Text without a code is kept as it is, and any other value is wrapped in {"Value": value}.
+        """
+        encoded = item.copy()
+        category = item.get("Category")
+        if type(category) is str:
+            encoded["Category"] = self.category_codes.get(category, category)
+        elif "Category" in item:
+            encoded["Category"] = {"Value": category}
+
+        # Dropdown values are encoded inline, since every item written to the file is encoded
+        if type(category) is str and category in self.dropdown_codes:
+            for label, codes in self.dropdown_codes[category].items():
+                if label in item:
+                    value = item[label]
+                    encoded[label] = codes.get(value, value) if type(value) is str else {"Value": value}
+        return encoded
+
+    def decode_item(self, item):
+        """Replaces the codes in an item read from a file with the category and Dropdown values they stand for"""
+        category = item.get("Category")
+        if type(category) is int:
+            if category not in self.categories:
+                raise ValueError("The catalog file has a code that isn't in its profile.")
+            category = item["Category"] = self.categories[category]
+        elif type(category) is dict:
+            category = item["Category"] = category.get("Value")
+
+        # Dropdown values are decoded inline, since every item read from the file is decoded
+        if type(category) is str and category in self.dropdown_items:
+            for label, values in self.dropdown_items[category].items():
+                value = item.get(label)
+                if type(value) is int:
+                    if value < 0 or value >= len(values):
+                        raise ValueError("The catalog file has a code that isn't in its profile.")
+                    item[label] = values[value]
+                elif type(value) is dict:
+                    item[label] = value.get("Value")
+        return item
+
+
+class CatalogReader:
+    """Reads a json catalog file one section or item at a time instead of parsing the whole file at once"""
+
+    def __init__(self, file, chunk_size=1 << 20, track_offsets=False):
+        # Initialize file variables
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.bytes_read = 0
+        self.end_of_file = False
+
+        # Initialize parsing variables
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+
+        # Initialize offset variables, which record the byte range in the file of the last value read
+        self.track_offsets = track_offsets
+        self.offset_position = 0
+        self.offset = 0
+        self.value_range = None
+
+        # Initialize decoding variables, for files that store categories and Dropdown values as codes
+        self.profile = None
+        self.value_codes = None
+
+    def entries(self):
+        """Yields ("section", name, value) for each top-level section other than "Data", and ("item", key, item)
+        for each entry in the "Data" section, in the order they appear in the file
+
+        Items of files that store categories and Dropdown values as codes are yielded with the codes replaced.
+        """
+        self.expect("{")
+        while not self.consume("}"):
+            name = self.read_value()
+            self.expect(":")
+            if name == "Data":
+                self.expect("{")
+                while not self.consume("}"):
+                    key = self.read_value()
+                    self.expect(":")
+                    item = self.read_value()
+                    if self.value_codes is not None:
+                        item = self.value_codes.decode_item(item)
+                    yield "item", key, item
+                    self.consume(",")
+            else:
+                value = self.read_value()
+                if name == "Profile":
+                    self.profile = value
+                elif name == "Encoding":
+                    self.value_codes = read_encoding(value, self.profile)
+                yield "section", name, value
+            self.consume(",")
+
+    def read_value(self):
+        """Decodes the next complete json value, reading more of the file until the value is complete"""
+        self.skip_whitespace()
+        if self.track_offsets:
+            start = self.byte_offset(self.position)
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.read_chunk():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.end_of_file and not isinstance(value, (dict, list, str)):
+                self.read_chunk()
+                continue
+
+            self.position = end
+            if self.track_offsets:
+                self.value_range = (start, self.byte_offset(end))
+            return value
+
+    def byte_offset(self, position):
+        """Returns the offset in the file of a position in the buffer, which must not be before the last position
+        asked for"""
+        self.offset += len(self.buffer[self.offset_position:position].encode("utf-8"))
+        self.offset_position = position
+        return self.offset
+
+    def expect(self, character):
+        """Consumes a structural character, raising an error if a different character comes next"""
+        if not self.consume(character):
+            raise json.JSONDecodeError("Expecting '" + character + "'", self.buffer, self.position)
+
+    def consume(self, character):
+        """Consumes a structural character if it comes next and returns whether it did"""
+        self.skip_whitespace()
+        if self.position < len(self.buffer) and self.buffer[self.position] == character:
+            self.position += 1
+            return True
+        return False
+
+    def skip_whitespace(self):
+        """Moves past whitespace, reading more of the file if the buffer runs out"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\n\r":
+                self.position += 1
+            if self.position < len(self.buffer) or not self.read_chunk():
+                return
+
+    def read_chunk(self):
+        """Appends the next chunk of the file to the buffer and returns whether anything was read"""
+        if self.end_of_file:
+            return False
+        data = self.file.read(self.chunk_size)
+        self.bytes_read += len(data)
+        if not data:
+            self.end_of_file = True
+        text = self.text_decoder.decode(data, final=not data)
+
+        # Discard the part of the buffer that has already been parsed
+        if self.track_offsets:
+            self.byte_offset(self.position)
+            self.offset_position = 0
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return bool(data)
+
+
+def read_encoding(encoding, profile):
+    """Returns the value codes for a catalog file's "Encoding" section, given the profile that comes before it"""
+    if encoding != VALUE_CODES or not isinstance(profile, dict):
+        raise ValueError("The catalog file's encoding can't be read.")
+    return ValueCodes(profile)
+
+
+def is_value_coded_catalog(file_name):
+    """Returns whether a json catalog file stores categories and Dropdown values as codes, reading only the sections
+    before its items"""
+    try:
+        with open(file_name, "rb") as file:
+            reader = CatalogReader(file, chunk_size=1 << 16)
+            for entry_type, name, value in reader.entries():
+                if entry_type == "item":
+                    break
+            return reader.value_codes is not None
+    except (OSError, ValueError):
+        return False
+
+
+def write_catalog(catalog, file, item_ranges=None, value_codes=False):
+    """Writes a catalog as json one item at a time, so its items never have to be gathered into a single dict
+
+    Returns the byte range of the profile in the file, and fills in item_ranges, if it's given, with the byte range
+    of each item. The json is written escaped to ascii, so its length in characters is its length in bytes. With
+    value_codes, items are written with their category and Dropdown values as codes into the profile's lists.
+    """
+    profile = json.dumps(catalog["Profile"])
+    sections = '{"Profile": ' + profile + ', '
+    if value_codes:
+        sections += '"Encoding": ' + json.dumps(VALUE_CODES) + ', '
+        encoder = ValueCodes(catalog["Profile"])
+    file.write(sections + '"Data": {')
+    profile_range = (12, 12 + len(profile))
+    offset = len(sections) + 9
+    separator = ""
+    for key, item in catalog["Data"].items():
+        key_text = separator + json.dumps(key) + ": "
+        item_text = json.dumps(encoder.encode_item(item) if value_codes else item)
+        file.write(key_text + item_text)
+        if item_ranges is not None:
+            item_ranges[key] = (offset + len(key_text), offset + len(key_text) + len(item_text))
+        offset += len(key_text) + len(item_text)
+        separator = ", "
+    file.write("}}")
+    return profile_range
+
+
+def write_atomically(file_name, write, mode="w"):
+    """Writes a file through a temporary file that replaces it only once it's completely on disk, so an interrupted
+    write never leaves a partially written file behind"""
+    temp_file_name = file_name + ".tmp"
+    try:
+        with open(temp_file_name, mode) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file_name, file_name)
+    except BaseException:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+
+    # Make the rename itself durable on platforms that allow syncing a directory
+    try:
+        directory = os.open(os.path.dirname(os.path.abspath(file_name)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory)
+    except OSError:
+        pass
+    finally:
+        os.close(directory)
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from PyQt5.QtGui import *
+
+# The templates the item details are built from
+IMAGE_TEMPLATE = "<br><br><br><table border='1' cellspacing='0' style='margin: 0px auto; text-align: center; " \
+                 "border-style: solid; border-color: #d8eeea;'><tr><td><img src='{}' /></td></tr></table>"
+FIELDS_START = "<br><br><table border='1' cellspacing='3' style='margin: 0px auto; text-align: center; " \
+               "border-style: solid; border-color: #d8eeea;'>"
+FIELD_TEMPLATE = "<tr><td style='text-align: center; color: #247ba0; background-color: #d8eeea; " \
+                 "padding: 6px 30px 6px 30px;'><div style='text-decoration: underline;'>{}</div><br>{}</td></tr>"
+FIELDS_END = "</table>"
+
+
+class DetailsRenderer:
+    """Renders an item's details into a document for the item details area, keeping the most recently shown
+    documents so showing an item again doesn't render or parse anything"""
+
+    # The number of rendered documents kept
+    cache_size = 200
+
+    # Item labels that aren't displayed
+    hidden_labels = ["Category", "Date Entered", "Image Path"]
+
+    def __init__(self, text_edit):
+        # Initialize widget variables
+        self.text_edit = text_edit
+
+        # Initialize document variables. The text edit doesn't own the documents it shows, so the displayed document
+        # is kept alive here even after it leaves the cache.
+        self.documents = OrderedDict()
+        self.message_documents = {}
+        self.displayed_document = None
+
+    def show_item(self, key, item):
+        """Shows an item's details in the text edit, rendering them only if they aren't cached"""
+        if key in self.documents:
+            self.documents.move_to_end(key)
+        else:
+            self.documents[key] = self.new_document(self.render(item))
+        self.display(self.documents[key])
+        if len(self.documents) > self.cache_size:
+            self.documents.popitem(last=False)
+
+    def show_message(self, html):
+        """Shows a message in the text edit instead of an item's details"""
+        if html not in self.message_documents:
+            self.message_documents[html] = self.new_document(html)
+        self.display(self.message_documents[html])
+
+    def display(self, document):
+        """Shows a document in the text edit, in the text edit's current font"""
+        if document.defaultFont() != self.text_edit.font():
+            document.setDefaultFont(self.text_edit.font())
+        self.text_edit.setDocument(document)
+        self.displayed_document = document
+
+    def render(self, item):
+        """Returns the html for an item's image and fields"""
+        parts = []
+
+        # Display the item's image
+        if "Image Path" in item:
+            parts.append(IMAGE_TEMPLATE.format(item["Image Path"]))
+
+        # Display the item's fields, with only labels that have data associated with them
+        parts.append(FIELDS_START)
+        for label, value in item.items():
+            if label not in self.hidden_labels and value:
+                # If a label's associated data is in a list, display a comma separated string of that data
+                parts.append(FIELD_TEMPLATE.format(label, ", ".join(value) if isinstance(value, list) else value))
+        parts.append(FIELDS_END)
+        return "".join(parts)
+
+    def new_document(self, html):
+        """Parses html into a document that looks like the text edit's own"""
+        document = QTextDocument()
+        document.setDefaultFont(self.text_edit.font())
+        document.setHtml(html)
+        return document
+
+    def invalidate(self, key):
+        """Forgets the document for an item that has changed or been removed"""
+        self.documents.pop(key, None)
+
+    def clear(self, *args):
+        """Forgets every document, after a different catalog has been loaded"""
+        self.documents.clear()
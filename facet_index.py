@@ -0,0 +1,214 @@
+class FacetIndex:
+    """An index from each category, and each value of the categories' Dropdown fields, to the items that have it
+
+    Items are numbered in the order they're stored in the catalog, and each value keeps the set of its items' numbers,
+    so the items matching any combination of values, and the number of items with each value, are found by
+    intersecting sets instead of reading the items.
+    """
+
+    def __init__(self):
+        # Initialize catalog variables
+        self.catalog = {"Profile": {}, "Data": {}}
+        self.data = {}
+        self.profile = {}
+
+        # Initialize facet variables, with the Dropdown fields of each category by category name
+        self.dropdown_labels = {}
+        self.labels = []
+
+        # Initialize index variables, which are only built once the index is first used
+        self.built = False
+        self.rows = {}
+        self.row_keys = []
+        self.row_values = []
+        self.postings = {}
+
+    def build(self, catalog):
+        """Forgets the items of the previous catalog, indexing a newly loaded catalog's items once they're first
+        filtered, so opening a catalog that's never filtered doesn't require indexing it"""
+        self.catalog = catalog
+        self.data = catalog["Data"]
+        self.clear()
+
+    def clear(self):
+        """Forgets every indexed item, so they're indexed again when the index is next used"""
+        self.built = False
+        self.rows = {}
+        self.row_keys = []
+        self.row_values = []
+        self.postings = {}
+
+    def update_profile(self, *args):
+        """Indexes the items again after categories or fields have changed, as their values may no longer be facets"""
+        if self.built:
+            self.clear()
+
+    def index_all(self):
+        """Indexes every item in the catalog, reading only the category and Dropdown values of catalogs stored by
+        column"""
+        self.read_profile()
+        self.postings = {label: {} for label in self.labels}
+        self.row_keys = list(self.data)
+        self.rows = {key: row for row, key in enumerate(self.row_keys)}
+        self.row_values = [[] for key in self.row_keys]
+        self.built = True
+
+        category_label_values = getattr(self.data, "category_label_values", None)
+        if category_label_values is None:
+            for key, item in self.data.items():
+                self.index_item(self.rows[key], item)
+            return
+        label_values = [("Category", self.data.label_values("Category"))]
+        for category, labels in self.dropdown_labels.items():
+            label_values.extend((label, category_label_values(category, label)) for label in labels)
+
+        # Text values, which nearly every value is, are indexed inline, as every item's values are indexed
+        rows = self.rows
+        row_values = self.row_values
+        for label, values in label_values:
+            postings = self.postings[label]
+            for key, value in values:
+                if type(value) is str:
+                    row = rows[key]
+                    value_rows = postings.get(value)
+                    if value_rows is None:
+                        value_rows = postings[value] = set()
+                    value_rows.add(row)
+                    row_values[row].append((label, value))
+                else:
+                    self.index_value(rows[key], label, value)
+
+    def read_profile(self):
+        """Reads the Dropdown fields of each category from the catalog's current profile"""
+        self.profile = self.catalog["Profile"]
+        self.dropdown_labels = {}
+        self.labels = ["Category"]
+        for category in self.profile.get("Category Names", {}).values():
+            fields = self.profile.get("Category Fields", {}).get(category, {})
+            labels = [fields[position][0] for position in sorted(fields, key=int)
+                      if fields[position][1] == "Dropdown"]
+            if labels:
+                self.dropdown_labels[category] = labels
+            self.labels.extend(label for label in labels if label not in self.labels)
+
+    def use(self):
+        """Indexes the catalog's items if they haven't been indexed since it was loaded or its profile changed"""
+        if not self.built:
+            self.index_all()
+
+    def add_item(self, key):
+        """Indexes an item that was inserted into the catalog"""
+        self.add_items([key])
+
+    def add_items(self, keys):
+        """Indexes a batch of items that were inserted into the catalog"""
+        if not self.built:
+            return
+        for key in keys:
+            row = len(self.row_keys)
+            self.rows[key] = row
+            self.row_keys.append(key)
+            self.row_values.append([])
+            self.index_item(row, self.data[key])
+
+    def remove_item(self, key):
+        """Removes an item that was deleted from the catalog from the index"""
+        if key not in self.rows:
+            return
+        row = self.rows.pop(key)
+        self.row_keys[row] = None
+        self.unindex_row(row)
+
+    def update_item(self, key):
+        """Re-indexes an item whose values may have changed, keeping its place in the catalog's order"""
+        if key not in self.rows:
+            return
+        row = self.rows[key]
+        self.unindex_row(row)
+        self.index_item(row, self.data[key])
+
+    def index_item(self, row, item):
+        """Adds an item's category and Dropdown values to the index"""
+        category = item.get("Category")
+        self.index_value(row, "Category", category)
+        for label in self.dropdown_labels.get(category, []) if isinstance(category, str) else []:
+            self.index_value(row, label, item.get(label))
+
+    def index_value(self, row, label, value):
+        """Adds one of an item's values to the index, along with each text of fields that have multiple inputs, and
+        remembers it as one of the item's values"""
+        if isinstance(value, str):
+            self.postings[label].setdefault(value, set()).add(row)
+            self.row_values[row].append((label, value))
+        elif isinstance(value, list):
+            for text in value:
+                if isinstance(text, str):
+                    self.postings[label].setdefault(text, set()).add(row)
+                    self.row_values[row].append((label, text))
+
+    def unindex_row(self, row):
+        """Removes an item from the values it's indexed under"""
+        for label, value in self.row_values[row]:
+            rows = self.postings[label].get(value)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self.postings[label][value]
+        self.row_values[row] = []
+
+    def facet_values(self, label):
+        """Returns the values of a facet that some item has, in the order the profile lists them"""
+        self.use()
+        values = self.postings.get(label, {})
+        if label == "Category":
+            listed = list(self.profile.get("Category Names", {}).values())
+        else:
+            listed = []
+            for category, labels in self.dropdown_labels.items():
+                if label not in labels:
+                    continue
+                for field in self.profile["Category Fields"][category].values():
+                    if field[0] == label and isinstance(field[2], list):
+                        listed.extend(field[2])
+        ordered = list(dict.fromkeys(value for value in listed if value in values))
+        return ordered + sorted(set(values).difference(ordered))
+
+    def matching_rows(self, selections, ignored_label=None):
+        """Returns the numbers of the items that have one of the selected values of every facet in a dict from facet
+        labels to selected values, or None if nothing is selected
+
+        A facet's selected values widen its matches, and each facet with a selection narrows the matches down.
+        """
+        self.use()
+        facet_rows = []
+        for label, values in selections.items():
+            if label == ignored_label or not values:
+                continue
+            postings = self.postings.get(label, {})
+            facet_rows.append(set().union(*[postings.get(value, ()) for value in values]))
+        if not facet_rows:
+            return None
+        facet_rows.sort(key=len)
+        return facet_rows[0].intersection(*facet_rows[1:])
+
+    def ordered_keys(self, rows):
+        """Returns the keys of the items with some numbers, newest first"""
+        return [self.row_keys[row] for row in sorted(rows, reverse=True)]
+
+    def counts(self, selections):
+        """Returns a dict from each facet label to the number of matching items with each of its values, in the order
+        the profile lists them
+
+        A facet's counts take every selection except its own into account, so they give the number of items each
+        value would add to its facet's matches.
+        """
+        self.use()
+        counts = {}
+        for label in self.labels:
+            rows = self.matching_rows(selections, label)
+            values = self.postings.get(label, {})
+            if rows is None:
+                counts[label] = {value: len(values[value]) for value in self.facet_values(label)}
+            else:
+                counts[label] = {value: len(values[value] & rows) for value in self.facet_values(label)}
+        return counts
@@ -0,0 +1,80 @@
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from PyQt5.QtWidgets import *
+
+
+class FacetPanel(QTreeWidget):
+    """A tree of the catalog's categories and Dropdown values, with the number of matching items beside each value,
+    whose checked values narrow the list of catalog items down"""
+
+    # Emitted when a value is checked or unchecked
+    selections_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setColumnCount(1)
+        self.itemChanged.connect(self.facet_checked)
+
+        # Initialize facet variables, with the facets whose values are hidden
+        self.collapsed_labels = set()
+
+    def selections(self):
+        """Returns a dict from each facet with a checked value to its checked values"""
+        selections = {}
+        for facet_row in range(self.topLevelItemCount()):
+            facet = self.topLevelItem(facet_row)
+            values = {facet.child(row).data(0, Qt.UserRole) for row in range(facet.childCount())
+                      if facet.child(row).checkState(0) == Qt.Checked}
+            if values:
+                selections[facet.data(0, Qt.UserRole)] = values
+        return selections
+
+    def show_counts(self, counts):
+        """Lists the values of each facet with their counts, given a dict from facets to dicts from values to counts,
+        keeping the values that were checked checked
+
+        Values that are no longer in the catalog are unchecked, which changes the selections.
+        """
+        selections = self.selections()
+        for facet_row in range(self.topLevelItemCount()):
+            facet = self.topLevelItem(facet_row)
+            if not facet.isExpanded():
+                self.collapsed_labels.add(facet.data(0, Qt.UserRole))
+            else:
+                self.collapsed_labels.discard(facet.data(0, Qt.UserRole))
+        scroll_position = self.verticalScrollBar().value()
+
+        self.blockSignals(True)
+        self.clear()
+        for label, value_counts in counts.items():
+            if not value_counts:
+                continue
+            facet = QTreeWidgetItem(self, [label])
+            facet.setData(0, Qt.UserRole, label)
+            facet.setFlags(Qt.ItemIsEnabled)
+            for value, count in value_counts.items():
+                item = QTreeWidgetItem(facet, ["{} ({})".format(value, count)])
+                item.setData(0, Qt.UserRole, value)
+                item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
+                item.setCheckState(0, Qt.Checked if value in selections.get(label, ()) else Qt.Unchecked)
+            facet.setExpanded(label not in self.collapsed_labels)
+        self.blockSignals(False)
+        self.verticalScrollBar().setValue(scroll_position)
+
+        if self.selections() != selections:
+            self.selections_changed.emit()
+
+    def clear_selections(self):
+        """Unchecks every value"""
+        self.blockSignals(True)
+        for facet_row in range(self.topLevelItemCount()):
+            facet = self.topLevelItem(facet_row)
+            for row in range(facet.childCount()):
+                facet.child(row).setCheckState(0, Qt.Unchecked)
+        self.blockSignals(False)
+
+    def facet_checked(self, item, column):
+        """Announces that a value was checked or unchecked"""
+        if item.parent() is not None:
+            self.selections_changed.emit()
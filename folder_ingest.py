@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from image_pipeline import *
+from item_values import *
+from PyQt5.QtCore import *
+from PIL import Image, ExifTags
+
+# The file name extensions of the images that are ingested from a folder
+INGEST_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FolderIngest(QThread):
+    """Stores the images in a folder and reads their metadata in a pool of worker processes"""
+
+    progress_changed = pyqtSignal(int)
+
+    # The number of images handed to a worker process at a time
+    chunk_size = 8
+
+    def __init__(self, folder, category, parent=None):
+        super().__init__(parent)
+
+        # Initialize folder variables
+        self.folder = folder
+        self.category = category
+
+        # Initialize ingest variables, where each result is an image's (original path, stored path, metadata, error)
+        self.results = []
+        self.error = ""
+        self.cancelled = False
+
+    def run(self):
+        """Ingests every image in the folder, stopping early if the ingest is cancelled or fails"""
+        try:
+            self.ingest_images()
+        except (OSError, BrokenProcessPool) as error:
+            self.error = str(error)
+
+    def ingest_images(self):
+        """Hands the folder's images to the worker processes in chunks
+
+        The images that worker processes were already storing when the ingest was cancelled are still stored, so
+        their results are kept along with the rest, and their items are added like those of any finished image.
+        """
+        image_paths = sorted(os.path.join(self.folder, file_name) for file_name in os.listdir(self.folder)
+                             if file_name.lower().endswith(INGEST_EXTENSIONS))
+        if not image_paths:
+            return
+        executor = ProcessPoolExecutor()
+        try:
+            results = executor.map(ingest_image, image_paths, chunksize=self.chunk_size)
+            for result in results:
+                self.results.append(result)
+                if self.cancelled:
+                    break
+                self.progress_changed.emit(int(len(self.results) * 100 / len(image_paths)))
+            if self.cancelled:
+                # Results come in order, so the images that were never started come after every stored image
+                executor.shutdown(cancel_futures=True)
+                try:
+                    self.results.extend(results)
+                except CancelledError:
+                    pass
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def cancel(self):
+        """Asks the worker to stop ingesting images"""
+        self.cancelled = True
+
+
+def ingest_image(original_path):
+    """Stores an image and reads its metadata in a worker process, returning the error instead of raising it"""
+    try:
+        with Image.open(original_path) as image:
+            metadata = read_metadata(image)
+        return original_path, store_image(original_path), metadata, ""
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        return original_path, "", {}, str(error)
+
+
+def read_metadata(image):
+    """Returns an image's EXIF tags as a dict of tag names and text values"""
+    exif = image.getexif()
+    tags = dict(exif)
+    # The date a photo was taken and the camera settings are kept in a separate EXIF directory
+    tags.update(exif.get_ifd(0x8769))
+
+    metadata = {}
+    for tag, value in tags.items():
+        if tag in ExifTags.TAGS and isinstance(value, (str, int, float)):
+            value = str(value).strip("\x00 ")
+            if value:
+                metadata[ExifTags.TAGS[tag]] = value
+    return metadata
+
+
+def item_from_image(category, category_fields, date_entered, original_path, image_path, metadata):
+    """Creates an item for an ingested image, filling in the category's fields from the image's metadata
+
+    A field is filled from the EXIF tag with the same name, ignoring case and spaces, so a "Date Time Original" field
+    gets the date the photo was taken. The category's first field is filled from the file name if no tag matches it.
+    Text values are split at commas and Dropdown fields keep only values from their list, and otherwise start at their
+    first item, as in AddItem.
+    """
+    tag_values = {tag.lower(): value for tag, value in metadata.items()}
+    item = {}
+    for key in sorted(category_fields, key=int):
+        field_name, field_type, field_items = category_fields[key]
+        value = tag_values.get(field_name.replace(" ", "").lower(), "")
+        if not value and key == "0":
+            value = os.path.splitext(os.path.basename(original_path))[0]
+        if field_type != "Dropdown":
+            value = split_values(value)
+        elif value not in field_items:
+            value = field_items[0] if field_items else ""
+        item[field_name] = value
+    item["Category"] = category
+    item["Date Entered"] = date_entered
+    item["Image Path"] = image_path
+    return item
@@ -0,0 +1,43 @@
+from operation_timing import *
+from PyQt5.QtGui import *
+
+
+class IconCache:
+    """Decodes each icon image once per session and finds category icons without scanning the profile"""
+
+    def __init__(self):
+        # Initialize index variables
+        self.category_icon_paths = {}
+
+        # Initialize icon variables
+        self.icons = {}
+
+    def set_profile(self, profile):
+        """Rebuilds the index from category names to icon paths"""
+        self.category_icon_paths = {}
+        for key, category in profile["Category Names"].items():
+            if key in profile["Icon Paths"]:
+                self.category_icon_paths[category] = profile["Icon Paths"][key]
+
+    def category_icon(self, category):
+        """Returns the icon for a category, or an empty icon if the category doesn't have one"""
+        return self.icon(self.category_icon_paths.get(category, ""))
+
+    def icon(self, icon_path):
+        """Returns the icon stored at a path, decoding the image only the first time it's requested"""
+        if icon_path not in self.icons:
+            decode_start = operation_timing.start()
+            icon = QIcon()
+            icon.addPixmap(QPixmap(icon_path), QIcon.Normal)
+            self.icons[icon_path] = icon
+            operation_timing.finish("Icon Decode", decode_start)
+        return self.icons[icon_path]
+
+    def invalidate(self, icon_path):
+        """Discards the decoded icon for a path after the image file has changed"""
+        if icon_path in self.icons:
+            del self.icons[icon_path]
+
+
+# The icon cache shared by the main window and the dialogs that change category icons
+icon_cache = IconCache()
@@ -0,0 +1,87 @@
+import os
+import hashlib
+import threading
+from operation_timing import *
+from PyQt5.QtCore import *
+
+# The folder that item images are stored in, named by the hash of their original file's contents
+ITEM_IMAGE_FOLDER = "images/item-images"
+
+# The largest width and height of a stored item image
+ITEM_IMAGE_SIZE = (150, 150)
+
+
+class ImageJob(QRunnable):
+    """Stores a resized copy of an image for an item on a worker thread"""
+
+    def __init__(self, key, original_path, pipeline):
+        super().__init__()
+
+        # Initialize job variables
+        self.key = key
+        self.original_path = original_path
+        self.pipeline = pipeline
+
+    def run(self):
+        """Stores the image, unless an image with the same contents is already stored, and reports its path"""
+        from PIL import Image
+
+        try:
+            image_path = store_image(self.original_path)
+        except (OSError, ValueError, Image.DecompressionBombError) as error:
+            self.pipeline.image_failed.emit(self.key, str(error))
+            return
+        self.pipeline.image_stored.emit(self.key, image_path)
+
+
+class ImagePipeline(QObject):
+    """Resizes and stores item images on a pool of worker threads, reporting each stored image's path when it's ready"""
+
+    image_stored = pyqtSignal(str, str)
+    image_failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Initialize worker variables
+        self.thread_pool = QThreadPool(self)
+
+    def add_image(self, key, original_path):
+        """Queues an image to be stored for the item with a key"""
+        self.thread_pool.start(ImageJob(key, original_path, self))
+
+    def wait_for_done(self):
+        """Blocks until every queued image has been stored and its result has been reported"""
+        self.thread_pool.waitForDone()
+        QCoreApplication.sendPostedEvents()
+
+
+@operation_timing.timed("Image Save")
+def store_image(original_path):
+    """Stores a resized JPEG copy of an image under the hash of the image's contents and returns its path
+
+    Identical images share one stored file. Large JPEGs are decoded at a reduced scale, which is much faster than
+    decoding them at full size only to shrink them. PIL is imported here, when the first image is stored, as it
+    takes a noticeable part of the program's startup time.
+    """
+    from PIL import Image
+
+    content_hash = hashlib.sha256()
+    with open(original_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            content_hash.update(chunk)
+    image_path = ITEM_IMAGE_FOLDER + "/" + content_hash.hexdigest() + ".jpg"
+    if os.path.exists(image_path):
+        return image_path
+
+    with Image.open(original_path) as image:
+        image.draft("RGB", ITEM_IMAGE_SIZE)
+        image = image.convert("RGB")
+        image.thumbnail(ITEM_IMAGE_SIZE, Image.LANCZOS)
+
+        # Write through a temporary file so a job storing the same image never sees a partially written file
+        os.makedirs(ITEM_IMAGE_FOLDER, exist_ok=True)
+        temp_path = image_path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+        image.save(temp_path, "JPEG", quality=90)
+        os.replace(temp_path, image_path)
+    return image_path
@@ -0,0 +1,122 @@
+import time
+
+
+class ItemIds:
+    """Hands out the keys items are stored under in a catalog's "Data" section
+
+    An item's key is the time it was added, in microseconds, as a string of digits. Keys handed out by one generator
+    always increase, even when many items are added within the same microsecond or the clock is turned back, and a
+    key is never one that the catalog already has.
+    """
+
+    def __init__(self):
+        # Initialize id variables
+        self.last_id = 0
+
+    def new_key(self, data):
+        """Returns a key for an item being added to a catalog's items"""
+        return self.new_keys(data, 1)[0]
+
+    def new_keys(self, data, count):
+        """Returns keys for a batch of items being added to a catalog's items, in the order they're added"""
+        keys = []
+        next_id = max(self.last_id + 1, time.time_ns() // 1000)
+        while len(keys) < count:
+            if str(next_id) not in data:
+                keys.append(str(next_id))
+            next_id += 1
+        self.last_id = next_id - 1
+        return keys
+
+
+def is_item_id(key):
+    """Returns whether a key was handed out by ItemIds, rather than being an older "Date Entered" key"""
+    return key.isascii() and key.isdigit()
+
+
+def migrate_item_keys(data, item_ids):
+    """Returns a dict from the older "Date Entered" keys of a catalog's items to the item ids that replace them, or None
+    if every item already has an id"""
+    old_keys = [key for key in data if not is_item_id(key)]
+    if not old_keys:
+        return None
+    return dict(zip(old_keys, item_ids.new_keys(data, len(old_keys))))
+
+
+class DateEnteredIndex:
+    """An index from the "Date Entered" values of catalog items to the keys of the items entered at that time"""
+
+    def __init__(self):
+        # Initialize catalog variables
+        self.data = {}
+
+        # Initialize index variables
+        self.built = True
+        self.keys_by_date = {}
+        self.item_dates = {}
+
+    def build(self, catalog):
+        """Forgets the index of the previous catalog, indexing a newly loaded catalog's items when the index is first
+        used, so loading and updating the catalog doesn't wait for indexing"""
+        self.data = catalog["Data"]
+        self.keys_by_date = {}
+        self.item_dates = {}
+        self.built = False
+
+    def index_all(self):
+        """Indexes every item in the catalog, reading only the "Date Entered" values of catalogs stored by column"""
+        label_values = getattr(self.data, "label_values", None)
+        if label_values is None:
+            for key, item in self.data.items():
+                self.index_item(key, item)
+            return
+        for key, date_entered in label_values("Date Entered", ""):
+            self.index_date(key, date_entered)
+
+    def add_item(self, key):
+        """Indexes an item that was inserted into the catalog"""
+        if self.built:
+            self.index_date(key, self.date_entered(key))
+
+    def add_items(self, keys):
+        """Indexes a batch of items that were inserted into the catalog"""
+        if self.built:
+            for key in keys:
+                self.index_date(key, self.date_entered(key))
+
+    def remove_item(self, key):
+        """Removes an item that was deleted from the catalog from the index"""
+        if key not in self.item_dates:
+            return
+        date_entered = self.item_dates.pop(key)
+        self.keys_by_date[date_entered].remove(key)
+        if not self.keys_by_date[date_entered]:
+            del self.keys_by_date[date_entered]
+
+    def update_item(self, key):
+        """Re-indexes an item whose "Date Entered" value may have changed"""
+        self.remove_item(key)
+        self.add_item(key)
+
+    def date_entered(self, key):
+        """Returns the "Date Entered" value of an item, reading only that value from catalogs stored by column"""
+        label_value = getattr(self.data, "label_value", None)
+        if label_value is not None:
+            return label_value(key, "Date Entered", "")
+        return self.data[key].get("Date Entered", "")
+
+    def index_item(self, key, item):
+        """Adds an item's "Date Entered" value to the index"""
+        self.index_date(key, item.get("Date Entered", ""))
+
+    def index_date(self, key, date_entered):
+        """Adds the "Date Entered" value of an item to the index"""
+        self.item_dates[key] = date_entered
+        self.keys_by_date.setdefault(date_entered, set()).add(key)
+
+    def keys_entered(self, date_entered):
+        """Returns the keys of the items entered at a "Date Entered" value"""
+        if not self.built:
+            self.index_all()
+            self.built = True
+        return set(self.keys_by_date.get(date_entered, ()))
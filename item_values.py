@@ -0,0 +1,32 @@
+import re
+
+# The pattern of the "Date Entered" values that format_date_entered writes
+DATE_ENTERED_PATTERN = re.compile(r"(\d+)\.(\d+)\.(\d+)-(\d+):(\d+):(\d+)")
+
+
+def split_values(text):
+    """Splits a comma separated field input into a list of values, or returns the input as it is if it has no commas"""
+    if "," not in text:
+        return text
+    values = text.split(",")
+
+    # If whitespace exists at the beginning of a value, remove it
+    for idx in range(len(values)):
+        if values[idx].startswith(" "):
+            values[idx] = values[idx][1:]
+    return values
+
+
+def format_date_entered(moment):
+    """Formats a date and time the way an item's "Date Entered" field stores it"""
+    return str(moment.month) + "." + str(moment.day) + "." + str(moment.year) + "-" + \
+        str(moment.hour) + ":" + str(moment.minute) + ":" + str(moment.second)
+
+
+def parse_date_entered(text):
+    """Returns the (year, month, day, hour, minute, second) of an item's "Date Entered" value, or None if it isn't one"""
+    match = DATE_ENTERED_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    month, day, year, hour, minute, second = map(int, match.groups())
+    return year, month, day, hour, minute, second
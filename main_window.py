@@ -1,14 +1,26 @@
+from startup_timing import *
 import sys
-import json
+import os
+import struct
+import sqlite3
 import datetime
-from manage_categories import *
-from manage_fields import *
-from select_category import *
-from add_item import *
+import multiprocessing
+from catalog_core import *
+from catalog_model import *
+from catalog_loader import *
+from catalog_saver import *
+from image_pipeline import *
+from details_renderer import *
+from facet_panel import *
+from timing_overlay import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+# The dialogs, and the modules that add many items at once, are imported when they're first used, as they import PIL
+# and their own modules, which would otherwise slow down startup
+startup_timing.mark("Imports")
+
 if hasattr(Qt, 'AA_EnableHighDpiScaling'):
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
 
@@ -16,16 +28,47 @@ if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
 class MainWindow(QMainWindow):
+    # The quiet period, in milliseconds, after the last change before the catalog is saved automatically. It can
+    # be set with the OMNILOG_AUTOSAVE_DELAY environment variable, and 0 turns automatic saves off.
+    autosave_delay = int(os.environ.get("OMNILOG_AUTOSAVE_DELAY", 3000))
+
+    # The size, in bytes, from which json catalogs are opened lazily, keeping only an index of their items in memory
+    # and reading an item from the file when it's displayed. It can be set with the OMNILOG_LAZY_OPEN_SIZE environment
+    # variable, and 0 turns lazy opening off.
+    lazy_open_size = int(os.environ.get("OMNILOG_LAZY_OPEN_SIZE", 256 * 1024 * 1024))
+
     def __init__(self):
         super().__init__()
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
 
-        # Initialize catalog variables
-        self.catalog = {"Profile": {"Category Names": {}, "Category Fields": {}, "Icon Paths": {}}, "Data": {}}
+        # Initialize the catalog, whose change notifications the views and caches subscribe to
+        self.catalog = Catalog()
+
+        # Initialize catalog loading variables
+        self.catalog_loader = None
+        self.load_progress = None
+        self.previous_catalog = None
+        self.previous_file = ""
+        self.previous_journal = None
+        self.previous_versions = (0, 0)
+        self.load_start = None
+
+        # Initialize save variables, where changes are saved automatically once the catalog has been left alone
+        self.catalog_saver = None
+        for event in [ITEM_INSERTED, ITEMS_INSERTED, ITEM_REMOVED, ITEM_UPDATED, CATEGORIES_CHANGED, FIELDS_CHANGED]:
+            self.catalog.events.subscribe(event, self.schedule_autosave)
 
-        # Initialize file variables
-        self.current_file = ""
+        # Initialize the pipeline that stores item images on worker threads
+        self.image_pipeline = ImagePipeline(self)
+        self.image_pipeline.image_stored.connect(self.set_item_image)
+        self.image_pipeline.image_failed.connect(self.show_image_error)
+
+        # Initialize the timer that saves a burst of changes once the catalog has been left alone
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(self.autosave_delay)
+        self.autosave_timer.timeout.connect(self.autosave)
 
         # Initialize window variables
         self.init_widgets()
@@ -33,8 +76,30 @@ class MainWindow(QMainWindow):
         self.init_layout()
         self.init_styles()
 
-        # Load the last catalog used from the previous session
-        self.load_last_catalog()
+        # Load the last catalog used from the previous session once the window has been shown
+        QTimer.singleShot(0, self.load_last_catalog)
+
+        # Initialize the hidden menu that records operation timings, which is opened with Ctrl+Shift+T, and the overlay
+        # that shows them
+        self.timing_overlay = TimingOverlay(self)
+        self.timing_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+        self.timing_shortcut.activated.connect(self.show_timing_menu)
+
+        # Time the first paint of the window when startup is being timed
+        if startup_timing.enabled():
+            self.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        """Records when the window is first painted, which happens while its first update request is handled"""
+        if watched is self and event.type() == QEvent.UpdateRequest:
+            self.removeEventFilter(self)
+            QTimer.singleShot(0, self.finish_startup_timing)
+        return super().eventFilter(watched, event)
+
+    def finish_startup_timing(self):
+        """Records the first paint of the window and reports the startup timings"""
+        startup_timing.mark("First Paint")
+        startup_timing.write_report()
 
     def init_window(self):
         """Initializes the window and its dimensions"""
@@ -60,7 +125,15 @@ class MainWindow(QMainWindow):
         for button in self.buttons:
             self.layouts["left_layout"].addWidget(self.buttons[button])
 
-        # Add the list of catalog items to the center layout
+        # Add the search bar, the facet panel, the sort controls and the list of catalog items to the center layout
+        self.layouts["center_layout"].addWidget(self.search_bar)
+        self.layouts["center_layout"].addWidget(self.facet_panel)
+        sort_layout = QHBoxLayout()
+        sort_layout.addWidget(self.sort_box)
+        sort_layout.addWidget(self.sort_order)
+        sort_layout.setContentsMargins(0, 0, 0, 0)
+        sort_layout.setSpacing(0)
+        self.layouts["center_layout"].addLayout(sort_layout)
         self.layouts["center_layout"].addWidget(self.catalog_items)
 
         # Add the item details area to the right layout
@@ -105,18 +178,76 @@ class MainWindow(QMainWindow):
             button_method = getattr(self, button)
             self.buttons[button].clicked.connect(button_method)
 
-        # Disable the "Search Catalog" and "Edit Item" buttons, as they aren't implemented
-        self.buttons["search_catalog"].setEnabled(False)
+        # Disable the "Edit Item" button, as it isn't implemented
         self.buttons["edit_item"].setEnabled(False)
 
-        # Initialize the list of catalog items
-        self.catalog_items = QListWidget(self)
-        self.catalog_items.setIconSize(QSize(30, 30))
-        self.catalog_items.itemClicked.connect(self.show_item_details)
+        # Initialize the search bar, which is hidden until the "Search Catalog" button is clicked
+        self.search_bar = QLineEdit(self)
+        self.search_bar.setPlaceholderText("Search catalog")
+        self.search_bar.setClearButtonEnabled(True)
+        self.search_bar.textChanged.connect(self.show_search_results)
+        self.search_bar.hide()
 
-        # Initialize the item details area
+        # Initialize the facet panel, which lists the categories and Dropdown values with their item counts and is shown
+        # along with the search bar, and keep its counts up to date
+        self.facet_panel = FacetPanel(self)
+        self.facet_panel.setMaximumHeight(160)
+        self.facet_panel.selections_changed.connect(self.show_search_results)
+        self.facet_panel.hide()
+        for event in [CATALOG_RESET, ITEM_INSERTED, ITEMS_INSERTED, ITEM_REMOVED, ITEM_UPDATED, CATEGORIES_CHANGED,
+                      FIELDS_CHANGED]:
+            self.catalog.events.subscribe(event, self.refresh_facets)
+
+        # Initialize the item details area and the renderer that caches each item's details, which must forget an
+        # item's details before the list shows the item again
         self.item_details = QTextEdit(self)
         self.item_details.setReadOnly(True)
+        self.details_renderer = DetailsRenderer(self.item_details)
+        self.catalog.events.subscribe(CATALOG_RESET, self.details_renderer.clear)
+        self.catalog.events.subscribe(ITEM_REMOVED, self.details_renderer.invalidate)
+        self.catalog.events.subscribe(ITEM_UPDATED, self.details_renderer.invalidate)
+
+        # Initialize the list of catalog items and the model that supplies its rows
+        self.catalog_model = CatalogModel(self)
+        self.catalog_items = QListView(self)
+        self.catalog_items.setModel(self.catalog_model)
+        self.catalog_items.setIconSize(QSize(30, 30))
+        self.catalog_items.setUniformItemSizes(True)
+        self.catalog_items.selectionModel().currentChanged.connect(self.show_item_details)
+        self.catalog.events.subscribe(CATALOG_RESET, self.catalog_model.set_catalog)
+        self.catalog.events.subscribe(ITEM_INSERTED, self.catalog_model.insert_item)
+        self.catalog.events.subscribe(ITEMS_INSERTED, self.catalog_model.insert_items)
+        self.catalog.events.subscribe(ITEM_REMOVED, self.catalog_model.remove_item)
+        self.catalog.events.subscribe(ITEM_UPDATED, self.catalog_model.update_item)
+        self.catalog.events.subscribe(CATEGORIES_CHANGED, self.catalog_model.update_profile)
+        self.catalog.events.subscribe(FIELDS_CHANGED, self.catalog_model.update_profile)
+        self.catalog.events.subscribe(CATALOG_RESET, self.refresh_search_results)
+        self.catalog.events.subscribe(ITEM_INSERTED, self.refresh_search_results)
+        self.catalog.events.subscribe(ITEMS_INSERTED, self.refresh_search_results)
+        self.catalog.events.subscribe(ITEM_UPDATED, self.refresh_search_results)
+
+        # Initialize the sort controls, which list the labels the items can be sorted by, and keep the labels up to
+        # date once the list has been refreshed
+        self.sort_box = QComboBox(self)
+        self.sort_box.addItem("Newest First")
+        self.sort_box.currentIndexChanged.connect(self.sort_catalog)
+        self.sort_order = QToolButton(self)
+        self.sort_order.setArrowType(Qt.UpArrow)
+        self.sort_order.setCheckable(True)
+        self.sort_order.setEnabled(False)
+        self.sort_order.setToolTip("Sort in descending order")
+        self.sort_order.toggled.connect(self.sort_catalog)
+        for event in [CATALOG_RESET, CATEGORIES_CHANGED, FIELDS_CHANGED]:
+            self.catalog.events.subscribe(event, self.refresh_sort_labels)
+
+        # Initialize the list's context menu, which holds the commands that add many items at once
+        add_items_from_folder = QAction("Add Items From Folder...", self.catalog_items)
+        add_items_from_folder.triggered.connect(self.add_items_from_folder)
+        self.catalog_items.addAction(add_items_from_folder)
+        import_rows = QAction("Import Rows From File...", self.catalog_items)
+        import_rows.triggered.connect(self.import_rows)
+        self.catalog_items.addAction(import_rows)
+        self.catalog_items.setContextMenuPolicy(Qt.ActionsContextMenu)
 
     def init_styles(self):
         """Sets the stylesheet properties for widgets"""
@@ -148,7 +279,7 @@ class MainWindow(QMainWindow):
             }
         """)
         self.catalog_items.setStyleSheet("""
-            .QListWidget {
+            .QListView {
                 background-color: #d8eeea;
                 color: #6d6d6d;
                 font-weight:bold;
@@ -156,10 +287,10 @@ class MainWindow(QMainWindow):
                 border: none;
                 outline: 0; /* Removes the dotted outline around selected catalog items */
             }
-            .QListWidget::Item:hover{
+            .QListView::Item:hover{
                 background-color: #C5D7D3;
             }
-            .QListWidget::Item:selected {
+            .QListView::Item:selected {
                 background-color: #C5D7D3;
                 color: #FFFFFF;
             }
@@ -201,9 +332,40 @@ class MainWindow(QMainWindow):
         """)
         self.catalog_items.verticalScrollBar().setStyleSheet(scrollbar_stylesheet)
         self.item_details.verticalScrollBar().setStyleSheet(scrollbar_stylesheet)
+        self.facet_panel.verticalScrollBar().setStyleSheet(scrollbar_stylesheet)
+
+        self.search_bar.setStyleSheet("""
+            .QLineEdit {
+                background-color: #f3ffbd;
+                color: #247ba0;
+                font-weight: bold;
+                font-size: 13px;
+                border: none;
+                padding: 8px;
+            }
+        """)
+        self.sort_box.setStyleSheet("""
+            .QComboBox {
+                background-color: #d8eeea;
+                color: #247ba0;
+                font-weight: bold;
+                font-size: 12px;
+                border: none;
+                padding: 4px;
+            }
+        """)
+        self.facet_panel.setStyleSheet("""
+            .FacetPanel {
+                background-color: #f3ffbd;
+                color: #247ba0;
+                font-weight: bold;
+                font-size: 12px;
+                border: none;
+                outline: 0;
+            }
+        """)
 
         # Gray out the disabled buttons
-        self.buttons["search_catalog"].setStyleSheet(""".QPushButton {background-color: #84888E;}""")
         self.buttons["edit_item"].setStyleSheet(""".QPushButton {background-color: #84888E;}""")
 
     def center_window(self):
@@ -217,94 +379,548 @@ class MainWindow(QMainWindow):
         """Opens a json file and loads catalog data into the program"""
         file_name = QFileDialog.getOpenFileName(self, "Open File")
         if file_name[0]:
-            self.current_file = file_name[0]
-            file = open(file_name[0], "r")
-            self.catalog = json.load(file)
-            self.update_catalog()
+            self.load_catalog(file_name[0])
+
+    def load_catalog(self, file_name, show_progress=True):
+        """Loads a catalog file on a worker thread, filling in the list of catalog items as they are read"""
+        if self.catalog_loader is not None and self.catalog_loader.isRunning():
+            self.cancel_catalog_load()
+
+        # Finish writing the current catalog's images and changes before it's replaced, saving the changes that were
+        # still waiting for the autosave delay
+        self.image_pipeline.wait_for_done()
+        self.autosave_timer.stop()
+        if self.autosave_enabled() and self.catalog.is_dirty():
+            self.start_save(show_confirmation=False)
+        self.wait_for_save()
+
+        # SQLite and binary catalogs only read their items when they're displayed, so they're opened right away
+        if is_sqlite_catalog(file_name) or is_binary_catalog(file_name):
+            self.open_catalog(file_name)
+            return
+
+        # Keep the current catalog so it can be restored if the load is cancelled or fails
+        self.load_start = operation_timing.start()
+        self.previous_catalog = self.catalog.sections
+        self.previous_file = self.catalog.file_name
+        self.previous_journal = self.catalog.journal
+        self.previous_versions = (self.catalog.version, self.catalog.saved_version)
+        self.catalog.set_journal(None)
+        self.catalog.sections = new_sections()
+        self.update_catalog()
+
+        lazy = 0 < self.lazy_open_size <= (os.path.getsize(file_name) if os.path.exists(file_name) else 0)
+        self.catalog_loader = CatalogLoader(file_name, lazy, self)
+        self.catalog_loader.profile_loaded.connect(self.load_profile)
+        self.catalog_loader.items_loaded.connect(self.load_items)
+        self.catalog_loader.index_loaded.connect(self.load_index)
+        self.catalog_loader.journal_loaded.connect(self.load_journal)
+        self.catalog_loader.loading_failed.connect(self.catalog_load_failed)
+        self.catalog_loader.finished.connect(self.catalog_load_finished)
+
+        # Show the progress of the load, which the user can cancel
+        if show_progress:
+            self.load_progress = QProgressDialog("Importing catalog...", "Cancel", 0, 100, self)
+            self.load_progress.setWindowTitle("Import Catalog")
+            self.load_progress.setWindowModality(Qt.WindowModal)
+            self.load_progress.setMinimumDuration(500)
+            self.load_progress.setAutoClose(False)
+            self.load_progress.setAutoReset(False)
+            self.load_progress.canceled.connect(self.cancel_catalog_load)
+            self.catalog_loader.progress_changed.connect(self.load_progress.setValue)
+
+        self.set_loading_state(True)
+        self.catalog_loader.start()
+
+    def open_catalog(self, file_name):
+        """Opens a SQLite or binary catalog, reading only its profile and item keys until items are displayed"""
+        try:
+            self.catalog.load(file_name)
+        except (OSError, ValueError, struct.error, sqlite3.Error) as error:
+            self.show_load_error(str(error))
+            return
+        self.select_top_item()
+
+    def set_loading_state(self, loading):
+        """Disables the buttons that change the catalog while a catalog is loading"""
+        for button in self.buttons:
+            if button not in ["quit_program", "edit_item"]:
+                self.buttons[button].setEnabled(not loading)
+        if loading:
+            self.details_renderer.show_message("<br><br><div style='text-align: center; color: #f3ffbd;'>"
+                                               "Loading catalog...</div>")
+
+    def load_profile(self, profile):
+        """Applies the profile read by the catalog loader"""
+        if self.sender() is not self.catalog_loader or self.catalog_loader.cancelled:
+            return
+        self.catalog.set_profile(profile)
+
+    def load_items(self, items):
+        """Adds a batch of items read by the catalog loader to the catalog"""
+        if self.sender() is not self.catalog_loader or self.catalog_loader.cancelled:
+            return
+        self.catalog.insert_items(items)
+
+    def load_index(self, index):
+        """Makes the catalog read its items from the catalog file through the index read by the catalog loader"""
+        if self.sender() is not self.catalog_loader or self.catalog_loader.cancelled:
+            return
+        self.catalog["Data"] = IndexedItems(index)
+        self.update_catalog()
+
+    def load_journal(self, records):
+        """Applies a batch of the changes recorded in the catalog's journal, in the order they were made"""
+        if self.sender() is not self.catalog_loader or self.catalog_loader.cancelled:
+            return
+        self.catalog.apply_records(records)
+
+    def catalog_load_finished(self):
+        """Makes a completely loaded catalog the current catalog"""
+        if self.sender() is not self.catalog_loader or not self.catalog_loader.succeeded:
+            return
+        self.catalog.file_name = self.catalog_loader.file_name
+        self.catalog.set_journal(self.catalog.new_journal())
+        self.catalog.saved_version = self.catalog.version
+        close_items(self.previous_catalog["Data"])
+        self.previous_catalog = None
+        self.previous_journal = None
+        operation_timing.finish("Catalog Load", self.load_start)
+
+        # Give the items of catalogs from before item ids their own ids, which is saved like any other change
+        if self.catalog.migrate_keys():
+            self.schedule_autosave()
+
+        self.close_load_progress()
+        self.set_loading_state(False)
+
+        # Display the top item in the list of catalog items by default
+        self.select_top_item()
+        self.catalog_items.scrollToTop()
+
+    def catalog_load_failed(self, error):
+        """Restores the previous catalog after a catalog file couldn't be read"""
+        if self.sender() is not self.catalog_loader or self.catalog_loader.cancelled:
+            return
+        self.cancel_catalog_load()
+        self.show_load_error(error)
+
+    def show_load_error(self, error):
+        """Tells the user that a catalog couldn't be loaded"""
+        load_error = QMessageBox()
+        load_error.setIcon(QMessageBox.Warning)
+        load_error.setText("The catalog couldn't be loaded.")
+        load_error.setInformativeText(error)
+        load_error.setWindowTitle("Load Failed")
+        load_error.exec_()
+
+    def cancel_catalog_load(self):
+        """Stops loading a catalog and restores the catalog that was open before the load started"""
+        if self.previous_catalog is None:
+            return
+        self.catalog_loader.cancel()
+        self.catalog.sections = self.previous_catalog
+        self.catalog.file_name = self.previous_file
+        self.catalog.set_journal(self.previous_journal)
+        self.catalog.version, self.catalog.saved_version = self.previous_versions
+        self.previous_catalog = None
+        self.previous_journal = None
+        self.close_load_progress()
+        self.set_loading_state(False)
+        self.update_catalog()
+
+        # The restored catalog's changes that haven't been saved, such as those of a failed save, are saved again
+        if self.catalog.is_dirty():
+            self.schedule_autosave()
+
+    def stop_catalog_load(self):
+        """Cancels the catalog load in progress, if there is one, and waits for its worker thread to stop"""
+        if self.previous_catalog is None:
+            return
+        self.cancel_catalog_load()
+        self.catalog_loader.wait()
+
+    def close_load_progress(self):
+        """Closes the progress dialog of the current catalog load, if it has one"""
+        if self.load_progress is not None:
+            self.load_progress.close()
+            self.load_progress = None
 
     def export_catalog(self):
         """Creates a new, or overwrites an existing, json file with the content of the current catalog"""
         file_name = QFileDialog.getSaveFileName(self, "Save File")
-        if file_name[0]:
-            file = open(file_name[0], "w")
-            json.dump(self.catalog, file)
-            self.current_file = file_name[0]
+        if not file_name[0]:
+            return
+        if self.catalog.file_name and os.path.abspath(file_name[0]) == os.path.abspath(self.catalog.file_name):
+            self.save_catalog()
+        elif file_name[0].lower().endswith(SQLITE_EXTENSIONS + (BINARY_EXTENSION,)) or \
+                not isinstance(self.catalog["Data"], ColumnarItems):
+            # Convert the catalog to a SQLite database, a binary catalog or, for a catalog that reads its items from
+            # a database or mapped file, a json catalog, and continue working with the converted catalog
+            self.wait_for_save()
+            try:
+                self.catalog.export(file_name[0])
+            except (OSError, ValueError, sqlite3.Error) as error:
+                self.show_export_error(str(error))
+                return
+            self.load_catalog(file_name[0])
+        else:
+            # Start a new journal for the exported file, beginning with a complete snapshot of the catalog
+            self.wait_for_save()
+            self.catalog.set_file(file_name[0])
+            self.start_save(show_confirmation=False)
+
+    def show_export_error(self, error):
+        """Tells the user that the catalog couldn't be exported"""
+        export_error = QMessageBox()
+        export_error.setIcon(QMessageBox.Warning)
+        export_error.setText("The catalog couldn't be exported.")
+        export_error.setInformativeText(error)
+        export_error.setWindowTitle("Export Failed")
+        export_error.exec_()
 
     def save_catalog(self):
         """Saves changes from the current session to the file the catalog was imported from"""
-        if self.current_file:
-            file = open(self.current_file, "w")
-            json.dump(self.catalog, file)
-
-            confirm_save = QMessageBox()
-            confirm_save.setIcon(QMessageBox.Information)
-            confirm_save.setText("Your changes have been saved successfully.")
-            confirm_save.setWindowTitle("Save Successful")
-            confirm_save.exec_()
-        else:
+        if not self.catalog.file_name:
             self.export_catalog()
+        elif self.catalog.is_dirty():
+            self.start_save()
+        else:
+            no_changes = QMessageBox()
+            no_changes.setIcon(QMessageBox.Information)
+            no_changes.setText("There are no unsaved changes.")
+            no_changes.setWindowTitle("Save Catalog")
+            no_changes.exec_()
+
+    def start_save(self, show_confirmation=True):
+        """Takes a snapshot of the catalog's changes and writes it to disk on a worker thread"""
+        self.wait_for_save()
+
+        # A catalog that's partly loaded isn't saved, so the load is stopped and the catalog open before it is saved
+        self.stop_catalog_load()
+
+        save = self.catalog.prepare_save()
+        if save is None:
+            if show_confirmation:
+                self.confirm_save()
+            return
+
+        save_function, records = save
+        self.catalog_saver = CatalogSaver(save_function, self.catalog.version, show_confirmation, records, self)
+        self.catalog_saver.finished.connect(self.catalog_save_finished)
+        self.catalog_saver.start()
+
+    def catalog_save_finished(self):
+        """Records the result of a save once the worker thread has finished"""
+        self.finish_save(self.sender())
+
+    def wait_for_save(self):
+        """Blocks until the save in progress, if there is one, has finished"""
+        if self.catalog_saver is not None:
+            self.catalog_saver.wait()
+            self.finish_save(self.catalog_saver)
+
+    def finish_save(self, catalog_saver):
+        """Marks the saved changes as saved, or makes sure they're written by the next save if the save failed"""
+        if catalog_saver.handled:
+            return
+        catalog_saver.handled = True
+
+        self.catalog.finish_save(catalog_saver.saved_version, catalog_saver.succeeded, catalog_saver.records)
+        if catalog_saver.succeeded:
+            if catalog_saver.show_confirmation:
+                self.confirm_save()
+
+            # Save the changes made while this save was running
+            if self.catalog.is_dirty() and self.autosave_enabled() and not self.autosave_timer.isActive():
+                self.autosave_timer.start()
+        else:
+            save_error = QMessageBox()
+            save_error.setIcon(QMessageBox.Warning)
+            save_error.setText("Your changes couldn't be saved.")
+            save_error.setInformativeText(catalog_saver.error)
+            save_error.setWindowTitle("Save Failed")
+            save_error.exec_()
+
+    def confirm_save(self):
+        """Tells the user that their changes were saved"""
+        confirm_save = QMessageBox()
+        confirm_save.setIcon(QMessageBox.Information)
+        confirm_save.setText("Your changes have been saved successfully.")
+        confirm_save.setWindowTitle("Save Successful")
+        confirm_save.exec_()
+
+    def schedule_autosave(self, *args):
+        """Restarts the wait before the catalog's changes are saved automatically"""
+        if self.autosave_enabled():
+            self.autosave_timer.start()
+
+    def autosave_enabled(self):
+        """Returns whether changes to the current catalog are saved automatically"""
+        return self.autosave_delay > 0 and bool(self.catalog.file_name) and self.previous_catalog is None
+
+    def autosave(self):
+        """Saves the catalog in the background once changes have stopped for the autosave delay"""
+        if not self.autosave_enabled() or not self.catalog.is_dirty():
+            return
+        # Only one save runs at a time, and the changes are saved again once the running save finishes
+        if self.catalog_saver is not None and self.catalog_saver.isRunning():
+            return
+        self.start_save(show_confirmation=False)
 
     def search_catalog(self):
-        pass
+        """Shows or hides the search bar and the facet panel, which filter the list of catalog items as the user types
+        and checks values"""
+        if self.search_bar.isVisible():
+            self.search_bar.hide()
+            self.facet_panel.hide()
+            self.facet_panel.clear_selections()
+            self.search_bar.clear()
+            self.show_search_results()
+        else:
+            self.search_bar.show()
+            self.facet_panel.show()
+            self.refresh_facets()
+            self.search_bar.setFocus()
+
+    def show_search_results(self):
+        """Lists the catalog items matching the text in the search bar and the values checked in the facet panel, or
+        every item if there's neither"""
+        query = self.search_bar.text()
+        selections = self.facet_panel.selections()
+        if SearchIndex.tokenize(query) or selections:
+            self.catalog_model.show_results(self.catalog.query(query, facets=selections,
+                                                               sort_by=self.catalog_model.sort_label,
+                                                               descending=self.catalog_model.descending))
+        elif self.catalog_model.showing_results:
+            self.catalog_model.show_all()
+        else:
+            return
+        self.refresh_facets()
+
+        # Display the top item in the list of catalog items by default
+        self.select_top_item()
+
+    def sort_catalog(self, *args):
+        """Sorts the list of catalog items by the label chosen in the sort box, in the order chosen with the sort order
+        button, or lists the newest items first"""
+        label = self.sort_box.currentText() if self.sort_box.currentIndex() > 0 else None
+        self.sort_order.setEnabled(label is not None)
+        self.sort_order.setArrowType(Qt.DownArrow if self.sort_order.isChecked() else Qt.UpArrow)
+        self.catalog_model.set_sort(self.catalog.sort_index, label, self.sort_order.isChecked())
+        if self.catalog_model.showing_results:
+            self.show_search_results()
+        else:
+            self.select_top_item()
+
+    def refresh_sort_labels(self, *args):
+        """Lists the labels the catalog's items can be sorted by in the sort box, keeping the chosen label if the items
+        can still be sorted by it"""
+        labels = ["Newest First"] + self.catalog.sort_labels()
+        if labels == [self.sort_box.itemText(index) for index in range(self.sort_box.count())]:
+            return
+        label = self.sort_box.currentText()
+        self.sort_box.blockSignals(True)
+        self.sort_box.clear()
+        self.sort_box.addItems(labels)
+        self.sort_box.setCurrentIndex(labels.index(label) if label in labels else 0)
+        self.sort_box.blockSignals(False)
+        if label not in labels:
+            self.sort_catalog()
+
+    def refresh_facets(self, *args):
+        """Updates the item counts of the facet panel's values while it's shown"""
+        if self.facet_panel.isVisible():
+            self.facet_panel.show_counts(self.catalog.facet_counts(self.facet_panel.selections()))
+
+    def refresh_search_results(self, *args):
+        """Repeats the current search after the catalog has changed, keeping the selected item if it still matches"""
+        if self.catalog_model.showing_results or SearchIndex.tokenize(self.search_bar.text()):
+            current_key = self.catalog_items.currentIndex().data(Qt.UserRole)
+            self.show_search_results()
+            row = self.catalog_model.key_row(current_key)
+            if row is not None and row < self.catalog_model.rowCount():
+                self.catalog_items.setCurrentIndex(self.catalog_model.index(row))
 
     def update_catalog(self):
         """Updates the catalog with the current set of items"""
-        self.catalog_items.clear()
-        for key, data in reversed(list(self.catalog["Data"].items())):
-            field_category = data["Category"]
-            field_id = self.catalog["Profile"]["Category Fields"][field_category]["0"][0]
-            catalog_item = QListWidgetItem(data[field_id])
-            catalog_item.setData(Qt.UserRole, data)
-            catalog_item.setSizeHint(QSize(35, 35))
-
-            # Find the icon address for the item's category
-            icon_address = ""
-            for key, value in self.catalog["Profile"]["Category Names"].items():
-                if value == field_category:
-                    if key in self.catalog["Profile"]["Icon Paths"]:
-                        icon_address = self.catalog["Profile"]["Icon Paths"][key]
-
-            # Add the icon to the item
-            catalog_item_icon = QIcon()
-            catalog_item_icon.addPixmap(QPixmap(icon_address), QIcon.Normal)
-            catalog_item.setIcon(catalog_item_icon)
-
-            # Add the item to the list of catalog items
-            self.catalog_items.addItem(catalog_item)
-
-            # Display the top item in the list of catalog items by default
-            self.catalog_items.setCurrentRow(0)
-            self.show_item_details()
+        start = operation_timing.start()
+        self.catalog.events.emit(CATALOG_RESET, self.catalog)
+
+        # Display the top item in the list of catalog items by default
+        self.select_top_item()
+        operation_timing.finish("Update Catalog", start)
+
+    def select_top_item(self):
+        """Selects the top item in the list of catalog items and displays its details"""
+        if self.catalog_model.rowCount() > 0:
+            self.catalog_items.setCurrentIndex(self.catalog_model.index(0))
+        else:
+            self.clear_item_details()
 
     def add_item(self):
         """Adds a new catalog item to the catalog"""
+        from select_category import SelectCategory
+        from add_item import AddItem
+
         select_category = SelectCategory(self.catalog["Profile"]["Category Names"])
         select_category.show()
         select_category.exec_()
 
         if select_category.get_category() != "No categories created":
-            add_item = AddItem(select_category.get_category(), self.catalog["Profile"]["Category Fields"])
+            add_item = AddItem(self.catalog.category(select_category.get_category()))
             add_item.exec_()
-            if "0" in self.catalog["Profile"]["Category Fields"][add_item.category]:
-                self.catalog["Data"][add_item.item["Date Entered"]] = add_item.item
-                self.update_catalog()
+            if add_item.category.fields and add_item.item is not None:
+                key = self.catalog.add_item(add_item.item)
+
+                # Store the item's image in the background, adding its path to the item once it's stored
+                if add_item.original_image_path:
+                    self.image_pipeline.add_image(key, add_item.original_image_path)
+
+    def add_items_from_folder(self):
+        """Adds an item for every image in a folder, storing the images and reading their metadata in parallel"""
+        from select_category import SelectCategory
+        from folder_ingest import FolderIngest
+
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if not folder:
+            return
+        select_category = SelectCategory(self.catalog["Profile"]["Category Names"])
+        select_category.show()
+        select_category.exec_()
+        category = select_category.get_category()
+        if category == "No categories created" or not self.catalog.category(category).fields:
+            return
+
+        self.folder_ingest = FolderIngest(folder, category, self)
+        self.folder_ingest.finished.connect(self.folder_ingest_finished)
+
+        # Show the progress of the ingest, which the user can cancel
+        self.ingest_progress = QProgressDialog("Adding items from folder...", "Cancel", 0, 100, self)
+        self.ingest_progress.setWindowTitle("Add Items From Folder")
+        self.ingest_progress.setWindowModality(Qt.WindowModal)
+        self.ingest_progress.setMinimumDuration(500)
+        self.ingest_progress.setAutoClose(False)
+        self.ingest_progress.setAutoReset(False)
+        self.ingest_progress.canceled.connect(self.folder_ingest.cancel)
+        self.folder_ingest.progress_changed.connect(self.ingest_progress.setValue)
+        self.folder_ingest.start()
+
+    def folder_ingest_finished(self):
+        """Adds the items for the ingested images to the catalog in a single batch"""
+        from folder_ingest import item_from_image
+
+        folder_ingest = self.sender()
+        self.ingest_progress.canceled.disconnect(folder_ingest.cancel)
+        self.ingest_progress.close()
+
+        # A cancelled or failed ingest still adds the items of the images it stored, so none of the stored images go
+        # unused
+        category = folder_ingest.category
+        category_fields = self.catalog["Profile"]["Category Fields"][category]
+        date_entered = format_date_entered(datetime.datetime.now())
+        items = []
+        errors = []
+        for original_path, image_path, metadata, error in folder_ingest.results:
+            if error:
+                errors.append(os.path.basename(original_path) + ": " + error)
+            else:
+                items.append(item_from_image(category, category_fields, date_entered, original_path, image_path,
+                                             metadata))
+        self.catalog.insert_items(zip(self.catalog.new_keys(len(items)), items))
+
+        if errors:
+            ingest_errors = QMessageBox()
+            ingest_errors.setIcon(QMessageBox.Warning)
+            ingest_errors.setText("Some images couldn't be added.")
+            ingest_errors.setInformativeText("Added: " + str(len(items)) + "\nNot added: " + str(len(errors)))
+            ingest_errors.setDetailedText("\n".join(errors))
+            ingest_errors.setWindowTitle("Add Items From Folder")
+            ingest_errors.exec_()
+
+        if folder_ingest.error:
+            ingest_error = QMessageBox()
+            ingest_error.setIcon(QMessageBox.Warning)
+            ingest_error.setText("Adding items from the folder stopped early.")
+            ingest_error.setInformativeText(folder_ingest.error)
+            ingest_error.setWindowTitle("Add Items From Folder")
+            ingest_error.exec_()
+
+    def import_rows(self):
+        """Adds an item for every row of a CSV or TSV file, parsing and validating the rows in parallel"""
+        from select_category import SelectCategory
+        from row_import import RowImport
+
+        file_name = QFileDialog.getOpenFileName(self, "Import Rows", "", "CSV or TSV Files (*.csv *.tsv *.txt)")
+        if not file_name[0]:
+            return
+        select_category = SelectCategory(self.catalog["Profile"]["Category Names"])
+        select_category.show()
+        select_category.exec_()
+        category = select_category.get_category()
+        if category == "No categories created" or not self.catalog.category(category).fields:
+            return
+
+        self.row_import = RowImport(file_name[0], category, self.catalog["Profile"]["Category Fields"][category],
+                                    format_date_entered(datetime.datetime.now()), self)
+        self.row_import.finished.connect(self.row_import_finished)
+
+        # Show the progress of the import, which the user can cancel
+        self.import_progress = QProgressDialog("Importing rows...", "Cancel", 0, 100, self)
+        self.import_progress.setWindowTitle("Import Rows")
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        self.import_progress.setMinimumDuration(500)
+        self.import_progress.setAutoClose(False)
+        self.import_progress.setAutoReset(False)
+        self.import_progress.canceled.connect(self.row_import.cancel)
+        self.row_import.progress_changed.connect(self.import_progress.setValue)
+        self.row_import.start()
+
+    def row_import_finished(self):
+        """Adds the items for the imported rows to the catalog in a single batch and reports the rows that failed"""
+        row_import = self.sender()
+        self.import_progress.canceled.disconnect(row_import.cancel)
+        self.import_progress.close()
+        if row_import.cancelled:
+            return
+
+        if row_import.error:
+            import_error = QMessageBox()
+            import_error.setIcon(QMessageBox.Warning)
+            import_error.setText("The rows couldn't be imported.")
+            import_error.setInformativeText(row_import.error)
+            import_error.setWindowTitle("Import Rows")
+            import_error.exec_()
+            return
+
+        self.catalog.insert_items(zip(self.catalog.new_keys(len(row_import.items)), row_import.items))
+
+        if row_import.errors:
+            import_errors = QMessageBox()
+            import_errors.setIcon(QMessageBox.Warning)
+            import_errors.setText("Some rows couldn't be imported.")
+            import_errors.setInformativeText("Imported: " + str(len(row_import.items)) +
+                                             "\nNot imported: " + str(len(row_import.errors)))
+            import_errors.setDetailedText("\n".join(row_import.errors[:1000]))
+            import_errors.setWindowTitle("Import Rows")
+            import_errors.exec_()
 
     def categories(self):
         """Creates and displays a ManageCategories frame with any existing profile data"""
-        manage_categories = ManageCategories(self.catalog["Profile"]["Category Names"],
-                                             self.catalog["Profile"]["Icon Paths"])
+        from manage_categories import ManageCategories
+
+        manage_categories = ManageCategories(dict(self.catalog["Profile"]["Category Names"]),
+                                             dict(self.catalog["Profile"]["Icon Paths"]))
         manage_categories.show()
         manage_categories.exec_()
-        self.catalog["Profile"]["Category Names"] = manage_categories.category_names
-        self.catalog["Profile"]["Icon Paths"] = manage_categories.category_icon_paths
-
-        # If a category doesn't yet exist in the Category Fields section, initialize it
-        for row, category in self.catalog["Profile"]["Category Names"].items():
-            if category not in self.catalog["Profile"]["Category Fields"]:
-                self.catalog["Profile"]["Category Fields"][category] = {}
+        if manage_categories.categories is not None:
+            self.catalog.set_categories(manage_categories.categories)
 
     def fields(self):
         """Creates and displays a ManageFields frame with any existing profile data"""
+        from select_category import SelectCategory
+        from manage_fields import ManageFields
+
         select_category = SelectCategory(self.catalog["Profile"]["Category Names"])
         select_category.show()
         select_category.exec_()
@@ -313,93 +929,153 @@ class MainWindow(QMainWindow):
             manage_fields = ManageFields(select_category.get_category(), self.catalog["Profile"]["Category Fields"])
             manage_fields.show()
             manage_fields.exec_()
-            self.catalog["Profile"]["Category Fields"] = manage_fields.category_fields
+            if manage_fields.fields is not None:
+                self.catalog.set_fields(manage_fields.category, manage_fields.fields)
 
     def remove_item(self):
         """Removes the selected item from the catalog"""
         confirm_remove = QMessageBox.question(self, "Remove Item",
                                               "Remove this item from the catalog?",
                                               QMessageBox.Yes, QMessageBox.No)
-        if confirm_remove == QMessageBox.Yes:
-            item = self.catalog_items.currentItem()
-            item_data = item.data(Qt.UserRole)
-            item_key = item_data["Date Entered"]
-            del self.catalog["Data"][item_key]
-            self.item_details.clear()
-            self.update_catalog()
+        if confirm_remove == QMessageBox.Yes and self.catalog_items.currentIndex().isValid():
+            item_key = self.catalog_items.currentIndex().data(Qt.UserRole)
+            self.clear_item_details()
+            self.catalog.delete_item(item_key)
 
     def edit_item(self):
         pass
 
+    def set_item_image(self, key, image_path):
+        """Adds the path of an item's stored image to the item"""
+        if key not in self.catalog["Data"]:
+            return
+        self.catalog.set_image_path(key, image_path)
+        if self.catalog_items.currentIndex().data(Qt.UserRole) == key:
+            self.show_item_details()
+
+    def show_image_error(self, key, error):
+        """Tells the user that an item's image couldn't be stored"""
+        image_error = QMessageBox()
+        image_error.setIcon(QMessageBox.Warning)
+        image_error.setText("The item's image couldn't be saved.")
+        image_error.setInformativeText(error)
+        image_error.setWindowTitle("Image Failed")
+        image_error.exec_()
+
     def load_last_catalog(self):
-        """Loads the address of the last used catalog into the program"""
+        """Loads the last used catalog into the program in the background"""
+        if not os.path.exists("last_used_catalog.txt"):
+            return
         file = open("last_used_catalog.txt", "r")
-        self.current_file = file.read()
+        last_file = file.read()
         file.close()
-        if self.current_file:
-            file = open(self.current_file, "r")
-            self.catalog = json.load(file)
-            file.close()
-
-            self.update_catalog()
+        if last_file:
+            self.load_catalog(last_file, show_progress=False)
 
     def store_last_catalog(self):
         """Stores the address of the last used catalog into a text file"""
         file = open("last_used_catalog.txt", "w")
-        file.write(self.current_file)
+        file.write(self.catalog.file_name)
         file.close()
 
     def quit_program(self):
-        """Prompts the user for confirmation that they want to quit the program"""
-        confirm_exit = QMessageBox.question(self, "Confirm Exit", "Are you sure you want to quit?",
-                                            QMessageBox.Yes, QMessageBox.No)
-        if confirm_exit == QMessageBox.Yes:
-            self.store_last_catalog()
-            sys.exit()
+        """Prompts the user for confirmation that they want to quit the program, saving any changes first"""
+        # Add the images that are still being stored to their items, so they're saved along with everything else
+        self.image_pipeline.wait_for_done()
+
+        # Quitting abandons a catalog load in progress, so the catalog open before it is the one that's saved
+        self.stop_catalog_load()
+
+        # Changes that would be saved automatically are saved without asking
+        if self.catalog.is_dirty() and not self.autosave_enabled():
+            confirm_exit = QMessageBox.question(self, "Confirm Exit", "Save your changes before quitting?",
+                                                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+            if confirm_exit == QMessageBox.Cancel:
+                return
+            if confirm_exit == QMessageBox.Yes:
+                if self.catalog.file_name:
+                    self.start_save(show_confirmation=False)
+                else:
+                    self.export_catalog()
+                self.wait_for_save()
+                if self.catalog.is_dirty():
+                    return
+        else:
+            confirm_exit = QMessageBox.question(self, "Confirm Exit", "Are you sure you want to quit?",
+                                                QMessageBox.Yes, QMessageBox.No)
+            if confirm_exit != QMessageBox.Yes:
+                return
+            self.autosave_timer.stop()
+            if self.catalog.is_dirty() and self.autosave_enabled():
+                self.start_save(show_confirmation=False)
+
+        self.wait_for_save()
+        self.store_last_catalog()
+
+        # The timing report is only written when the program is started with a report file to write it to
+        try:
+            operation_timing.write_report()
+        except OSError:
+            pass
+        sys.exit()
 
     def show_item_details(self):
         """Displays the currently selected catalog item's details"""
 
-        # Clear the item details area
-        self.item_details.clear()
-
         # Retrieve the currently selected item
-        item = self.catalog_items.currentItem()
-        item_data = item.data(Qt.UserRole)
-        item_key = item_data["Date Entered"]
-
-        # Display the item's image and add spacing
-        item_details = ""
-        if "Image Path" in item_data:
-            item_details += "<br><br><br><table border='1' cellspacing='0' style='margin: 0px auto; " \
-                            "text-align: center; border-style: solid; border-color: #d8eeea;'><tr><td><img src='" + \
-                            item_data["Image Path"] + "' /></td></tr></table>"
-
-        # Display the item's fields
-        item_details += "<br><br><table border='1' cellspacing='3' style='margin: 0px auto; " \
-                        "text-align: center; border-style: solid; border-color: #d8eeea;'>"
-        for label in self.catalog["Data"][item_key]:
-            # self.item_details.setAlignment(Qt.AlignCenter)
-            if label not in ["Category", "Date Entered", "Image Path"]:  # Do not display certain labels and data
-                if self.catalog["Data"][item_key][label]:  # Only display a label if there is data associated with it
-                    # If a label's associated data is in a list, display a comma separated string of that data
-                    if isinstance(self.catalog["Data"][item_key][label], list):
-                        item_details += "<tr><td style='text-align: center; color: #247ba0; " \
-                                        "background-color: #d8eeea; padding: 6px 30px 6px 30px;'>" + \
-                                        "<div style='text-decoration: underline;'>" + label + "</div><br>" + \
-                                        ", ".join(self.catalog["Data"][item_key][label]) + "</td></tr>"
-                    else:
-                        item_details += "<tr><td style='text-align: center; color: #247ba0; " \
-                                        "background-color: #d8eeea; padding: 6px 30px 6px 30px;'>" + \
-                                        "<div style='text-decoration: underline;'>" + label + "</div><br>" + \
-                                        str(self.catalog["Data"][item_key][label]) + "</td></tr>"
-        item_details += "</table>"
-        self.item_details.setHtml(item_details)
+        current_index = self.catalog_items.currentIndex()
+        if not current_index.isValid():
+            self.clear_item_details()
+            return
+        item_key = current_index.data(Qt.UserRole)
+
+        # Display the item's details, which are only rendered if they aren't cached
+        start = operation_timing.start()
+        self.details_renderer.show_item(item_key, self.catalog["Data"][item_key])
+        operation_timing.finish("Show Item Details", start)
+
+    def show_timing_menu(self):
+        """Opens the hidden menu that turns operation timing and its overlay on and off and saves timing reports"""
+        menu = QMenu(self)
+        record_timings = menu.addAction("Record Operation Timings")
+        record_timings.setCheckable(True)
+        record_timings.setChecked(operation_timing.enabled)
+        record_timings.toggled.connect(operation_timing.set_enabled)
+        show_overlay = menu.addAction("Show Timing Overlay")
+        show_overlay.setCheckable(True)
+        show_overlay.setChecked(self.timing_overlay.isVisible())
+        show_overlay.toggled.connect(self.timing_overlay.set_shown)
+        menu.addAction("Save Timing Report...").triggered.connect(self.save_timing_report)
+        menu.addAction("Reset Timings").triggered.connect(operation_timing.reset)
+        menu.exec_(QCursor.pos())
+
+    def save_timing_report(self):
+        """Writes the recorded operation timings to a json file the user chooses"""
+        file_name = QFileDialog.getSaveFileName(self, "Save Timing Report", "operation_timing.json",
+                                                "JSON Files (*.json)")
+        if not file_name[0]:
+            return
+        try:
+            operation_timing.write_report(file_name[0])
+        except OSError as error:
+            report_error = QMessageBox()
+            report_error.setIcon(QMessageBox.Warning)
+            report_error.setText("The timing report couldn't be saved.")
+            report_error.setInformativeText(str(error))
+            report_error.setWindowTitle("Save Timing Report")
+            report_error.exec_()
 
+    def clear_item_details(self):
+        """Clears the item details area"""
+        self.details_renderer.show_message("")
 
 def main():
+    # Worker processes of a frozen executable run its code from the start, and stop here instead of opening a window
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
+    startup_timing.mark("Application")
     main_window = MainWindow()
+    startup_timing.mark("Window")
     main_window.show()
     sys.exit(app.exec())
 
@@ -5,6 +5,8 @@ import datetime
 from manage_fields import *
 from select_category import *
 from add_item import *
+from icon_cache import *
+from catalog_core import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -19,8 +21,9 @@ class ManageCategories(QDialog):
         # Set this window to always be on top when visible
         self.setModal(True)
 
-        # Initialize category variables
+        # Initialize category variables, where the categories are only set once the changes are accepted
         self.category_names = category_names
+        self.categories = None
 
         # Initialize icon variables
         self.category_icon_paths = category_icon_paths
@@ -159,7 +162,7 @@ class ManageCategories(QDialog):
 
             self.category_buttons[key] = QPushButton()
             if key in self.category_icon_paths:
-                self.category_buttons[key].setIcon(QIcon(self.category_icon_paths[key]))
+                self.category_buttons[key].setIcon(icon_cache.icon(self.category_icon_paths[key]))
             else:
                 self.category_buttons[key].setText("Icon")
             self.category_buttons[key].setIconSize(QSize(30, 30))
@@ -197,7 +200,7 @@ class ManageCategories(QDialog):
 
         self.category_buttons[key] = QPushButton()
         if self.row < len(self.category_icon_paths):
-            self.category_buttons[key].setIcon(QIcon(self.category_icon_paths[key]))
+            self.category_buttons[key].setIcon(icon_cache.icon(self.category_icon_paths[key]))
             self.category_buttons[key].setIconSize(QSize(30, 30))
         else:
             self.category_buttons[key].setText("Icon")
@@ -217,6 +220,7 @@ class ManageCategories(QDialog):
 
             if key in self.category_icon_paths:
                 os.remove(self.category_icon_paths[key])
+                icon_cache.invalidate(self.category_icon_paths[key])
                 del(self.category_icon_paths[key])
             if key in self.category_names:
                 del(self.category_names[key])
@@ -294,6 +298,9 @@ class ManageCategories(QDialog):
         # Save the image as a new file at the new image path location
         icon_resized.save(self.new_icon_path, 'JPEG', quality=90)
 
+        # Discard any icon previously decoded from this location
+        icon_cache.invalidate(self.new_icon_path)
+
     def update_icon_name(self, key):
         """Updates the icon file name when the name of the category field changes"""
         if key in self.category_icon_paths:
@@ -301,8 +308,10 @@ class ManageCategories(QDialog):
             icon_path = "images/category-icons/" + category_name + ".jpg"
             if category_name is not '' and icon_path not in self.category_icon_paths[key]:
                 os.rename(self.category_icon_paths[key], icon_path)
+                icon_cache.invalidate(self.category_icon_paths[key])
+                icon_cache.invalidate(icon_path)
                 self.category_icon_paths[key] = icon_path
-                self.category_buttons[key].setIcon(QIcon(self.category_icon_paths[key]))
+                self.category_buttons[key].setIcon(icon_cache.icon(self.category_icon_paths[key]))
 
     def update_frame_length(self, change_type):
         """Increases or decreases the length and height of the frame"""
@@ -331,4 +340,6 @@ class ManageCategories(QDialog):
                     temp_category_icon_paths[str(category_count)] = self.category_icon_paths[key]
                 category_count += 1
         self.category_icon_paths = temp_category_icon_paths
+        self.categories = [Category(name, self.category_icon_paths.get(position, ""))
+                           for position, name in self.category_names.items()]
         self.hide()
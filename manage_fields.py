@@ -4,6 +4,7 @@ import datetime
 from manage_categories import *
 from select_category import *
 from add_item import *
+from catalog_core import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -17,9 +18,10 @@ class ManageFields(QDialog):
         # Set this window to always be on top when visible
         self.setModal(True)
 
-        # Initialize category variables
+        # Initialize category variables, where the fields are only set once the changes are accepted
         self.category = category
         self.category_fields = category_fields
+        self.fields = None
 
         # Initialize window variables
         self.frame_length = 250
@@ -238,20 +240,13 @@ class ManageFields(QDialog):
         self.move(self.horizontal_position, self.vertical_position)
 
     def ok(self):
-        """Updates catalog category fields and returns focus to the main window"""
-        self.category_fields[self.category] = {}
-        field_count = 0
+        """Sets the category's fields and returns focus to the main window"""
+        self.fields = []
         for current_row in range(self.row + 1):
             key = str(current_row)
             if self.field_names[key].text():
-                self.category_fields[self.category][str(field_count)] = []
-                self.category_fields[self.category][str(field_count)].insert(0, self.field_names[key].text())
-                self.category_fields[self.category][str(field_count)].insert(1, self.field_types[key].currentText())
-                if key in self.combo_items:
-                    self.category_fields[self.category][str(field_count)].insert(2, self.combo_items[key])
-                else:
-                    self.category_fields[self.category][str(field_count)].insert(2, "")
-                field_count += 1
+                self.fields.append(Field(self.field_names[key].text(), self.field_types[key].currentText(),
+                                         self.combo_items.get(key)))
         self.hide()
 
     def combo_button_status(self):
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+import functools
+
+# The upper bounds, in milliseconds, of the histogram buckets operation times are counted in, with a last bucket for
+# longer times
+HISTOGRAM_BOUNDS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class OperationStats:
+    """The number of times an operation has run, and a histogram of how long it took"""
+
+    __slots__ = ["count", "total", "minimum", "maximum", "buckets"]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, milliseconds):
+        """Counts one run of the operation"""
+        self.count += 1
+        self.total += milliseconds
+        self.minimum = milliseconds if self.minimum is None else min(self.minimum, milliseconds)
+        self.maximum = max(self.maximum, milliseconds)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS, milliseconds)] += 1
+
+    def percentile(self, fraction):
+        """Returns the upper bound of the bucket a fraction of the runs took at most, or the longest run if it's
+        shorter"""
+        runs = 0
+        for position, bucket in enumerate(self.buckets):
+            runs += bucket
+            if runs >= fraction * self.count and position < len(HISTOGRAM_BOUNDS):
+                return min(HISTOGRAM_BOUNDS[position], round(self.maximum, 3))
+        return round(self.maximum, 3)
+
+    def report(self):
+        """Returns the operation's statistics as a dict, with its histogram by bucket"""
+        histogram = {}
+        for position, bucket in enumerate(self.buckets):
+            if bucket:
+                bound = "<= " + str(HISTOGRAM_BOUNDS[position]) if position < len(HISTOGRAM_BOUNDS) \
+                    else "> " + str(HISTOGRAM_BOUNDS[-1])
+                histogram[bound + " ms"] = bucket
+        return {"Count": self.count, "Total": round(self.total, 3), "Mean": round(self.total / self.count, 3),
+                "Minimum": round(self.minimum, 3), "Maximum": round(self.maximum, 3),
+                "P50": self.percentile(0.5), "P95": self.percentile(0.95), "Histogram": histogram}
+
+
+class OperationTiming:
+    """Records how long the program's slow operations take, so reports that the program is slow come with numbers
+
+    Timings are only recorded once they're turned on, by the OMNILOG_OPERATION_TIMING environment variable naming a
+    report file that's written when the program quits, or from the main window's hidden timing menu. While they're
+    off, a timed operation costs one attribute check.
+    """
+
+    # The file the report is written to when the program quits, or an empty string if it isn't written
+    report_file = os.environ.get("OMNILOG_OPERATION_TIMING", "")
+
+    def __init__(self):
+        # Initialize recording variables
+        self.enabled = bool(self.report_file)
+        self.started = time.time()
+
+        # Initialize statistics variables, which operations on worker threads record into as well
+        self.operations = {}
+        self.lock = threading.Lock()
+
+    def set_enabled(self, enabled):
+        """Turns recording on or off, keeping the timings recorded so far"""
+        self.enabled = enabled
+
+    def start(self):
+        """Returns the time an operation started, or None if timings aren't being recorded"""
+        return time.perf_counter() if self.enabled else None
+
+    def finish(self, operation, start):
+        """Records how long an operation took, given the time start returned when it started"""
+        if start is None:
+            return
+        milliseconds = (time.perf_counter() - start) * 1000
+        with self.lock:
+            if operation not in self.operations:
+                self.operations[operation] = OperationStats()
+            self.operations[operation].add(milliseconds)
+
+    def timed(self, operation):
+        """Returns a decorator that records how long each call of a function takes under an operation's name"""
+        def decorator(function):
+            @functools.wraps(function)
+            def timed_function(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.finish(operation, start)
+            return timed_function
+        return decorator
+
+    def reset(self):
+        """Forgets every recorded timing"""
+        with self.lock:
+            self.operations = {}
+            self.started = time.time()
+
+    def report(self):
+        """Returns the recorded timings of each operation, sorted by name"""
+        with self.lock:
+            operations = {operation: self.operations[operation].report() for operation in sorted(self.operations)}
+        return {"Started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "Seconds Recorded": round(time.time() - self.started, 1), "Frozen": getattr(sys, "frozen", False),
+                "Operations": operations}
+
+    def write_report(self, report_file=None):
+        """Writes the recorded timings as json to a file, or to the report file if no file is given"""
+        report_file = report_file or self.report_file
+        if not report_file:
+            return
+        with open(report_file, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+operation_timing = OperationTiming()
@@ -0,0 +1,163 @@
+import io
+import os
+import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from item_values import *
+from PyQt5.QtCore import *
+
+
+class RowImport(QThread):
+    """Reads a CSV or TSV file and turns its rows into items of a category, parsing and validating the rows in a pool
+    of worker processes"""
+
+    progress_changed = pyqtSignal(int)
+
+    # The number of characters of the file handed to a worker process at a time
+    chunk_size = 1 << 20
+
+    def __init__(self, file_name, category, category_fields, date_entered, parent=None):
+        super().__init__(parent)
+
+        # Initialize file variables
+        self.file_name = file_name
+
+        # Initialize category variables
+        self.category = category
+        self.category_fields = category_fields
+        self.date_entered = date_entered
+
+        # Initialize import variables
+        self.items = []
+        self.errors = []
+        self.error = ""
+        self.cancelled = False
+
+    def run(self):
+        """Imports every row of the file, stopping early if the import is cancelled"""
+        try:
+            self.import_rows()
+        except (OSError, ValueError, csv.Error, BrokenProcessPool) as error:
+            self.error = str(error)
+
+    def import_rows(self):
+        """Matches the file's columns to the category's fields and hands the rows to the worker processes in chunks"""
+        file_size = max(os.path.getsize(self.file_name), 1)
+        with open(self.file_name, "r", encoding="utf-8-sig", newline="") as file:
+            header_line = file.readline()
+            delimiter = "\t" if header_line.count("\t") > header_line.count(",") else ","
+            header = next(csv.reader([header_line], delimiter=delimiter), [])
+
+            # Columns are matched to fields by name, ignoring case and surrounding whitespace
+            fields = [self.category_fields[key] for key in sorted(self.category_fields, key=int)]
+            field_names = {field[0].strip().lower(): field[0] for field in fields}
+            columns = [field_names.get(column.strip().lower()) for column in header]
+            if not any(columns):
+                raise ValueError("None of the file's columns match a field of the " + self.category + " category.")
+
+            worker_count = os.cpu_count() or 1
+            executor = ProcessPoolExecutor(worker_count)
+            try:
+                # Keep a limited number of chunks in flight so the file is never read far ahead of the workers
+                pending = deque()
+                line_number = 2
+                characters_read = len(header_line)
+                for chunk in read_chunks(file, self.chunk_size):
+                    pending.append(executor.submit(parse_rows, chunk, line_number, delimiter, columns, fields,
+                                                   self.category, self.date_entered))
+                    line_number += chunk.count("\n")
+                    characters_read += len(chunk)
+                    if len(pending) >= 2 * worker_count:
+                        self.collect(pending.popleft().result())
+                        self.progress_changed.emit(min(int(characters_read * 100 / file_size), 99))
+                    if self.cancelled:
+                        return
+                while pending:
+                    self.collect(pending.popleft().result())
+                    if self.cancelled:
+                        return
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+    def collect(self, result):
+        """Keeps the items and errors of a parsed chunk"""
+        items, errors = result
+        self.items.extend(items)
+        self.errors.extend(errors)
+
+    def cancel(self):
+        """Asks the worker to stop importing rows"""
+        self.cancelled = True
+
+
+def read_chunks(file, chunk_size):
+    """Yields the text of a file in chunks of whole rows, never splitting a quoted value that spans lines"""
+    pending = ""
+    while True:
+        data = file.read(chunk_size)
+        text = pending + data
+        if not data:
+            if text:
+                yield text
+            return
+
+        # Split after the last line break outside of quotes, where the number of quotes before it is even
+        end = text.rfind("\n")
+        while end >= 0 and text.count('"', 0, end) % 2:
+            end = text.rfind("\n", 0, end)
+        if end < 0:
+            pending = text
+            continue
+        yield text[:end + 1]
+        pending = text[end + 1:]
+
+
+def parse_rows(text, first_line, delimiter, columns, fields, category, date_entered):
+    """Parses a chunk of rows into items in a worker process, returning the items and an error for each row that
+    couldn't be imported
+
+    Text values are split the same way AddItem splits them, and Dropdown values must be one of the field's items.
+    Fields without a column, or with an empty cell, start empty, or at their first item for Dropdown fields, as in
+    AddItem.
+    """
+    # Work out once where each field's value comes from and which values it allows
+    field_plan = []
+    for field_name, field_type, field_items in fields:
+        column = columns.index(field_name) if field_name in columns else None
+        if field_type == "Dropdown":
+            field_plan.append((field_name, column, set(field_items), field_items[0] if field_items else ""))
+        else:
+            field_plan.append((field_name, column, None, ""))
+
+    items = []
+    errors = []
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+    line_number = first_line
+    for row in reader:
+        row_line = line_number
+        line_number = first_line + reader.line_num
+        if not row:
+            continue
+        if len(row) > len(columns):
+            errors.append("Line " + str(row_line) + ": the row has more values than the file has columns.")
+            continue
+
+        item = {}
+        valid = True
+        for field_name, column, choices, default in field_plan:
+            if column is None or column >= len(row) or not row[column]:
+                item[field_name] = default
+            elif choices is None:
+                item[field_name] = split_values(row[column])
+            elif row[column] in choices:
+                item[field_name] = row[column]
+            else:
+                errors.append("Line " + str(row_line) + ": \"" + row[column] + "\" isn't one of the " + field_name +
+                              " choices.")
+                valid = False
+        if valid:
+            item["Category"] = category
+            item["Date Entered"] = date_entered
+            items.append(item)
+    return items, errors
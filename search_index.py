@@ -0,0 +1,302 @@
+import re
+import math
+import queue
+import bisect
+import threading
+
+
+class SearchIndex:
+    """An inverted index from the words in catalog item fields to the items that contain them"""
+
+    # Item labels whose values aren't searched
+    unindexed_labels = ["Date Entered", "Image Path"]
+
+    # The pattern that splits field values into words
+    word_pattern = re.compile(r"\w+")
+
+    # The size of an inserted batch from which the items are indexed on the background thread
+    background_batch_size = 1000
+
+    def __init__(self):
+        # Initialize catalog variables
+        self.data = {}
+        self.inserted_items = {}
+
+        # Initialize index variables
+        self.built = True
+        self.postings = {}
+        self.item_terms = {}
+        self.sorted_terms = []
+
+        # Initialize background indexing variables
+        self.builder = None
+        self.changed_keys = set()
+
+    def build(self, catalog):
+        """Indexes every item in a newly loaded catalog on a background thread, from a copy of its items
+
+        Catalogs that read their items on demand can only be read on the GUI thread, so they're indexed when they're
+        first searched instead, which also means opening them doesn't require reading every item.
+        """
+        self.stop_builder()
+        self.data = catalog["Data"]
+        self.postings = {}
+        self.item_terms = {}
+        self.sorted_terms = []
+        self.built = not hasattr(self.data, "prefetch")
+        if self.built and self.data:
+            self.index_in_background(self.data.copy())
+
+    def index_in_background(self, items):
+        """Indexes a dict of items on the background thread, starting it if it isn't already running"""
+        if self.builder is None:
+            self.builder = IndexBuilder(self.unindexed_labels, self.word_pattern)
+        self.builder.add_items(items)
+
+    def stop_builder(self):
+        """Stops the background thread, discarding anything it has indexed"""
+        if self.builder is not None:
+            self.builder.stop()
+        self.builder = None
+        self.changed_keys = set()
+
+    def merge_builder(self):
+        """Waits for the background thread to finish, and merges what it indexed into the index
+
+        Items that changed after being given to the background thread are indexed again.
+        """
+        builder = self.builder
+        self.builder = None
+        index = builder.finish()
+
+        if not self.item_terms:
+            self.postings = index.postings
+            self.item_terms = index.item_terms
+            self.sorted_terms = index.sorted_terms
+        else:
+            for key in index.item_terms.keys() & self.item_terms.keys():
+                self.remove_item(key)
+            new_terms = []
+            for term, postings in index.postings.items():
+                if term in self.postings:
+                    self.postings[term].update(postings)
+                else:
+                    self.postings[term] = postings
+                    new_terms.append(term)
+            self.item_terms.update(index.item_terms)
+            self.add_sorted_terms(new_terms)
+
+        changed_keys = self.changed_keys
+        self.changed_keys = set()
+        for key in changed_keys:
+            self.remove_item(key)
+            if key in self.data:
+                self.add_item(key)
+
+    def index_all(self):
+        """Indexes every item in the catalog"""
+        for key, item in self.data.items():
+            self.index_item(key, item)
+        self.sorted_terms = sorted(self.postings)
+
+    def add_item(self, key):
+        """Indexes an item that was inserted into the catalog"""
+        if not self.built:
+            return
+        if self.builder is not None:
+            self.changed_keys.add(key)
+            return
+        for term in self.index_item(key, self.data[key]):
+            if len(self.postings[term]) == 1:
+                bisect.insort(self.sorted_terms, term)
+
+    def set_inserted_items(self, items):
+        """Keeps the (key, item) pairs of a batch that's about to be inserted, so indexing the batch doesn't have to
+        read its items back from the catalog"""
+        self.inserted_items = dict(items)
+
+    def add_items(self, keys):
+        """Indexes a batch of items that were inserted into the catalog
+
+        Large batches, and any batch inserted while the background thread is still indexing, are indexed on the
+        background thread, so loading and importing items doesn't wait for indexing.
+        """
+        inserted_items = self.inserted_items
+        self.inserted_items = {}
+        if not self.built:
+            return
+        items = {key: inserted_items[key] if key in inserted_items else self.data[key] for key in keys}
+
+        if self.builder is not None or len(items) >= self.background_batch_size:
+            self.index_in_background(items)
+            return
+
+        new_terms = []
+        for key, item in items.items():
+            for term in self.index_item(key, item):
+                if len(self.postings[term]) == 1:
+                    new_terms.append(term)
+        self.add_sorted_terms(new_terms)
+
+    def add_sorted_terms(self, new_terms):
+        """Adds newly indexed words to the sorted words"""
+        # Merging the new words in all at once is cheaper than inserting a large number of them one at a time
+        if len(new_terms) > 100:
+            new_terms.sort()
+            self.sorted_terms = sorted(self.sorted_terms + new_terms)
+        else:
+            for term in new_terms:
+                bisect.insort(self.sorted_terms, term)
+
+    def remove_item(self, key):
+        """Removes an item that was deleted from the catalog from the index"""
+        if self.builder is not None:
+            self.changed_keys.add(key)
+            return
+        for term in self.item_terms.pop(key, {}):
+            del self.postings[term][key]
+            if not self.postings[term]:
+                del self.postings[term]
+                del self.sorted_terms[bisect.bisect_left(self.sorted_terms, term)]
+
+    def update_item(self, key):
+        """Re-indexes an item whose fields have changed"""
+        self.remove_item(key)
+        self.add_item(key)
+
+    def index_item(self, key, item):
+        """Adds the words in an item's fields to the postings and returns the item's word counts"""
+        # Multiple inputs for one field are stored as a list, so index each of them
+        values = []
+        for label, value in item.items():
+            if label in self.unindexed_labels:
+                continue
+            if isinstance(value, list):
+                values.extend(value)
+            else:
+                values.append(str(value))
+
+        term_counts = {}
+        for term in self.word_pattern.findall(" ".join(values).lower()):
+            term_counts[term] = term_counts.get(term, 0) + 1
+
+        for term, count in term_counts.items():
+            if term in self.postings:
+                self.postings[term][key] = count
+            else:
+                self.postings[term] = {key: count}
+        self.item_terms[key] = term_counts
+        return term_counts
+
+    def search(self, query):
+        """Returns the keys of the items matching every word in a query, best matches first
+
+        Each query word also matches the indexed words it is a prefix of, so results can be shown while the
+        user is still typing.
+        """
+        query_terms = self.tokenize(query)
+        if not query_terms:
+            return []
+        if not self.built:
+            self.index_all()
+            self.built = True
+        if self.builder is not None:
+            self.merge_builder()
+
+        # Find the postings for the indexed words each query word matches, rarest query words first
+        posting_groups = [[self.postings[term] for term in self.prefix_matches(query_term)]
+                          for query_term in query_terms]
+        posting_groups.sort(key=lambda group: sum(len(postings) for postings in group))
+        if not posting_groups[0]:
+            return []
+
+        # Narrow the matches down to the items containing every query word
+        first_group = posting_groups[0]
+        matches = first_group[0].keys() if len(first_group) == 1 else set().union(*first_group)
+        for group in posting_groups[1:]:
+            if len(group) == 1:
+                matches = [key for key in matches if key in group[0]]
+            else:
+                matches = [key for key in matches if any(key in postings for postings in group)]
+            if not matches:
+                return []
+
+        # Score each match, weighting rare words above common ones
+        item_count = max(len(self.item_terms), 1)
+        scores = dict.fromkeys(matches, 0.0)
+        for group in posting_groups:
+            for postings in group:
+                weight = math.log(1 + item_count / len(postings))
+                if len(postings) < len(scores):
+                    for key, count in postings.items():
+                        if key in scores:
+                            scores[key] += count * weight
+                else:
+                    scores = {key: score + postings.get(key, 0) * weight for key, score in scores.items()}
+
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def prefix_matches(self, prefix):
+        """Returns the indexed words that begin with a prefix"""
+        start = bisect.bisect_left(self.sorted_terms, prefix)
+        end = bisect.bisect_left(self.sorted_terms, prefix + "\uffff", start)
+        return self.sorted_terms[start:end]
+
+    @classmethod
+    def tokenize(cls, text):
+        """Splits text into lowercase words"""
+        return cls.word_pattern.findall(str(text).lower())
+
+
+class IndexBuilder(threading.Thread):
+    """A background thread that indexes batches of items into a search index of its own, which is merged into the
+    catalog's index once it's done"""
+
+    def __init__(self, unindexed_labels, word_pattern):
+        super().__init__(daemon=True)
+
+        # Initialize index variables
+        self.index = SearchIndex()
+        self.index.unindexed_labels = unindexed_labels
+        self.index.word_pattern = word_pattern
+
+        # Initialize batch variables
+        self.batches = queue.Queue()
+        self.stopped = False
+        self.start()
+
+    def add_items(self, items):
+        """Queues a dict of items to be indexed"""
+        self.batches.put(items)
+
+    def finish(self):
+        """Waits for the queued items to be indexed, stops the thread and returns the index"""
+        self.batches.join()
+        self.stop()
+        return self.index
+
+    def stop(self):
+        """Stops the thread once the batch it's indexing is done"""
+        self.stopped = True
+        self.batches.put(None)
+
+    def run(self):
+        index = self.index
+        while True:
+            items = self.batches.get()
+            try:
+                if items is None:
+                    return
+                if self.stopped:
+                    continue
+                for key, item in items.items():
+                    # An item inserted again in a later batch replaces the one from the earlier batch
+                    for term in index.item_terms.pop(key, {}):
+                        del index.postings[term][key]
+                        if not index.postings[term]:
+                            del index.postings[term]
+                    index.index_item(key, item)
+                if self.batches.empty():
+                    index.sorted_terms = sorted(index.postings)
+            finally:
+                self.batches.task_done()
@@ -0,0 +1,163 @@
+import bisect
+from item_values import *
+
+
+class SortIndex:
+    """Keeps the catalog's items sorted by the labels they've been sorted by, so the list can be sorted again, and
+    items inserted into a sorted list, without sorting every item again
+
+    Each item's sort key for a label is computed once, when the item is first sorted or inserted, and items with
+    equal values stay in the order they were inserted.
+    """
+
+    # The size of an inserted batch from which the new items are merged into each sorted order all at once
+    merged_batch_size = 100
+
+    def __init__(self):
+        # Initialize catalog variables
+        self.data = {}
+
+        # Initialize index variables, with the order items were inserted in and, for each label items have been
+        # sorted by, each item's (sort key, insertion order, key) entry and the entries in order
+        self.sequence = {}
+        self.next_sequence = 0
+        self.entries = {}
+        self.sorted_entries = {}
+
+    def build(self, catalog):
+        """Forgets the sorted orders of the previous catalog, sorting a newly loaded catalog's items once they're first
+        sorted"""
+        self.data = catalog["Data"]
+        self.sequence = {}
+        self.next_sequence = 0
+        self.entries = {}
+        self.sorted_entries = {}
+
+    def sort_by(self, label):
+        """Sorts every item by a label, if they haven't been sorted by it yet, and returns the entries in order"""
+        if label in self.sorted_entries:
+            return self.sorted_entries[label]
+        if not self.sorted_entries:
+            self.sequence = {key: position for position, key in enumerate(self.data)}
+            self.next_sequence = len(self.sequence)
+
+        # Catalogs stored by column supply a label's values without reading the rest of each item
+        label_values = getattr(self.data, "label_values", None)
+        if label_values is not None:
+            values = label_values(label)
+        else:
+            values = ((key, item.get(label)) for key, item in self.data.items())
+        # Equal text values, which Dropdown fields and bulk imports have many of, share their sort key
+        sequence = self.sequence
+        text_keys = {}
+        entries = self.entries[label] = {}
+        for key, value in values:
+            if type(value) is str:
+                value_key = text_keys.get(value)
+                if value_key is None:
+                    value_key = text_keys[value] = sort_key(label, value)
+            else:
+                value_key = sort_key(label, value)
+            entries[key] = (value_key, sequence[key], key)
+        self.sorted_entries[label] = sorted(self.entries[label].values())
+        return self.sorted_entries[label]
+
+    def sorted_keys(self, label, descending=False):
+        """Returns the keys of every item sorted by a label"""
+        entries = self.sort_by(label)
+        keys = [entry[2] for entry in entries]
+        if descending:
+            keys.reverse()
+        return keys
+
+    def sort(self, keys, label, descending=False):
+        """Returns a list of keys sorted by a label"""
+        self.sort_by(label)
+        return sorted(keys, key=self.entries[label].__getitem__, reverse=descending)
+
+    def position(self, label, key):
+        """Returns the position of an item among every item sorted by a label"""
+        return bisect.bisect_left(self.sort_by(label), self.entries[label][key])
+
+    def add_item(self, key):
+        """Inserts an item that was inserted into the catalog into each sorted order"""
+        self.add_items([key])
+
+    def add_items(self, keys):
+        """Inserts a batch of items that were inserted into the catalog into each sorted order"""
+        if not self.sorted_entries:
+            return
+        for key in keys:
+            self.sequence[key] = self.next_sequence
+            self.next_sequence += 1
+        for label in self.sorted_entries:
+            self.insert_entries(label, keys)
+
+    def insert_entries(self, label, keys):
+        """Computes the sort keys of items for a label and inserts them into the label's sorted order"""
+        entries = self.entries[label]
+        new_entries = []
+        for key in keys:
+            entries[key] = (sort_key(label, self.label_value(key, label)), self.sequence[key], key)
+            new_entries.append(entries[key])
+
+        # Merging a large batch in all at once is cheaper than inserting its entries one at a time
+        if len(new_entries) > self.merged_batch_size:
+            self.sorted_entries[label] += new_entries
+            self.sorted_entries[label].sort()
+        else:
+            for entry in new_entries:
+                bisect.insort(self.sorted_entries[label], entry)
+
+    def remove_item(self, key):
+        """Removes an item that was deleted from the catalog from each sorted order"""
+        if key not in self.sequence:
+            return
+        del self.sequence[key]
+        for label, sorted_entries in self.sorted_entries.items():
+            entry = self.entries[label].pop(key)
+            del sorted_entries[bisect.bisect_left(sorted_entries, entry)]
+
+    def update_item(self, key):
+        """Moves an item whose values may have changed to its place in each sorted order"""
+        if key not in self.sequence:
+            return
+        for label, sorted_entries in self.sorted_entries.items():
+            del sorted_entries[bisect.bisect_left(sorted_entries, self.entries[label][key])]
+            self.insert_entries(label, [key])
+
+    def label_value(self, key, label):
+        """Returns an item's value for a label, reading only that value from catalogs stored by column"""
+        label_value = getattr(self.data, "label_value", None)
+        if label_value is not None:
+            return label_value(key, label)
+        return self.data[key].get(label)
+
+
+def sort_key(label, value):
+    """Returns the key a value is sorted by, which orders numbers, then dates, then text regardless of case, then
+    missing values"""
+    if type(value) is not str:
+        if isinstance(value, list):
+            value = ", ".join(str(text) for text in value)
+        elif value is None:
+            return 3, ""
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            return 0, value
+        else:
+            value = str(value)
+    if not value:
+        return 3, ""
+    if label == "Date Entered":
+        date_entered = parse_date_entered(value)
+        if date_entered is not None:
+            return 1, date_entered
+    elif value[0] in "0123456789+-.":
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            if number == number:
+                return 0, number
+    return 2, value.casefold()
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import time
+
+# The time the program started importing its modules, which every startup timing is measured from
+STARTUP_TIME = time.perf_counter()
+
+
+class StartupTiming:
+    """Measures how long each stage of starting the program takes, so changes that slow startup down are noticed
+
+    Timings are only measured when the OMNILOG_STARTUP_TIMING environment variable names a report file, which each
+    startup appends a line of json to. The builds made without a console can't print, so the report is a file.
+    """
+
+    # The file the timings of each startup are appended to, or an empty string when startup isn't timed
+    report_file = os.environ.get("OMNILOG_STARTUP_TIMING", "")
+
+    # The modules that are only imported once they're first used, which shouldn't have been imported during startup
+    deferred_modules = ["PIL", "add_item", "manage_categories", "manage_fields", "select_category", "folder_ingest",
+                        "row_import"]
+
+    def __init__(self):
+        # Initialize timing variables, in milliseconds since the program started
+        self.timings = {}
+
+    def enabled(self):
+        """Returns whether startup is being timed"""
+        return bool(self.report_file)
+
+    def mark(self, stage):
+        """Records the time at which a stage of starting the program finished"""
+        if self.report_file:
+            self.timings[stage] = round((time.perf_counter() - STARTUP_TIME) * 1000, 2)
+
+    def write_report(self):
+        """Appends the timings of this startup, and the modules that had been imported by then, to the report file"""
+        if not self.report_file:
+            return
+        report = {"Timings": self.timings, "Frozen": getattr(sys, "frozen", False),
+                  "Deferred Modules Imported": [name for name in self.deferred_modules if name in sys.modules]}
+        with open(self.report_file, "a") as file:
+            file.write(json.dumps(report) + "\n")
+
+
+startup_timing = StartupTiming()
@@ -0,0 +1,95 @@
+import random
+import pytest
+from catalog_columns import *
+
+PROFILE = {"Category Fields": {"A": {"0": ["Name", "Text", []], "1": ["Kind", "Dropdown", ["x", "y"]]}}}
+
+
+def random_value(generator):
+    """Returns text, lists of text or other json values, including text that can't be stored as plain text"""
+    choice = generator.random()
+    if choice < 0.4:
+        return generator.choice(["", "é", "abc", "a\x00b", "naïve 漢字"]) + str(generator.randint(0, 50))
+    if choice < 0.6:
+        return [generator.choice(["p", "q", "", "r\x00"]) for _ in range(generator.randint(0, 3))]
+    if choice < 0.7:
+        return generator.choice([1, 2.5, None, {"a": 1}, [1, 2], True, 0, False, "0"])
+    return generator.choice(["x", "y"])
+
+
+def random_item(generator):
+    """Returns an item of one of two categories, sometimes missing or adding labels"""
+    item = {"Category": generator.choice(["A", "B"]), "Name": random_value(generator), "Kind": random_value(generator)}
+    if generator.random() < 0.5:
+        item["Extra"] = random_value(generator)
+    if generator.random() < 0.2:
+        del item["Name"]
+    return item
+
+
+def assert_same(items, reference):
+    """Checks that column-stored items read back exactly as a dict of the same items"""
+    assert list(items) == list(reference)
+    assert list(reversed(items)) == list(reversed(reference))
+    assert len(items) == len(reference)
+    assert dict(items.items()) == reference
+    for key, item in reference.items():
+        assert items[key] == item
+        assert items.label_value(key, "Name", "default") == item.get("Name", "default")
+    assert dict(items.label_values("Kind", "default")) == {key: item.get("Kind", "default")
+                                                           for key, item in reference.items()}
+    for category in ["A", "B"]:
+        keys = {key for key, item in reference.items() if item["Category"] == category}
+        assert set(items.category_keys(category)) == keys
+        assert dict(items.category_label_values(category, "Name")) == {key: reference[key].get("Name")
+                                                                       for key in keys}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_items_match_dict(seed, monkeypatch):
+    # Small limits make the buffers compact and removed rows get dropped often
+    monkeypatch.setattr(TextColumn, "minimum_unused_bytes", 50)
+    monkeypatch.setattr(CategoryTable, "minimum_removed_rows", 5)
+    generator = random.Random(seed)
+    items = ColumnarItems(PROFILE)
+    reference = {}
+    copies = []
+    next_key = 0
+
+    for step in range(1500):
+        action = generator.random()
+        if action < 0.4:
+            batch = [(str(next_key + offset), random_item(generator)) for offset in range(generator.randint(1, 20))]
+            next_key += len(batch)
+            if reference and generator.random() < 0.2:
+                batch.insert(generator.randint(0, len(batch)), (generator.choice(list(reference)),
+                                                                random_item(generator)))
+            expected_new = [key for key, item in batch if key not in reference]
+            expected_replaced = [key for key, item in batch if key in reference]
+            assert items.add_items(batch) == (expected_new, expected_replaced)
+            reference.update(batch)
+        elif action < 0.6 and reference:
+            key = generator.choice(list(reference))
+            del items[key]
+            del reference[key]
+        elif action < 0.8 and reference:
+            key = generator.choice(list(reference))
+            reference[key] = items[key] = random_item(generator)
+        elif action < 0.805:
+            copies.append((items.copy(), {key: dict(item) for key, item in reference.items()}))
+    assert_same(items, reference)
+
+    # Copies aren't affected by the changes made after they were taken
+    for copy, copied_reference in copies:
+        assert_same(copy, copied_reference)
+
+
+def test_rename_keys_keeps_order():
+    items = ColumnarItems(PROFILE)
+    items.add_items([("a", {"Category": "A", "Name": "1"}), ("b", {"Category": "B", "Name": "2"}),
+                     ("c", {"Category": "A", "Name": "3"})])
+    items.rename_keys({"a": "10", "c": "30"})
+    assert list(items) == ["10", "b", "30"]
+    assert dict(items.items()) == {"10": {"Category": "A", "Name": "1"}, "b": {"Category": "B", "Name": "2"},
+                                   "30": {"Category": "A", "Name": "3"}}
+    assert set(items.category_keys("A")) == {"10", "30"}
@@ -0,0 +1,112 @@
+import random
+import pytest
+from catalog_columns import *
+from facet_index import *
+
+PROFILE = {"Category Names": {"0": "A", "1": "B"},
+           "Category Fields": {"A": {"0": ["Kind", "Dropdown", ["x", "y", "z"]], "1": ["Note", "Text", []]},
+                               "B": {"0": ["Kind", "Dropdown", ["x", "w"]], "1": ["Size", "Dropdown", ["s", "m"]]}},
+           "Icon Paths": {}}
+SELECTABLE = {"Category": ["A", "B"], "Kind": ["x", "y", "z", "w"], "Size": ["s", "m"]}
+
+
+def random_item(generator):
+    """Returns an item with Dropdown values, multiple inputs and values outside the field's list"""
+    category = generator.choice(["A", "B"])
+    item = {"Category": category, "Kind": generator.choice(["x", "y", "z", "w", ["x", "y"], ""]),
+            "Note": generator.choice(["x", "s"])}
+    if category == "B":
+        item["Size"] = generator.choice(["s", "m"])
+    return item
+
+
+def random_selections(generator):
+    """Returns a random selection of values of some facets"""
+    return {label: generator.sample(values, generator.randint(0, 2)) for label, values in SELECTABLE.items()
+            if generator.random() < 0.6}
+
+
+def item_values(item, label):
+    """Returns the values an item has for a facet, by reading the item"""
+    if label != "Category" and label not in [field[0] for field in PROFILE["Category Fields"][item["Category"]].values()
+                                             if field[1] == "Dropdown"]:
+        return []
+    value = item.get(label)
+    return value if isinstance(value, list) else [value]
+
+
+def scan(data, selections):
+    """Returns the keys of the items with one of the selected values of every facet, by reading every item"""
+    return {key for key, item in data.items()
+            if all(not values or set(values) & set(item_values(item, label)) for label, values in selections.items())}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_facets_match_scan(seed, columnar):
+    generator = random.Random(seed)
+    data = ColumnarItems(PROFILE) if columnar else {}
+    reference = {}
+    for key in range(generator.randint(0, 60)):
+        reference[str(key)] = data[str(key)] = random_item(generator)
+    index = FacetIndex()
+    index.build({"Profile": PROFILE, "Data": data})
+    next_key = len(reference)
+
+    for step in range(300):
+        action = generator.random()
+        if action < 0.2:
+            keys = [str(next_key + offset) for offset in range(generator.randint(1, 5))]
+            next_key += len(keys)
+            for key in keys:
+                reference[key] = data[key] = random_item(generator)
+            index.add_items(keys)
+        elif action < 0.35 and reference:
+            key = generator.choice(list(reference))
+            reference[key] = data[key] = random_item(generator)
+            index.update_item(key)
+        elif action < 0.5 and reference:
+            key = generator.choice(list(reference))
+            del reference[key]
+            del data[key]
+            index.remove_item(key)
+        else:
+            selections = random_selections(generator)
+            rows = index.matching_rows(selections)
+            expected = scan(reference, selections)
+            if rows is None:
+                assert not any(selections.values())
+            else:
+                assert set(index.ordered_keys(rows)) == expected
+                assert index.ordered_keys(rows) == [key for key in reversed(reference) if key in expected]
+
+            # Each facet's counts leave out its own selection
+            counts = index.counts(selections)
+            for label in SELECTABLE:
+                others = {other: selected for other, selected in selections.items() if other != label}
+                matches = scan(reference, others)
+                values = {value for item in reference.values() for value in item_values(item, label)}
+                assert counts[label] == {value: sum(value in item_values(reference[key], label) for key in matches)
+                                         for value in values}
+
+
+def test_facet_values_follow_profile_order():
+    data = {"1": {"Category": "B", "Kind": "w", "Size": "m"}, "2": {"Category": "A", "Kind": "z"},
+            "3": {"Category": "A", "Kind": "other"}}
+    index = FacetIndex()
+    index.build({"Profile": PROFILE, "Data": data})
+    assert index.facet_values("Category") == ["A", "B"]
+    assert index.facet_values("Kind") == ["z", "w", "other"]
+    assert index.facet_values("Size") == ["m"]
+
+
+def test_profile_change_reindexes():
+    profile = {"Category Names": {"0": "A"}, "Category Fields": {"A": {"0": ["Kind", "Text", []]}}}
+    data = {"1": {"Category": "A", "Kind": "x"}}
+    index = FacetIndex()
+    index.build({"Profile": profile, "Data": data})
+    assert "Kind" not in index.counts({})
+
+    profile["Category Fields"]["A"]["0"] = ["Kind", "Dropdown", ["x"]]
+    index.update_profile()
+    assert index.counts({})["Kind"] == {"x": 1}
@@ -0,0 +1,101 @@
+import random
+import pytest
+from catalog_columns import *
+from item_ids import *
+
+PROFILE = {"Category Names": {"0": "Roads"}, "Category Fields": {"Roads": {"0": ["Name", "Text", []]}},
+           "Icon Paths": {}}
+DATES = ["1.2.2024-3:4:5", "1.2.2024-3:4:6", "2.2.2024-0:0:0", ""]
+
+
+def random_item(generator):
+    """Returns an item with one of a few "Date Entered" values, or none"""
+    item = {"Category": "Roads", "Name": generator.choice(["a", "b", "c"])}
+    if generator.random() < 0.9:
+        item["Date Entered"] = generator.choice(DATES)
+    return item
+
+
+def scan(data, date_entered):
+    """Returns the keys of the items entered at a "Date Entered" value, by reading every item"""
+    return {key for key, item in data.items() if item.get("Date Entered", "") == date_entered}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_keys_entered_matches_scan(seed, columnar):
+    generator = random.Random(seed)
+    data = ColumnarItems(PROFILE) if columnar else {}
+    reference = {}
+    for key in range(generator.randint(0, 100)):
+        reference[str(key)] = data[str(key)] = random_item(generator)
+    index = DateEnteredIndex()
+    index.build({"Data": data})
+    next_key = len(reference)
+
+    for step in range(300):
+        action = generator.random()
+        if action < 0.2:
+            keys = [str(next_key + offset) for offset in range(generator.randint(1, 5))]
+            next_key += len(keys)
+            for key in keys:
+                reference[key] = data[key] = random_item(generator)
+            index.add_items(keys)
+        elif action < 0.3:
+            key = str(next_key)
+            next_key += 1
+            reference[key] = data[key] = random_item(generator)
+            index.add_item(key)
+        elif action < 0.45 and reference:
+            key = generator.choice(list(reference))
+            reference[key] = data[key] = random_item(generator)
+            index.update_item(key)
+        elif action < 0.6 and reference:
+            key = generator.choice(list(reference))
+            del reference[key]
+            del data[key]
+            index.remove_item(key)
+        else:
+            date_entered = generator.choice(DATES)
+            assert index.keys_entered(date_entered) == scan(reference, date_entered)
+
+
+def test_new_keys_increase_and_skip_existing_keys(monkeypatch):
+    now = [1000000000]
+    monkeypatch.setattr(time, "time_ns", lambda: now[0] * 1000)
+    data = {"1000000001": {}, "1000000003": {}}
+    item_ids = ItemIds()
+
+    keys = item_ids.new_keys(data, 4)
+    assert keys == ["1000000000", "1000000002", "1000000004", "1000000005"]
+
+    # Keys keep increasing when the clock is turned back
+    now[0] -= 60
+    assert item_ids.new_key(data) == "1000000006"
+    now[0] += 1000
+    assert item_ids.new_key(data) == str(now[0])
+
+
+def test_new_keys_are_unique():
+    data = {}
+    item_ids = ItemIds()
+    keys = []
+    for count in [1, 50, 1, 200]:
+        batch = item_ids.new_keys(data, count)
+        data.update(dict.fromkeys(batch))
+        keys.extend(batch)
+    assert len(set(keys)) == len(keys)
+    assert [int(key) for key in keys] == sorted(int(key) for key in keys)
+    assert all(is_item_id(key) for key in keys)
+
+
+def test_migrate_item_keys():
+    item_ids = ItemIds()
+    assert migrate_item_keys({"1700000000000000": {}}, item_ids) is None
+
+    data = {"1.2.2024-3:4:5": {}, "1700000000000000": {}, "1.2.2024-3:4:6": {}}
+    new_keys = migrate_item_keys(data, item_ids)
+    assert list(new_keys) == ["1.2.2024-3:4:5", "1.2.2024-3:4:6"]
+    assert all(is_item_id(key) and key not in data for key in new_keys.values())
+    assert len(set(new_keys.values())) == 2
+    assert not is_item_id("١٢٣")
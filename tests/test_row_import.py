@@ -0,0 +1,115 @@
+import csv
+import random
+import pytest
+from item_values import *
+from row_import import *
+
+CATEGORY_FIELDS = {"0": ["Name", "Text", []], "1": ["Condition", "Dropdown", ["Dry", "Wet", "Icy"]],
+                   "2": ["Notes", "Text", []], "3": ["Unlisted", "Text", []]}
+DATE_ENTERED = "1.2.2024-3:4:5"
+
+
+def random_cell(generator):
+    """Returns a cell with commas, quotes, line breaks and Dropdown values mixed in"""
+    return generator.choice(["", "Dry", "Wet", "Icy", "Snow", "a, b", "x,y,z", "line\nbreak", 'say "hi"', "é ü",
+                             "  padded", "plain"])
+
+
+def write_file(path, generator, delimiter):
+    """Writes a random file with a header that matches some fields, returning its rows"""
+    header = ["name ", "CONDITION", "Other", "Notes"]
+    rows = []
+    for _ in range(generator.randint(0, 120)):
+        row = [random_cell(generator) for _ in header]
+        if generator.random() < 0.05:
+            row.append("extra")
+        elif generator.random() < 0.05:
+            row = row[:generator.randint(0, len(header))]
+        rows.append(row)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=delimiter, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+    return header, rows
+
+
+def scan(path, delimiter):
+    """Turns every row of a file into an item or an error in a single pass, the way AddItem treats its inputs"""
+    fields = [CATEGORY_FIELDS[key] for key in sorted(CATEGORY_FIELDS, key=int)]
+    items = []
+    errors = []
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        columns = [column.strip().lower() for column in next(reader)]
+        line_number = reader.line_num + 1
+        for row in reader:
+            row_line = line_number
+            line_number = reader.line_num + 1
+            if not row:
+                continue
+            if len(row) > len(columns):
+                errors.append(row_line)
+                continue
+            item = {}
+            for name, field_type, choices in fields:
+                column = columns.index(name.lower()) if name.lower() in columns else None
+                value = row[column] if column is not None and column < len(row) else ""
+                if field_type == "Dropdown":
+                    if not value:
+                        value = choices[0]
+                    elif value not in choices:
+                        errors.append(row_line)
+                        item = None
+                        break
+                else:
+                    value = split_values(value)
+                item[name] = value
+            if item is not None:
+                item["Category"] = "Roads"
+                item["Date Entered"] = DATE_ENTERED
+                items.append(item)
+    return items, errors
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_import_matches_scan(seed, tmp_path, monkeypatch):
+    generator = random.Random(seed)
+    delimiter = "\t" if seed % 2 else ","
+    path = str(tmp_path / "rows.csv")
+    write_file(path, generator, delimiter)
+
+    # Small chunks split the file in many places, including inside quoted values with line breaks
+    monkeypatch.setattr(RowImport, "chunk_size", generator.choice([16, 64, 1000]))
+    row_import = RowImport(path, "Roads", CATEGORY_FIELDS, DATE_ENTERED)
+    row_import.run()
+    assert row_import.error == ""
+
+    items, error_lines = scan(path, delimiter)
+    assert row_import.items == items
+    assert [int(error.split(":")[0].split()[1]) for error in row_import.errors] == error_lines
+
+
+def test_file_without_matching_columns(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("First,Second\n1,2\n", encoding="utf-8")
+    row_import = RowImport(str(path), "Roads", CATEGORY_FIELDS, DATE_ENTERED)
+    row_import.run()
+    assert "None of the file's columns" in row_import.error
+    assert row_import.items == []
+
+
+def test_missing_file(tmp_path):
+    row_import = RowImport(str(tmp_path / "missing.csv"), "Roads", CATEGORY_FIELDS, DATE_ENTERED)
+    row_import.run()
+    assert row_import.error
+
+
+def test_read_chunks_keeps_quoted_line_breaks(tmp_path):
+    path = tmp_path / "rows.csv"
+    text = 'a,"one\ntwo"\nb,"three\n\nfour"\nc,five\n'
+    path.write_text(text, encoding="utf-8")
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        chunks = list(read_chunks(file, 3))
+    assert "".join(chunks) == text
+    for chunk in chunks:
+        assert chunk.count('"') % 2 == 0
@@ -0,0 +1,157 @@
+import random
+import pytest
+from search_index import *
+
+WORDS = ["alpha", "beta", "gamma", "delta", "road", "rain", "snow", "sun", "ice", "fog", "wind", "hail"]
+
+
+def random_item(generator):
+    """Returns an item with a few random words in a text field and a field with multiple inputs"""
+    return {"Category": "Weather", "Date Entered": "2024-01-01 00:00:00.000000",
+            "Note": " ".join(generator.choice(WORDS) + str(generator.randint(0, 30)) for _ in range(3)),
+            "Tags": [generator.choice(WORDS).upper(), generator.choice(WORDS)]}
+
+
+def random_query(generator):
+    """Returns one or two word prefixes"""
+    query = generator.choice(WORDS)[:generator.randint(1, 5)]
+    if generator.random() < 0.5:
+        query += " " + generator.choice(WORDS)[:generator.randint(1, 3)]
+    return query
+
+
+def scan(data, query):
+    """Returns the keys of the items matching every word of a query, by reading every item"""
+    query_terms = SearchIndex.tokenize(query)
+    if not query_terms:
+        return set()
+    matches = set()
+    for key, item in data.items():
+        values = []
+        for label, value in item.items():
+            if label in SearchIndex.unindexed_labels:
+                continue
+            if isinstance(value, list):
+                values.extend(value)
+            else:
+                values.append(str(value))
+        words = SearchIndex.tokenize(" ".join(values))
+        if all(any(word.startswith(term) for word in words) for term in query_terms):
+            matches.add(key)
+    return matches
+
+
+def assert_consistent(index, data):
+    """Checks that the index's words and postings describe exactly the catalog's items"""
+    assert index.sorted_terms == sorted(index.postings)
+    assert set(index.item_terms) == set(data)
+    for term, postings in index.postings.items():
+        assert postings
+        for key, count in postings.items():
+            assert index.item_terms[key][term] == count
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_search_matches_scan(seed, monkeypatch):
+    generator = random.Random(seed)
+    monkeypatch.setattr(SearchIndex, "background_batch_size", generator.choice([1, 10, 100]))
+    data = {str(key): random_item(generator) for key in range(generator.randint(0, 300))}
+    index = SearchIndex()
+    index.build({"Data": data})
+    next_key = len(data)
+
+    for step in range(200):
+        action = generator.random()
+        if action < 0.25:
+            # Insert a batch, sometimes replacing an existing item, as Catalog.insert_items does
+            batch = [(str(next_key + offset), random_item(generator)) for offset in range(generator.randint(1, 60))]
+            next_key += len(batch)
+            if data and generator.random() < 0.3:
+                batch.append((generator.choice(list(data)), random_item(generator)))
+            index.set_inserted_items(batch)
+            inserted_keys = []
+            for key, item in batch:
+                if key in data:
+                    data[key] = item
+                    index.update_item(key)
+                else:
+                    data[key] = item
+                    inserted_keys.append(key)
+            index.add_items(inserted_keys)
+        elif action < 0.35:
+            key = str(next_key)
+            next_key += 1
+            data[key] = random_item(generator)
+            index.add_item(key)
+        elif action < 0.5 and data:
+            key = generator.choice(list(data))
+            data[key] = random_item(generator)
+            index.update_item(key)
+        elif action < 0.6 and data:
+            key = generator.choice(list(data))
+            del data[key]
+            index.remove_item(key)
+        else:
+            query = random_query(generator)
+            assert set(index.search(query)) == scan(data, query)
+            assert_consistent(index, data)
+
+
+def test_search_ranks_rare_words_first():
+    data = {"common": {"Note": "road road"}, "rare": {"Note": "road hail"}, "other": {"Note": "road"}}
+    index = SearchIndex()
+    index.build({"Data": data})
+    assert index.search("road h") == ["rare"]
+    assert set(index.search("road")) == set(data)
+    assert index.search("road")[0] == "common"
+
+
+def test_build_indexes_in_background_without_sharing_items():
+    data = {str(key): {"Note": "snow " + str(key)} for key in range(50)}
+    index = SearchIndex()
+    index.build({"Data": data})
+    assert index.builder is not None
+    assert not index.item_terms
+
+    # The background thread indexes its own copy, so later changes are applied once its index is merged
+    data["0"] = {"Note": "rain"}
+    index.update_item("0")
+    del data["1"]
+    index.remove_item("1")
+    assert set(index.search("snow")) == set(data) - {"0"}
+    assert index.search("rain") == ["0"]
+    assert index.builder is None
+    assert_consistent(index, data)
+
+
+def test_large_batch_keeps_existing_index(monkeypatch):
+    monkeypatch.setattr(SearchIndex, "background_batch_size", 10)
+    data = {"old": {"Note": "fog"}}
+    index = SearchIndex()
+    index.build({"Data": data})
+    index.search("fog")
+    postings = index.postings["fog"]
+
+    batch = [(str(key), {"Note": "fog ice"}) for key in range(20)]
+    data.update(batch)
+    index.set_inserted_items(batch)
+    index.add_items([key for key, item in batch])
+    assert index.postings["fog"] is postings
+    assert set(index.search("fog")) == set(data)
+    assert set(index.search("ice")) == set(data) - {"old"}
+    assert_consistent(index, data)
+
+
+def test_rebuild_discards_previous_catalog():
+    index = SearchIndex()
+    index.build({"Data": {"a": {"Note": "wind"}}})
+    index.build({"Data": {"b": {"Note": "sun"}}})
+    assert index.search("wind") == []
+    assert index.search("sun") == ["b"]
+
+
+def test_empty_query():
+    index = SearchIndex()
+    index.build({"Data": {"a": {"Note": "wind"}}})
+    assert index.search("") == []
+    assert index.search("  ,. ") == []
@@ -0,0 +1,84 @@
+import random
+import pytest
+from catalog_columns import *
+from sort_index import *
+
+PROFILE = {"Category Fields": {"A": {"0": ["Name", "Text", []], "1": ["Kind", "Dropdown", ["x", "y"]]}}}
+LABELS = ["Name", "Kind", "Date Entered", "Missing"]
+
+
+def random_value(generator):
+    """Returns text, numbers written as text, dates, lists and other values that sort in different groups"""
+    return generator.choice(["", "b", "B", "a", "Ärger", "10", "9", "-2.5", "1e3", "nan", "x", "y", ["b", "a"], 7,
+                             2.5, None, True, "3.4.2024-5:6:7", "12.1.2023-0:0:0"])
+
+
+def random_item(generator):
+    """Returns an item with random values for some of the sorted labels"""
+    item = {"Category": "A", "Kind": generator.choice(["x", "y"])}
+    for label in ["Name", "Date Entered"]:
+        if generator.random() < 0.8:
+            item[label] = random_value(generator)
+    return item
+
+
+def scan(data, label):
+    """Returns every key sorted by a label, with equal values in the order they were inserted"""
+    positions = {key: position for position, key in enumerate(data)}
+    return sorted(data, key=lambda key: (sort_key(label, data[key].get(label)), positions[key]))
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_sorted_keys_match_sort(seed, columnar):
+    generator = random.Random(seed)
+    data = ColumnarItems(PROFILE) if columnar else {}
+    reference = {}
+    for key in range(generator.randint(0, 80)):
+        reference[str(key)] = data[str(key)] = random_item(generator)
+    index = SortIndex()
+    index.build({"Data": data})
+    next_key = len(reference)
+
+    for step in range(300):
+        action = generator.random()
+        if action < 0.2:
+            # Batches on either side of the size that's merged all at once
+            keys = [str(next_key + offset) for offset in range(generator.choice([1, 3, 1, 3, 150]))]
+            next_key += len(keys)
+            for key in keys:
+                reference[key] = data[key] = random_item(generator)
+            index.add_items(keys)
+        elif action < 0.35 and reference:
+            key = generator.choice(list(reference))
+            reference[key] = data[key] = random_item(generator)
+            index.update_item(key)
+        elif action < 0.5 and reference:
+            key = generator.choice(list(reference))
+            del reference[key]
+            del data[key]
+            index.remove_item(key)
+        else:
+            label = generator.choice(LABELS)
+            expected = scan(reference, label)
+            assert index.sorted_keys(label) == expected
+            assert index.sorted_keys(label, descending=True) == expected[::-1]
+            if expected:
+                key = generator.choice(expected)
+                assert index.position(label, key) == expected.index(key)
+                subset = generator.sample(expected, min(len(expected), 10))
+                assert index.sort(subset, label) == [key for key in expected if key in subset]
+
+
+def test_sort_key_groups():
+    values = ["b", None, "10", "A", "", 2, "9", "a", ["c", "d"], "-1.5"]
+    ordered = sorted(values, key=lambda value: sort_key("Name", value))
+    assert ordered[:4] == ["-1.5", 2, "9", "10"]
+    assert ordered[4:8] == ["A", "a", "b", ["c", "d"]]
+    assert set(map(str, ordered[8:])) == {"None", ""}
+
+    # Dates are only read as dates in the "Date Entered" field, where they sort before text
+    dates = ["text", "3.4.2024-5:6:7", "12.1.2023-0:0:0", "1.1.2020-0:0:0"]
+    assert sorted(dates, key=lambda value: sort_key("Date Entered", value)) == \
+        ["1.1.2020-0:0:0", "12.1.2023-0:0:0", "3.4.2024-5:6:7", "text"]
+    assert sort_key("Name", "3.4.2024-5:6:7")[0] == 2
@@ -0,0 +1,57 @@
+from operation_timing import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from PyQt5.QtWidgets import *
+
+
+class TimingOverlay(QLabel):
+    """A table of the recorded operation timings drawn over the top right corner of a window, which is refreshed
+    while it's shown"""
+
+    # The time, in milliseconds, between refreshes of the table
+    refresh_interval = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.RichText)
+        self.setStyleSheet("""
+            .TimingOverlay {
+                background-color: rgba(0, 0, 0, 170);
+                color: #f3ffbd;
+                font-size: 11px;
+                padding: 6px;
+            }
+        """)
+        self.hide()
+
+        # Initialize the timer that refreshes the table while it's shown
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.refresh_interval)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def set_shown(self, shown):
+        """Shows or hides the table, refreshing it only while it's shown"""
+        if shown:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+            self.hide()
+
+    def refresh(self):
+        """Fills in the table with the latest timings and moves it back to the corner of its window"""
+        operations = operation_timing.report()["Operations"]
+        rows = ["<tr><th align='left'>Operation</th><th>Count</th><th>Mean</th><th>P95</th><th>Max</th></tr>"]
+        for operation, stats in operations.items():
+            rows.append("<tr><td>{}</td><td align='right'>{}</td><td align='right'>{:.1f}</td>"
+                        "<td align='right'>{:g}</td><td align='right'>{:.1f}</td></tr>"
+                        .format(operation, stats["Count"], stats["Mean"], stats["P95"], stats["Maximum"]))
+        if not operations:
+            rows.append("<tr><td colspan='5'>No operations recorded</td></tr>")
+        status = "" if operation_timing.enabled else "<p>Recording is off</p>"
+        self.setText("<table cellspacing='4'>" + "".join(rows) + "</table>" + status)
+        self.adjustSize()
+        self.move(self.parentWidget().width() - self.width() - 10, 10)